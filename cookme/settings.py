@@ -1,4 +1,5 @@
 import os
+
 import dj_database_url
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,28 +24,42 @@ INSTALLED_APPS = [
     'ingredients',
     'fridge',
     'search',
+    'utilities',
+    'jobs',
 ]
 
 MIDDLEWARE_CLASSES = [
+    'utilities.timing.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'utilities.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
+    'utilities.profiling.ProfilingMiddleware',
+    'fridge.middleware.FridgeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'cookme.urls'
 
+# FridgeBackend loads fridges along with users (see fridge/backends.py).
+# ModelBackend only serves sessions that were started before; it can go once
+# they have expired (SESSION_COOKIE_AGE).
+AUTHENTICATION_BACKENDS = [
+    'fridge.backends.FridgeBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Although this set up does not follow recommendations, it is easier
 # to manage in a small practice project with no plans of reusing apps.
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'utilities.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -53,6 +68,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'fridge.context_processors.user_recipes',
             ],
         },
     },
@@ -124,12 +140,96 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Overrides some of the custom settings below while testing (see
+# cookme/test_runner.py).
+TEST_RUNNER = 'cookme.test_runner.TestRunner'
+
 
 # Custom settings
 
+# Tokens that tell processes their in-memory data is stale (see
+# utilities/shared_tokens.py) are shared by every web and worker process, so
+# they live in the database (manage.py createcachetable). Values that may
+# differ between processes for a while (e.g., estimated counts, cached
+# pages) are kept in memory, where reading them costs no query.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cookme_cache',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+# Seconds for which a process trusts the shared tokens it read last, i.e.,
+# how long other processes may serve data that was changed elsewhere.
+SHARED_TOKEN_TTL = 5
+
 # Image-related
 MAX_WIDTH = 800
 MAX_HEIGHT = 600
+# Uploads that take more pixels to decode are scaled down by a job (see
+# utilities/images.py). JPEGs are decoded at a fraction of their size.
+IMAGE_INLINE_PIXELS = 4000000
+# Uploads that take more pixels to decode are rejected.
+IMAGE_MAX_PIXELS = 50000000
+
+# Search results cache (see utilities/result_cache.py)
+SEARCH_CACHE_SIZE = 1000
+SEARCH_CACHE_TTL = 300  # seconds
+
+# Seconds after which the search index (see utilities/search_index.py) is
+# rebuilt even if no change was signalled, e.g., after bulk updates.
+SEARCH_INDEX_MAX_AGE = 900
+# Seconds after which views of recipes, which rank search results, are read
+# again. Views do not invalidate the index.
+SEARCH_INDEX_VIEWS_TTL = 60
+
+# Recipe view counter (see recipes/counters.py)
+VIEW_COUNTER_INTERVAL = 10  # seconds
+VIEW_COUNTER_THRESHOLD = 1000  # buffered recipes
+
+# Show an estimated number of recipes on the keyset paginated recipe list
+# (see utilities/pagination.py)
+RECIPES_ESTIMATED_TOTAL = True
+
+# Whole-page cache for anonymous visitors (see utilities/page_cache.py).
+PAGE_CACHE_TIMEOUT = 600  # seconds; 0 disables the cache
+PAGE_CACHE_MAX_AGE = 60  # seconds browsers and proxies may keep a page for
+
+# Job queue (see jobs/queue.py)
+JOBS_EAGER = False  # run jobs as soon as they are enqueued, without workers
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF = 10  # seconds before the first retry; doubled with every attempt
+JOBS_BACKOFF_MAX = 3600  # seconds
+JOBS_HEARTBEAT = 60  # seconds between refreshes of running jobs
+JOBS_TIMEOUT = 600  # seconds without a refresh after which a job is considered abandoned
+JOBS_POLL_INTERVAL = 1  # seconds
+
+# Request timing (see utilities/timing.py): share of requests that are
+# measured and the duration (in seconds) after which a request is slow.
+TIMING_SAMPLE_RATE = 0.1
+TIMING_SLOW_REQUEST = 1.0
+
+# Request profiler (see utilities/profiling.py)
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_INTERVAL = 0.005  # seconds between samples
+PROFILE_KEEP = 50  # captures
+
+
+# Logging
+# Request timings (see utilities/timing.py) go to the console, where the
+# platform collects them.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'cookme.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
 
 
 # Deployment settings
@@ -160,6 +260,8 @@ AWS_SECRET_ACCESS_KEY = os.environ['AWS_SECRET_ACCESS_KEY']
 
 # Tell django-storages the domain to use to refer to static files.
 AWS_S3_CUSTOM_DOMAIN = '%s.s3.amazonaws.com' % AWS_STORAGE_BUCKET_NAME
+# URLs of public files memoized by each storage (see custom_storages.py).
+STORAGE_URL_CACHE_SIZE = 10000
 
 # Tell the staticfiles app to use S3Boto3 storage when writing the collected static files (when
 # you run `collectstatic`).
@@ -167,4 +269,4 @@ STATICFILES_LOCATION = 'static'
 STATICFILES_STORAGE = 'custom_storages.StaticStorage'
 
 MEDIAFILES_LOCATION = 'media'
-DEFAULT_FILE_STORAGE = 'custom_storages.MediaStorage'
\ No newline at end of file
+DEFAULT_FILE_STORAGE = 'custom_storages.MediaStorage'
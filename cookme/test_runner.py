@@ -0,0 +1,30 @@
+"""
+Test runner of the project.
+
+Settings below suit tests better than the production ones: pages are not
+cached, shared tokens are read every time (a token kept in memory would
+outlive the rollback of a test), jobs run as soon as they are enqueued
+(there are no workers) and requests are not timed. Tests that need
+otherwise use override_settings.
+"""
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_SETTINGS = {
+    'PAGE_CACHE_TIMEOUT': 0,
+    'SHARED_TOKEN_TTL': 0,
+    'JOBS_EAGER': True,
+    'TIMING_SAMPLE_RATE': 0,
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
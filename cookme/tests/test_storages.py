@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from custom_storages import MediaStorage, StaticStorage
+
+
+class CachedURLTests(SimpleTestCase):
+    def test_custom_domain_url(self):
+        storage = MediaStorage(custom_domain='cdn.example.com')
+
+        self.assertEqual(storage.url('recipes/soup pie.jpg'),
+                         'https://cdn.example.com/media/recipes/soup%20pie.jpg')
+
+    def test_url_memoized(self):
+        storage = StaticStorage(custom_domain='cdn.example.com')
+
+        with mock.patch.object(S3Boto3Storage, 'url', return_value='url') as url:
+            storage.url('css/main.css')
+            storage.url('css/main.css')
+            storage.url('js/main.js')
+
+        self.assertEqual(url.call_count, 2)
+
+    def test_no_client_needed(self):
+        storage = MediaStorage(custom_domain='cdn.example.com')
+
+        with mock.patch.object(S3Boto3Storage, 'connection', new_callable=mock.PropertyMock,
+                               side_effect=AssertionError('Client was created.')):
+            storage.url('recipes/soup.jpg')
+
+    def test_cache_is_bounded(self):
+        with self.settings(STORAGE_URL_CACHE_SIZE=2):
+            storage = MediaStorage(custom_domain='cdn.example.com')
+        for n in range(5):
+            storage.url(f'{n}.jpg')
+
+        self.assertEqual(storage._public_url.cache_info().currsize, 2)
+
+    def test_signed_urls_not_cached(self):
+        storage = MediaStorage(custom_domain=None, querystring_auth=True)
+
+        with mock.patch.object(S3Boto3Storage, 'url', return_value='signed') as url:
+            storage.url('recipes/soup.jpg')
+            storage.url('recipes/soup.jpg')
+
+        self.assertEqual(url.call_count, 2)
+
+    def test_parameters_not_cached(self):
+        storage = MediaStorage(custom_domain='cdn.example.com')
+
+        with mock.patch.object(S3Boto3Storage, 'url', return_value='url') as url:
+            storage.url('recipes/soup.jpg', expire=60)
+            storage.url('recipes/soup.jpg', expire=60)
+
+        self.assertEqual(url.call_count, 2)
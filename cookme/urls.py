@@ -38,6 +38,7 @@ urlpatterns = [
     url(r'^search/', include('search.urls', namespace='search')),
 
     # Admin
+    url(r'^admin/profiles/', include('utilities.urls', namespace='profiles')),
     url(r'^admin/', admin.site.urls),
     # Should NOT be used in production environment.
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -10,7 +10,6 @@ from django.contrib.auth.forms import UserCreationForm
 from django.core.urlresolvers import reverse
 from django.shortcuts import render, HttpResponseRedirect
 
-from fridge.models import Fridge
 from recipes.models import Recipe
 from search.forms import SearchForm
 from utilities.search_helpers import encode
@@ -24,7 +23,7 @@ def home(request):
     content = dict()
     user = request.user
     if user.is_authenticated:
-        fridge = Fridge.objects.get_or_create(user=user)[0]
+        fridge = request.fridge
         user_additions = (Recipe.objects.filter(author=user)
                           .order_by('-date')[:4])
 
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/1.9/howto/deployment/wsgi/
 """
 
+import atexit
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cookme.settings")
 
 application = get_wsgi_application()
+
+# Gunicorn workers exit through sys.exit(), hence buffered recipe views
+# survive graceful restarts.
+from recipes.counters import view_counter  # noqa: E402 (needs apps loaded)
+atexit.register(view_counter.flush)
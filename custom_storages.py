@@ -1,10 +1,41 @@
+"""
+Storages of static and media files on Amazon S3.
+
+URLs of public objects (served from AWS_S3_CUSTOM_DOMAIN or without query
+string authentication) depend on nothing but the name of an object, yet
+every {% static %} tag and every image of a recipe card asks for one.
+Hence they are memoized in a bounded, per-process LRU cache. Signed URLs
+expire, so they are never cached.
+"""
+
+from functools import lru_cache
+
 from django.conf import settings
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
-class StaticStorage(S3Boto3Storage):
+class CachedURLMixin:
+    """ Memoizes URLs of public objects (see above). """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._public_url = lru_cache(maxsize=getattr(settings, 'STORAGE_URL_CACHE_SIZE', 10000))(
+            self._build_public_url)
+
+    def _build_public_url(self, name):
+        # Same as S3Boto3Storage.url(), which, with a custom domain, does not
+        # need a client, but also cleans and normalizes the name every time.
+        return super().url(name)
+
+    def url(self, name, parameters=None, expire=None):
+        if parameters or expire or (self.querystring_auth and not self.custom_domain):
+            return super().url(name, parameters, expire)
+        return self._public_url(name)
+
+
+class StaticStorage(CachedURLMixin, S3Boto3Storage):
     location = settings.STATICFILES_LOCATION
 
 
-class MediaStorage(S3Boto3Storage):
+class MediaStorage(CachedURLMixin, S3Boto3Storage):
     location = settings.MEDIAFILES_LOCATION
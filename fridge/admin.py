@@ -6,6 +6,10 @@ from .models import Fridge, FridgeIngredient
 class FridgeAdmin(admin.ModelAdmin):
     list_display = ('id', '__str__', 'recipe_list', 'ingredient_list')
     list_display_links = ('__str__',)
+    list_select_related = ('user',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('ingredients', 'recipes')
 
     def ingredient_list(self, obj):
         return ", ".join([ingredient.name for ingredient in obj.ingredients.all()])
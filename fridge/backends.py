@@ -0,0 +1,22 @@
+"""
+Authentication backend that loads the fridge of a user along with the user.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class FridgeBackend(ModelBackend):
+    """
+    Same as ModelBackend, but the user of every request is fetched together
+    with their fridge (one query with a join), so that request.fridge (see
+    fridge.middleware) costs nothing and is never stale.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('fridge').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
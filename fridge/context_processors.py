@@ -0,0 +1,33 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import Fridge
+
+
+def fridge_recipe_ids(request):
+    """
+    Returns ids of recipes in the fridge of the current user. The set is
+    loaded with a single query and remembered for the rest of the request,
+    so that every recipe card, template and view can check membership
+    without hitting the database again.
+
+    :param request: standard request object.
+    :return: a set of recipe ids (empty for anonymous users).
+    """
+
+    if not hasattr(request, '_fridge_recipe_ids'):
+        ids = set()
+        if request.user.is_authenticated:
+            ids = set(Fridge.recipes.through.objects
+                      .filter(fridge__user=request.user)
+                      .values_list('recipe_id', flat=True))
+        request._fridge_recipe_ids = ids
+    return request._fridge_recipe_ids
+
+
+def user_recipes(request):
+    """
+    Adds ids of the user's fridge recipes to every template context as
+    'user_recipes'. The set is lazy: pages that do not use it cost nothing.
+    """
+
+    return {'user_recipes': SimpleLazyObject(lambda: fridge_recipe_ids(request))}
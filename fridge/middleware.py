@@ -0,0 +1,43 @@
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .models import Fridge
+
+
+def get_fridge(request):
+    """
+    Returns the fridge of the current user.
+
+    FridgeBackend loads the fridge by the same query as the user, so most
+    requests get it without querying the database. As it is read anew on
+    every request, a fridge that was deleted (e.g., in the admin) is never
+    used again.
+
+    Note: fridges are created together with users (see fridge.models), but
+    the lookup falls back to get_or_create() in case one is missing. It is
+    also a query for users that were loaded by another backend.
+
+    :param request: standard request object.
+    :return: Fridge instance or None for anonymous users.
+    """
+
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    try:
+        return user.fridge
+    except Fridge.DoesNotExist:
+        return Fridge.objects.get_or_create(user=user)[0]
+
+
+class FridgeMiddleware(MiddlewareMixin):
+    """
+    Provides request.fridge, which is resolved lazily: requests that do not
+    touch the fridge cost nothing.
+
+    Must come after AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        request.fridge = SimpleLazyObject(lambda: get_fridge(request))
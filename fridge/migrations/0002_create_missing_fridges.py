@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_missing_fridges(apps, schema_editor):
+    """ Fridges are created with users now; give one to earlier users. """
+
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Fridge = apps.get_model('fridge', 'Fridge')
+    users = User.objects.filter(fridge__isnull=True).values_list('id', flat=True)
+    Fridge.objects.bulk_create(Fridge(user_id=user_id) for user_id in users)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('fridge', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_fridges, migrations.RunPython.noop),
+    ]
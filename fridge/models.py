@@ -1,6 +1,8 @@
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.urls import reverse
 
 from ingredients.models import Ingredient, Unit
@@ -25,10 +27,27 @@ class Fridge(models.Model):
     def __str__(self):
         return str(self.user) + '\'s fridge'
 
+    def stock(self):
+        """
+        :return: a dictionary of ingredient id -> (quantity, unit
+                 abbreviation) of every ingredient in the fridge.
+        """
+
+        items = (FridgeIngredient.objects.filter(fridge=self)
+                 .values_list('ingredient_id', 'quantity', 'unit__abbrev'))
+        return {ingredient: (quantity, unit) for ingredient, quantity, unit in items}
+
     def get_absolute_url(self):
         return reverse('fridge:fridge_detail')
 
 
+@receiver(post_save, sender=User, dispatch_uid='fridge_user_created')
+def _create_fridge(sender, instance, created, raw=False, **kwargs):
+    # Every user has a fridge, so that views never have to create one.
+    if created and not raw:
+        Fridge.objects.create(user=instance)
+
+
 class FridgeIngredient(models.Model):
     """
     Represents ingredients in the fridge.
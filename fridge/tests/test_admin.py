@@ -11,7 +11,7 @@ from recipes.models import Recipe
 class FridgeAdminTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='test')
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.site = AdminSite()
 
     def test_ingredient_list_is_shown(self):
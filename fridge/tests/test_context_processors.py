@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User, AnonymousUser
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from fridge.context_processors import fridge_recipe_ids, user_recipes
+from fridge.models import Fridge
+from recipes.models import Recipe
+
+
+class FridgeRecipeIdsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='test')
+        self.fridge = Fridge.objects.get(user=self.user)
+        self.r1 = Recipe.objects.create(author=self.user, title='test1')
+        self.r2 = Recipe.objects.create(author=self.user, title='test2')
+        self.fridge.recipes.add(self.r1)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_ids_of_fridge_recipes(self):
+        self.assertEqual(fridge_recipe_ids(self.request), {self.r1.pk})
+
+    def test_anonymous_user_has_no_recipes(self):
+        self.request.user = AnonymousUser()
+
+        with self.assertNumQueries(0):
+            ids = fridge_recipe_ids(self.request)
+
+        self.assertEqual(ids, set())
+
+    def test_ids_are_loaded_once_per_request(self):
+        with self.assertNumQueries(1):
+            fridge_recipe_ids(self.request)
+            fridge_recipe_ids(self.request)
+
+    def test_context_is_lazy(self):
+        with self.assertNumQueries(0):
+            context = user_recipes(self.request)
+
+        self.assertIn(self.r1.pk, context['user_recipes'])
+        self.assertNotIn(self.r2.pk, context['user_recipes'])
+
+
+class RecipeCardsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='test')
+        self.fridge = Fridge.objects.get(user=self.user)
+        self.client.login(username='test', password='test')
+        self.url = reverse('recipes:recipes')
+
+    def create_recipes(self, count):
+        for i in range(count):
+            recipe = Recipe.objects.create(author=self.user, title=f'test{i}')
+            self.fridge.recipes.add(recipe)
+
+    def test_number_of_queries_does_not_depend_on_number_of_cards(self):
+        self.create_recipes(1)
+        self.client.get(self.url)  # Caches the estimated number of recipes.
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(self.url)
+        self.create_recipes(5)
+        with CaptureQueriesContext(connection) as six:
+            self.client.get(self.url)
+
+        self.assertEqual(len(one), len(six))
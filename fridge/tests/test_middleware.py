@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+from django.contrib.auth.models import User, AnonymousUser
+from django.core.urlresolvers import reverse
+from django.test import TestCase, RequestFactory
+
+from fridge.backends import FridgeBackend
+from fridge.middleware import FridgeMiddleware, get_fridge
+from fridge.models import Fridge
+
+
+class FridgeCreationTests(TestCase):
+    def test_fridge_created_with_user(self):
+        user = User.objects.create_user(username='test', password='test')
+
+        self.assertTrue(Fridge.objects.filter(user=user).exists())
+
+    def test_updating_user_does_not_create_fridge(self):
+        user = User.objects.create_user(username='test', password='test')
+        user.first_name = 'Test'
+        user.save()
+
+        self.assertEqual(Fridge.objects.filter(user=user).count(), 1)
+
+
+class FridgeMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='test')
+        self.fridge = Fridge.objects.get(user=self.user)
+        self.request = RequestFactory().get('/')
+        self.request.user = FridgeBackend().get_user(self.user.pk)
+
+    def test_fridge_is_lazy(self):
+        with self.assertNumQueries(0):
+            FridgeMiddleware().process_request(self.request)
+
+        self.assertEqual(self.request.fridge.pk, self.fridge.pk)
+
+    def test_anonymous_user_has_no_fridge(self):
+        self.request.user = AnonymousUser()
+
+        self.assertIsNone(get_fridge(self.request))
+
+    def test_fridge_loaded_with_user(self):
+        with self.assertNumQueries(0):
+            fridge = get_fridge(self.request)
+
+        self.assertEqual(fridge.pk, self.fridge.pk)
+        self.assertEqual(fridge.user_id, self.user.pk)
+
+    def test_user_of_other_backend(self):
+        self.request.user = self.user
+
+        self.assertEqual(get_fridge(self.request).pk, self.fridge.pk)
+
+    def test_missing_fridge_created(self):
+        self.fridge.delete()
+        self.request.user = FridgeBackend().get_user(self.user.pk)
+
+        fridge = get_fridge(self.request)
+
+        self.assertEqual(Fridge.objects.get(user=self.user).pk, fridge.pk)
+
+    def test_deleted_fridge_not_used_by_logged_in_user(self):
+        self.client.login(username='test', password='test')
+        self.client.get(reverse('fridge:fridge_detail'))
+        self.fridge.delete()
+
+        response = self.client.get(reverse('fridge:fridge_detail'))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.wsgi_request.fridge, Fridge.objects.get(user=self.user))
@@ -9,7 +9,7 @@ from ingredients.models import Ingredient, Unit
 class FridgeTests(TestCase):
     def setUp(self):
         self.user = User.objects.create(username='test')
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
 
     def test_str_representation(self):
         expected = f"{self.user.username}'s fridge"
@@ -27,7 +27,7 @@ class FridgeTests(TestCase):
 class FridgeIngredientTests(TestCase):
     def setUp(self):
         self.user = User.objects.create(username='test')
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.unit = Unit.objects.create(name='kilogram', abbrev='kg')
         self.ingredient = Ingredient.objects.create(name='Meat', type='Meat')
         self.fi = FridgeIngredient.objects.create(fridge=self.fridge,
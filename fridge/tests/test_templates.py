@@ -152,7 +152,7 @@ class FridgeDetailTests(TestCase):
 
     def setUp(self):
         self.user = User.objects.create_user(username='test', password='test')
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.client = logged_in_client()
         self.url = reverse('fridge:fridge_detail')
 
@@ -13,6 +13,7 @@ from fridge.views import (
     remove_recipe,
     possibilities,
     fridge_recipes,
+    recipe_ids,
 )
 from ingredients.models import Ingredient, Unit
 from recipes.models import Recipe, RecipeIngredient as RI
@@ -26,7 +27,7 @@ class FridgeDetailViewURLsTests(TestCase):
     def setUp(self):
         self.url = reverse('fridge:fridge_detail')
         self.user = User.objects.create_user(username='test', password='test')
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.unit = Unit.objects.create(name='kilogram', abbrev='kg')
         self.client = logged_in_client()
         self.data = {'ingredient': 'test', 'unit': self.unit.pk, 'quantity': 1}
@@ -88,6 +89,32 @@ class FridgeDetailViewURLsTests(TestCase):
 
         self.assertEqual(fi.quantity, 2)
 
+    def test_added_quantity_is_converted_to_existing_unit(self):
+        i = Ingredient.objects.create(name='test', description='test', type='Fruit')
+        FridgeIngredient.objects.create(fridge=self.fridge, ingredient=i, unit=self.unit, quantity=1)
+        grams = Unit.objects.create(name='gram', abbrev='g')
+        self.data['unit'] = grams.pk
+        self.data['quantity'] = 500
+
+        self.client.post(self.url, self.data)
+        fi = FridgeIngredient.objects.get(ingredient=i)
+
+        self.assertEqual(fi.quantity, 1.5)
+        self.assertEqual(fi.unit, self.unit)
+
+    def test_inconvertible_quantity_is_not_added(self):
+        i = Ingredient.objects.create(name='test', description='test', type='Fruit')
+        FridgeIngredient.objects.create(fridge=self.fridge, ingredient=i, unit=self.unit, quantity=1)
+        units = Unit.objects.create(name='unit', abbrev='unit')
+        self.data['unit'] = units.pk
+
+        response = self.client.post(self.url, self.data)
+        fi = FridgeIngredient.objects.get(ingredient=i)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['form'].errors['unit'])
+        self.assertEqual(fi.quantity, 1)
+
     def test_fridge_ingredient_created_when_form_valid(self):
         response = self.client.post(self.url, self.data)
         self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -107,10 +134,11 @@ class FridgeDetailViewURLsTests(TestCase):
         Fridge.objects.all().delete()
 
         response = self.client.get(self.url)
-        fridge = Fridge.objects.get(user=self.user)
+        # Fridge is resolved lazily, upon first use.
+        fridge_id = response.wsgi_request.fridge.pk
 
         self.assertEqual(response.status_code, HTTPStatus.OK)
-        self.assertTrue(fridge)
+        self.assertEqual(fridge_id, Fridge.objects.get(user=self.user).pk)
 
     def test_fridge_created_when_homepage_visited(self):
         Fridge.objects.all().delete()
@@ -134,7 +162,7 @@ class RemoveRecipeTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='test', password='test')
         self.client = logged_in_client()
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.r = Recipe.objects.create(author=self.user, title='test',
                                        description='test', steps='test')
         self.fridge.recipes.add(self.r)
@@ -174,7 +202,7 @@ class RemoveRecipeTests(TestCase):
         u2 = User.objects.create_user(username='test2', password='test2')
         c2 = Client()
         c2.login(username='test2', password='test2')
-        f2 = Fridge.objects.create(user=u2)
+        f2 = Fridge.objects.get(user=u2)
         f2.recipes.add(self.r)
 
         response = c2.get(self.url)
@@ -198,7 +226,7 @@ class RemoveIngredientTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='test', password='test')
         self.client = logged_in_client()
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.unit = Unit.objects.create(name='kg', abbrev='kg')
         self.i1 = Ingredient.objects.create(name='test1', type='Fruit')
         self.i2 = Ingredient.objects.create(name='test2', type='Fruit')
@@ -232,7 +260,7 @@ class RemoveIngredientTests(TestCase):
 
     def test_removing_ingredient_from_other_fridge_not_allowed(self):
         other_user = User.objects.create_user(username='other')
-        other_fridge = Fridge.objects.create(user=other_user)
+        other_fridge = Fridge.objects.get(user=other_user)
         fi3 = FridgeIngredient.objects.create(fridge=other_fridge, unit=self.unit, quantity=1,
                                               ingredient=self.i1)
 
@@ -305,10 +333,11 @@ class AddRecipeViewTests(TestCase):
         self.assertFalse(fridges)
 
         response = self.client.get(self.url)
-        fridge = Fridge.objects.get(user=self.user)
+        # Fridge is resolved lazily, upon first use.
+        fridge_id = response.wsgi_request.fridge.pk
 
         self.assertEqual(response.status_code, HTTPStatus.OK)
-        self.assertTrue(fridge)
+        self.assertEqual(fridge_id, Fridge.objects.get(user=self.user).pk)
 
     def test_correct_template_used(self):
         response = self.client.get(self.url)
@@ -476,6 +505,36 @@ class FridgePossibilitiesTests(TestCase):
         self.assertNotEquals(list(all_recipes), list(response.context['recipes']))
         self.assertTrue(len(response.context['recipes']) == 1)
 
+    def test_recipes_with_missing_ingredients_are_shown_when_asked(self):
+        missing = self.ingredients[0]
+        FridgeIngredient.objects.get(ingredient=missing).delete()
+
+        response = self.client.get(self.url + '?missing=1')
+        recipes = list(response.context['recipes'])
+
+        self.assertEqual(len(recipes), 4)
+        self.assertEqual(recipes[0].missing, 0)
+        self.assertEqual(response.context['missing'], 1)
+
+    def test_invalid_missing_parameter_ignored(self):
+        response = self.client.get(self.url + '?missing=abc')
+
+        self.assertEqual(response.context['missing'], 0)
+
+    def test_quantities_are_matched_when_asked(self):
+        FridgeIngredient.objects.filter(ingredient=self.ingredients[0]).update(quantity=0.5)
+
+        response = self.client.get(self.url + '?quantities=1')
+
+        # Only the recipe without meat can be made.
+        self.assertEqual([r.title for r in response.context['recipes']], ['Lemonrec'])
+
+    def test_recipes_are_paginated(self):
+        response = self.client.get(self.url + '?page=2')
+
+        self.assertEqual(response.context['recipes'].number, 1)
+        self.assertEqual(response.context['recipes'].paginator.count, 4)
+
 
 class FridgePossibilitiesWithFridgeRecipesTests(TestCase):
     """
@@ -544,3 +603,35 @@ class FridgePossibilitiesWithFridgeRecipesTests(TestCase):
 
         self.assertNotEquals(self.recipes, list(response.context['recipes']))
         self.assertEquals(expected, list(response.context['recipes']))
+
+
+class RecipeIdsViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse('fridge:recipe_ids')
+        self.user = User.objects.create_user(username='test', password='test')
+        self.r1 = Recipe.objects.create(author=self.user, title='test1')
+        self.r2 = Recipe.objects.create(author=self.user, title='test2')
+        Fridge.objects.get(user=self.user).recipes.add(self.r2, self.r1)
+
+    def test_url_mapped_to_correct_view(self):
+        self.assertEqual(resolve(self.url).func, recipe_ids)
+
+    def test_returns_sorted_fridge_recipe_ids(self):
+        self.client.login(username='test', password='test')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json(), {
+            'authenticated': True,
+            'recipes': [self.r1.pk, self.r2.pk],
+        })
+
+    def test_anonymous_user_gets_nothing(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json(), {'authenticated': False, 'recipes': []})
+
+    def test_not_cached(self):
+        response = self.client.get(self.url)
+
+        self.assertIn('max-age=0', response['Cache-Control'])
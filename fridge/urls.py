@@ -7,6 +7,7 @@ from .views import (
     remove_recipe,
     possibilities,
     fridge_recipes,
+    recipe_ids,
 )
 
 urlpatterns = [
@@ -16,5 +17,6 @@ urlpatterns = [
     url(r'add_recipe/$', add_recipe, name='add_recipe'),
     url(r'remove_ingredient/(?P<pk>\d+)/$', remove_ingredient, name='remove_ingredient'),
     url(r'remove_recipe/(?P<pk>\d+)/$', remove_recipe, name='remove_recipe'),
+    url(r'recipe_ids/$', recipe_ids, name='recipe_ids'),
 
 ]
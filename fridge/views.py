@@ -1,17 +1,24 @@
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.urlresolvers import reverse
 from django.forms import formset_factory
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, HttpResponseRedirect
+from django.views.decorators.cache import never_cache
 
 from recipes.forms import (
     BaseRecipeIngredientFormSet,
     RecipeIngredientForm,
     AddRecipeForm,
 )
+from ingredients.units import convert, ConversionError
 from recipes.models import Recipe
-from utilities.search_helpers import recipes_containing
+from utilities.search_helpers import ranked_recipes
+from .context_processors import fridge_recipe_ids
 from .forms import FridgeIngredientForm
-from .models import FridgeIngredient, Fridge
+from .models import FridgeIngredient
+
+RECIPES_PER_PAGE = 12
 
 
 @login_required
@@ -33,10 +40,8 @@ def add_recipe(request):
     :return: default HttpResponse object (GET); redirect to fridge (POST).
     """
 
-    # Ensure that a user has a fridge to add recipes to, even if non-existent
-    # before requesting to add a recipe (should be impossible, but who knows).
     user = request.user
-    fridge = Fridge.objects.get_or_create(user=user)[0]
+    fridge = request.fridge
     RecInFormset = formset_factory(RecipeIngredientForm, formset=BaseRecipeIngredientFormSet)
 
     if request.method == 'POST':
@@ -87,18 +92,16 @@ def fridge_detail(request):
     other hand, if a FridgeIngredient instance does not exists, we create it,
     by passing in a fridge, which is not supplied with a form (but is required).
 
-    NOTE: incrementing is not perfect at the moment. If user has 2 units of
-    lemons, and adds another 500 grams of lemons, he/she will end up with 502
-    units of lemons, which is stupid. JS/AJAX to fix it? Separate functions
-    to convert it?
+    Added quantity is converted to the unit of the existing ingredient. If
+    the units cannot be converted (e.g., 500 grams of lemons are added to 2
+    units of lemons, but the weight of a lemon is unknown), an error is shown.
 
     :param request: default request object.
     :return: default HttpResponse object.
     """
 
-    user = request.user
-    fridge = Fridge.objects.get_or_create(user=user)[0]
-    ingredients = FridgeIngredient.objects.filter(fridge=fridge)
+    fridge = request.fridge
+    ingredients = FridgeIngredient.objects.filter(fridge=fridge).select_related('ingredient', 'unit')
     recipes = fridge.recipes.all()
 
     if request.method == 'POST':
@@ -107,16 +110,23 @@ def fridge_detail(request):
             fi = form.save(commit=False)
             try:
                 # If F.I. exists, we do not need to create it, only update it.
-                fi = FridgeIngredient.objects.get(fridge=fridge, ingredient=fi.ingredient)
-                fi.quantity += float(form.cleaned_data['quantity'])
+                existing = FridgeIngredient.objects.get(fridge=fridge, ingredient=fi.ingredient)
+                existing.quantity += convert(float(form.cleaned_data['quantity']),
+                                             fi.unit.abbrev, existing.unit.abbrev,
+                                             existing.ingredient)
+                fi = existing
             except FridgeIngredient.DoesNotExist:
                 # If it does not, we need to supply fridge in order to save it.
                 fi.fridge = fridge
-            fi.save()
+            except ConversionError as e:
+                form.add_error('unit', str(e))
+                fi = None
 
-            url = reverse('fridge:fridge_detail')
+            if fi:
+                fi.save()
+                url = reverse('fridge:fridge_detail')
 
-            return HttpResponseRedirect(url)
+                return HttpResponseRedirect(url)
     else:
         form = FridgeIngredientForm()
 
@@ -179,6 +189,13 @@ def possibilities(request):
     """
     Shows recipes that can be made with the ingredients in a fridge.
 
+    If 'missing' GET parameter is given, recipes that lack up to that many
+    ingredients are shown as well. Recipes are ordered by the number of
+    missing ingredients, then by popularity.
+
+    If 'quantities' GET parameter is given, quantities in the fridge have to
+    be sufficient as well: an ingredient that is short counts as missing.
+
     NOTE: ingredients are matched against ALL recipes, not only those in a
     fridge.
 
@@ -186,16 +203,19 @@ def possibilities(request):
     :return: standard HttpResponse object.
     """
 
-    user = request.user
-    fridge = Fridge.objects.get_or_create(user=user)[0]
+    fridge = request.fridge
     ingredients = fridge.ingredients.all()
     ingredients = [ingredient.name for ingredient in ingredients]
 
-    recipes = recipes_containing(ingredients)
+    missing = _missing_allowed(request)
+    stock = fridge.stock() if request.GET.get('quantities') else None
+    recipes = ranked_recipes(ingredients, missing=missing, stock=stock)
 
     content = {
         'ingredients': ingredients,
-        'recipes': recipes,
+        'recipes': _paginate(request, recipes),
+        'missing': missing,
+        'page_query': _page_query(missing, stock),
     }
 
     return render(request, 'fridge/possibilities.html', content)
@@ -207,21 +227,81 @@ def fridge_recipes(request):
     Chooses recipes from those in the fridge that can be made with ingredients
     that are in the fridge.
 
+    Accepts 'missing' and 'quantities' GET parameters, just like
+    possibilities view.
+
     NOTE: very similar to above one. CBVs may be able to fix it?
 
     :param request: standard request object.
     :return: standard HttpResponse object.
     """
 
-    user = request.user
-    fridge = Fridge.objects.get_or_create(user=user)[0]
+    fridge = request.fridge
     fridge_ingredients = fridge.ingredients.all()
     ingredient_names = [ingredient.name for ingredient in fridge_ingredients]
-    recipes = recipes_containing(ingredient_names, fridge=fridge)
+
+    missing = _missing_allowed(request)
+    stock = fridge.stock() if request.GET.get('quantities') else None
+    recipes = ranked_recipes(ingredient_names, missing=missing, fridge=fridge, stock=stock)
 
     content = {
         'ingredients': ingredient_names,
-        'recipes': recipes,
+        'recipes': _paginate(request, recipes),
+        'missing': missing,
+        'page_query': _page_query(missing, stock),
     }
 
     return render(request, 'fridge/fridge_recipes.html', content)
+
+
+@never_cache
+def recipe_ids(request):
+    """
+    Tells which recipes are in the fridge of the current user, so that
+    pages served from the anonymous page cache (or by any other client) can
+    be personalised without rendering them again.
+
+    :param request: standard request object.
+    :return: JSON object that tells whether the user is logged in
+             ('authenticated') and holds a sorted list of recipe ids
+             ('recipes'); the list is empty for anonymous users.
+    """
+
+    return JsonResponse({
+        'authenticated': bool(request.user.is_authenticated),
+        'recipes': sorted(fridge_recipe_ids(request)),
+    })
+
+
+def _missing_allowed(request):
+    """ Extracts the number of ingredients a recipe may lack from GET. """
+
+    try:
+        return max(int(request.GET.get('missing', 0)), 0)
+    except ValueError:
+        return 0
+
+
+def _page_query(missing, stock):
+    """ Parameters that pagination links have to preserve. """
+
+    query = f'&missing={missing}' if missing else ''
+    if stock is not None:
+        query += '&quantities=1'
+    return query
+
+
+def _paginate(request, recipes):
+    """ Returns a requested page of recipes. Same logic as in recipes view. """
+
+    paginator = Paginator(recipes, RECIPES_PER_PAGE)
+    page = request.GET.get('page')
+
+    try:
+        recipe_list = paginator.page(page)
+    except PageNotAnInteger:
+        recipe_list = paginator.page(1)
+    except EmptyPage:
+        recipe_list = paginator.page(paginator.num_pages)
+
+    return recipe_list
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 10:31
+from __future__ import unicode_literals
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0004_auto_20170523_1852'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='density',
+            field=models.FloatField(blank=True, help_text='Grams per millilitre.', null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='unit_weight',
+            field=models.FloatField(blank=True, help_text='Grams per unit (e.g., one lemon).', null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from string import capwords
 
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.urls import reverse
-from django.utils.text import slugify
+
+from utilities.slugs import save_with_unique_slug
 
 
 class Ingredient(models.Model):
@@ -43,7 +45,12 @@ class Ingredient(models.Model):
     type = models.CharField(max_length=250, blank=True, null=False,
                             default='Unspecified', choices=INGREDIENTS)
     description = models.TextField(blank=True, null=True)
-    slug = models.SlugField()
+    slug = models.SlugField(unique=True)
+    # Optional data that allows to convert between mass, volume and count.
+    density = models.FloatField(blank=True, null=True, validators=[MinValueValidator(0)],
+                                help_text='Grams per millilitre.')
+    unit_weight = models.FloatField(blank=True, null=True, validators=[MinValueValidator(0)],
+                                    help_text='Grams per unit (e.g., one lemon).')
 
     def save(self, *args, **kwargs):
         """
@@ -54,13 +61,9 @@ class Ingredient(models.Model):
         """
 
         if not self.id:
-            slug = slugify(self.name)
-            i = 2
-            while Ingredient.objects.filter(slug=slug):
-                slug = '{slug}-{i}'
-                i += 1
-            self.slug = slug
+            name = self.name
             self.name = capwords(self.name)
+            return save_with_unique_slug(self, name, lambda: super(Ingredient, self).save(*args, **kwargs))
         return super(Ingredient, self).save(*args, **kwargs)
 
     def get_absolute_url(self):
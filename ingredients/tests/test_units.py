@@ -0,0 +1,89 @@
+import numpy as np
+from django.test import TestCase
+
+from ingredients.models import Ingredient
+from ingredients.units import (
+    MASS, VOLUME, COUNT, ConversionError, DimensionCodes, to_base, convert,
+    sufficient,
+)
+
+
+class ToBaseTests(TestCase):
+    def test_mass(self):
+        self.assertEqual(to_base(2, 'kg'), (MASS, 2000))
+
+    def test_volume(self):
+        self.assertEqual(to_base(2, 'tbsp'), (VOLUME, 30))
+
+    def test_count(self):
+        self.assertEqual(to_base(3, 'unit'), (COUNT, 3))
+
+    def test_unknown_unit_is_a_dimension_of_its_own(self):
+        self.assertEqual(to_base(1, 'can'), ('can', 1))
+
+
+class ConvertTests(TestCase):
+    def setUp(self):
+        self.lemon = Ingredient(name='Lemon', unit_weight=100)
+        self.oil = Ingredient(name='Olive Oil', density=0.9)
+
+    def test_same_dimension(self):
+        self.assertEqual(convert(500, 'g', 'kg'), 0.5)
+        self.assertEqual(convert(1, 'L', 'mL'), 1000)
+
+    def test_mass_to_count_with_unit_weight(self):
+        self.assertEqual(convert(500, 'g', 'unit', self.lemon), 5)
+
+    def test_volume_to_mass_with_density(self):
+        self.assertAlmostEqual(convert(100, 'mL', 'g', self.oil), 90)
+
+    def test_mass_to_count_without_unit_weight(self):
+        with self.assertRaises(ConversionError):
+            convert(500, 'g', 'unit', self.oil)
+
+    def test_unknown_units_do_not_convert(self):
+        with self.assertRaises(ConversionError):
+            convert(1, 'can', 'unit')
+
+
+class SufficientTests(TestCase):
+    def setUp(self):
+        self.codes = DimensionCodes()
+        self.mass = self.codes.code(MASS)
+        self.volume = self.codes.code(VOLUME)
+        self.count = self.codes.code(COUNT)
+
+    def check(self, available, available_dimensions, required, required_dimensions,
+              densities=None, unit_weights=None):
+        n = len(required)
+        nan = np.full(n, np.nan)
+        return sufficient(np.array(available, dtype=float),
+                          np.array(available_dimensions),
+                          np.array(required, dtype=float),
+                          np.array(required_dimensions),
+                          nan if densities is None else np.array(densities, dtype=float),
+                          nan if unit_weights is None else np.array(unit_weights, dtype=float))
+
+    def test_same_dimension(self):
+        enough = self.check([500, 100], [self.mass, self.mass],
+                            [400, 200], [self.mass, self.mass])
+
+        self.assertEqual(enough.tolist(), [True, False])
+
+    def test_across_dimensions(self):
+        # 2 lemons (100 g each) vs 150 g; 100 mL of oil (0.9 g/mL) vs 100 g.
+        enough = self.check([2, 100], [self.count, self.volume],
+                            [150, 100], [self.mass, self.mass],
+                            densities=[np.nan, 0.9], unit_weights=[100, np.nan])
+
+        self.assertEqual(enough.tolist(), [True, False])
+
+    def test_unknown_conversion_is_not_enough(self):
+        enough = self.check([2], [self.count], [1], [self.mass])
+
+        self.assertEqual(enough.tolist(), [False])
+
+    def test_missing_ingredient_is_not_enough(self):
+        enough = self.check([0], [DimensionCodes.UNKNOWN], [1], [self.mass])
+
+        self.assertEqual(enough.tolist(), [False])
@@ -0,0 +1,163 @@
+"""
+Conversion between units of measurement.
+
+Every known unit belongs to one of the base dimensions (mass, volume, count)
+and has a factor that converts it to the base unit of that dimension:
+grams, millilitres and pieces respectively. Units that are not known (e.g.,
+can, stalk) form a dimension of their own, i.e., they can only be compared
+with themselves.
+
+Converting between dimensions requires per-ingredient data: density (grams
+per millilitre) for mass <-> volume and unit weight (grams per piece) for
+mass <-> count. Both are optional; without them such conversions fail.
+
+Abbreviations match those in utilities/data/units.txt.
+"""
+
+import numpy as np
+
+MASS = 'mass'
+VOLUME = 'volume'
+COUNT = 'count'
+
+# abbreviation: (dimension, factor to base unit)
+CONVERSIONS = {
+    'g': (MASS, 1.0),
+    'kg': (MASS, 1000.0),
+    'mL': (VOLUME, 1.0),
+    'L': (VOLUME, 1000.0),
+    'tsp': (VOLUME, 5.0),
+    'tbsp': (VOLUME, 15.0),
+    'cup': (VOLUME, 250.0),
+    'unit': (COUNT, 1.0),
+}
+
+# Quantities are floats; a tiny shortage is treated as a rounding error.
+TOLERANCE = 1e-6
+
+
+class ConversionError(ValueError):
+    """ Raised when quantity cannot be expressed in a requested unit. """
+
+
+def to_base(quantity, abbrev):
+    """
+    Expresses a quantity in the base unit of its dimension.
+
+    :param quantity: a number.
+    :param abbrev: abbreviation of the unit quantity is measured in.
+    :return: a tuple (dimension, quantity in base units).
+    """
+
+    dimension, factor = CONVERSIONS.get(abbrev, (abbrev, 1.0))
+    return dimension, quantity * factor
+
+
+def grams_per_base(dimension, density=None, unit_weight=None):
+    """
+    :return: how many grams one base unit of a dimension weighs, or None if
+             it is not known for the ingredient.
+    """
+
+    if dimension == MASS:
+        return 1.0
+    if dimension == VOLUME:
+        return density or None
+    if dimension == COUNT:
+        return unit_weight or None
+    return None
+
+
+def convert(quantity, from_abbrev, to_abbrev, ingredient=None):
+    """
+    Converts quantity from one unit to another.
+
+    :param quantity: a number to be converted.
+    :param from_abbrev: abbreviation of the unit quantity is measured in.
+    :param to_abbrev: abbreviation of the unit quantity should be expressed in.
+    :param ingredient: Ingredient instance, which is needed for conversions
+                       between dimensions.
+    :return: converted quantity.
+    :raises ConversionError: if the units cannot be converted.
+    """
+
+    from_dimension, base = to_base(quantity, from_abbrev)
+    to_dimension, factor = to_base(1.0, to_abbrev)
+
+    if from_dimension != to_dimension:
+        density = getattr(ingredient, 'density', None)
+        unit_weight = getattr(ingredient, 'unit_weight', None)
+        from_grams = grams_per_base(from_dimension, density, unit_weight)
+        to_grams = grams_per_base(to_dimension, density, unit_weight)
+        if not from_grams or not to_grams:
+            raise ConversionError(f'Cannot convert {from_abbrev} to {to_abbrev} '
+                                  f'of {ingredient or "an ingredient"}.')
+        base = base * from_grams / to_grams
+
+    return base / factor
+
+
+class DimensionCodes:
+    """
+    Assigns small integer codes to dimensions, so that they can be stored
+    in NumPy arrays. Base dimensions always have the same codes.
+    """
+
+    UNKNOWN = -1
+
+    def __init__(self):
+        self.codes = {MASS: 0, VOLUME: 1, COUNT: 2}
+
+    def code(self, dimension, add=True):
+        if dimension not in self.codes:
+            if not add:
+                return self.UNKNOWN
+            self.codes[dimension] = len(self.codes)
+        return self.codes[dimension]
+
+
+def gram_factors(dimensions, densities, unit_weights):
+    """
+    Vectorized grams_per_base().
+
+    :param dimensions: an array of dimension codes (see DimensionCodes).
+    :param densities: an array of densities (NaN if unknown).
+    :param unit_weights: an array of unit weights (NaN if unknown).
+    :return: an array of grams per base unit (NaN if not convertible).
+    """
+
+    factors = np.full(len(dimensions), np.nan)
+    factors[dimensions == 0] = 1.0
+    volume = dimensions == 1
+    factors[volume] = densities[volume]
+    count = dimensions == 2
+    factors[count] = unit_weights[count]
+    return factors
+
+
+def sufficient(available, available_dimensions, required, required_dimensions,
+               densities, unit_weights):
+    """
+    Vectorized check whether available quantities cover required ones.
+
+    All arrays are aligned: element i of each describes the same
+    (available, required) pair. Quantities are in base units.
+
+    :return: a boolean array; True where the available quantity is enough.
+    """
+
+    same = available_dimensions == required_dimensions
+    enough = np.zeros(len(required), dtype=bool)
+    enough[same] = available[same] >= required[same] * (1 - TOLERANCE)
+
+    other = ~same & (available_dimensions != DimensionCodes.UNKNOWN)
+    if other.any():
+        have = available[other] * gram_factors(
+            available_dimensions[other], densities[other], unit_weights[other])
+        need = required[other] * gram_factors(
+            required_dimensions[other], densities[other], unit_weights[other])
+        # Comparisons with NaN (unknown conversion) are False.
+        with np.errstate(invalid='ignore'):
+            enough[other] = have >= need * (1 - TOLERANCE)
+
+    return enough
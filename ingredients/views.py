@@ -14,7 +14,8 @@ def ingredient_detail(request, slug):
     """
 
     ingredient = get_object_or_404(Ingredient, slug=slug)
-    recipes = Recipe.objects.filter(ingredients__name__exact=ingredient.name)
+    recipes = (Recipe.objects.filter(ingredients__name__exact=ingredient.name)
+               .select_related('author'))
 
     content = {
         'ingredient': ingredient,
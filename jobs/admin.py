@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'created')
+    list_display_links = ('task',)
+    list_filter = ('status', 'task')
+    actions = ['retry']
+
+    def retry(self, request, queryset):
+        queryset.update(status=Job.QUEUED, run_at=timezone.now(), attempts=0, locked_at=None)
+    retry.short_description = 'Retry selected jobs'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,37 @@
+"""
+Runs queued jobs (see jobs/queue.py) until stopped with SIGINT or SIGTERM.
+Jobs that are running when the signal comes are finished first.
+"""
+
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.queue import Worker
+
+
+class Command(BaseCommand):
+    help = 'Runs queued jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2,
+                            help='Number of jobs that run at the same time.')
+        parser.add_argument('--poll', type=float, default=None,
+                            help='Seconds to wait when no job is due (JOBS_POLL_INTERVAL).')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit as soon as no job is due.')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1:
+            raise CommandError('--threads has to be positive.')
+
+        worker = Worker(threads=options['threads'], poll=options['poll'])
+        if not options['once']:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: worker.stop())
+            if options['verbosity']:
+                self.stdout.write(f"Running jobs in {options['threads']} threads.")
+
+        done = worker.run(once=options['once'])
+        if options['verbosity']:
+            self.stdout.write(f'Ran {done} jobs.')
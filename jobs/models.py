@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Model that represents a call of a task (see jobs/queue.py) that has to
+    be made outside of a request.
+
+    Note: jobs that succeed are deleted; failed ones are kept for inspection.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    )
+
+    task = models.CharField(max_length=200)
+    arguments = models.TextField(default='[[], {}]')  # JSON: [args, kwargs]
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        # Workers look for due jobs (see jobs.queue.claim)
+        indexes = [models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx')]
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
@@ -0,0 +1,302 @@
+"""
+Durable job queue in the database.
+
+Side effects that do not have to happen within a request (writing buffered
+counters, processing images and so on) are enqueued as jobs and run by
+workers (manage.py run_workers). The database is the broker: a job is a row
+that is committed (or rolled back) together with the rest of the request.
+
+    @task
+    def add_views(views):
+        ...
+
+    add_views.delay([[1, 3]])  # or enqueue(add_views, [[1, 3]])
+    schedule(60, add_views, [[1, 3]])  # not run within the next minute
+
+Arguments have to be JSON serializable; tasks get them back as JSON types
+(e.g., tuples become lists).
+
+Workers claim jobs with a conditional UPDATE, which works on SQLite and
+PostgreSQL alike: of several workers that pick the same job, only one
+changes its status. A job that raises is retried after an exponentially
+growing delay (JOBS_BACKOFF, doubled with every attempt, at most
+JOBS_BACKOFF_MAX) until it has been tried JOBS_MAX_ATTEMPTS times.
+
+While a job runs, its worker refreshes Job.locked_at every JOBS_HEARTBEAT
+seconds from a thread of its own. Jobs whose heartbeat stopped for
+JOBS_TIMEOUT, i.e. whose workers died, are queued again; long jobs that are
+still running are not.
+
+With JOBS_EAGER (e.g., while testing), tasks run as soon as they are
+enqueued, in the process that enqueues them.
+"""
+
+import json
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+from time import monotonic
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Number of due jobs a worker looks at when it claims one; others may be
+# claimed by other workers in the meantime.
+CLAIM_BATCH = 10
+
+# Seconds between looking for jobs of dead workers.
+REQUEUE_INTERVAL = 60
+
+_tasks = {}  # task name -> function
+
+
+def task(function):
+    """
+    Registers a function as a task. The function gets a delay(*args,
+    **kwargs) attribute, which enqueues it.
+    """
+
+    function.task_name = f'{function.__module__}.{function.__qualname__}'
+    function.delay = lambda *args, **kwargs: enqueue(function, *args, **kwargs)
+    _tasks[function.task_name] = function
+    return function
+
+
+def get_task(name):
+    """ :return: function of a task; its module is imported if needed. """
+
+    if name not in _tasks:
+        try:
+            import_module(name.rpartition('.')[0])
+        except ImportError:
+            pass
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f'Unknown task: {name}.') from None
+
+
+def enqueue(function, *args, **kwargs):
+    """
+    :param function: a task.
+    :return: the created Job, or None if the task ran eagerly.
+    """
+
+    return schedule(0, function, *args, **kwargs)
+
+
+def schedule(delay, function, *args, **kwargs):
+    """
+    Same as enqueue(), but the job is not due before delay seconds pass.
+    Eager tasks run right away nonetheless.
+
+    :param delay: number of seconds.
+    :param function: a task.
+    :return: the created Job, or None if the task ran eagerly.
+    """
+
+    if getattr(function, 'task_name', None) not in _tasks:
+        raise ValueError(f'{function!r} is not a task.')
+
+    arguments = json.dumps([args, kwargs])
+    if settings.JOBS_EAGER:
+        args, kwargs = json.loads(arguments)
+        function(*args, **kwargs)
+        return None
+
+    return Job.objects.create(task=function.task_name, arguments=arguments,
+                              max_attempts=settings.JOBS_MAX_ATTEMPTS,
+                              run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def backoff(attempts):
+    """ :return: seconds to wait before trying a job for attempts + 1 time. """
+
+    return min(settings.JOBS_BACKOFF * 2 ** (attempts - 1), settings.JOBS_BACKOFF_MAX)
+
+
+def claim():
+    """ :return: a due job, marked as running by this worker, or None. """
+
+    now = timezone.now()
+    due = (Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+           .order_by('run_at', 'id').values_list('id', flat=True)[:CLAIM_BATCH])
+    for job_id in due:
+        claimed = (Job.objects.filter(pk=job_id, status=Job.QUEUED)
+                   .update(status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1))
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def heartbeat(job_id):
+    """
+    Tells requeue_stale() that a job is still running.
+
+    :return: whether the job is still marked as running.
+    """
+
+    return bool(Job.objects.filter(pk=job_id, status=Job.RUNNING).update(locked_at=timezone.now()))
+
+
+class Heartbeat:
+    """
+    Context manager that calls heartbeat() for a job every JOBS_HEARTBEAT
+    seconds while the block runs. Beats come from a thread (and a database
+    connection) of their own, as the job itself runs in a transaction.
+
+    :param job: a claimed job.
+    """
+
+    def __init__(self, job):
+        self.job_id = job.pk
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._beat, name=f'job-heartbeat-{job.pk}',
+                                       daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def _beat(self):
+        try:
+            while not self.stopped.wait(settings.JOBS_HEARTBEAT):
+                try:
+                    heartbeat(self.job_id)
+                except DatabaseError:
+                    # E.g., SQLite is locked by the job; the next beat may do.
+                    logger.warning('Could not refresh job %d.', self.job_id, exc_info=True)
+        finally:
+            connection.close()
+
+
+def run(job):
+    """
+    Runs a claimed job within a transaction. A job that succeeds is deleted
+    in the same transaction, so that its effects are never committed without
+    the deletion (and repeated by requeue_stale()). One that fails is queued
+    again or, if it ran out of attempts, marked as failed. The job gets
+    heartbeats while it runs (see Heartbeat).
+
+    :return: True if the job succeeded.
+    """
+
+    try:
+        function = get_task(job.task)
+        args, kwargs = json.loads(job.arguments)
+        with Heartbeat(job), transaction.atomic():
+            function(*args, **kwargs)
+            Job.objects.filter(pk=job.pk).delete()
+    except Exception:
+        error = traceback.format_exc()
+        jobs = Job.objects.filter(pk=job.pk)
+        if job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            logger.warning('Job %d (%s) failed, retrying in %ds.', job.pk, job.task, delay)
+            jobs.update(status=Job.QUEUED, locked_at=None, last_error=error,
+                        run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            logger.error('Job %d (%s) failed %d times.', job.pk, job.task, job.attempts)
+            jobs.update(status=Job.FAILED, locked_at=None, last_error=error)
+        return False
+
+    return True
+
+
+def requeue_stale():
+    """
+    Queues again running jobs that got no heartbeat for JOBS_TIMEOUT, i.e.
+    whose workers died. Jobs that ran out of attempts fail instead.
+
+    :return: number of jobs that were queued again.
+    """
+
+    stale = Job.objects.filter(status=Job.RUNNING,
+                               locked_at__lt=timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, last_error='Worker did not finish the job.')
+    return stale.update(status=Job.QUEUED, locked_at=None)
+
+
+class Worker:
+    """
+    Runs jobs in a pool of threads.
+
+    :param threads: number of jobs that run at the same time.
+    :param poll: seconds to wait before looking again when no job is due.
+    """
+
+    def __init__(self, threads=1, poll=None):
+        self.threads = threads
+        self.poll = settings.JOBS_POLL_INTERVAL if poll is None else poll
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._requeued = None
+
+    def stop(self):
+        """ Lets running jobs finish, then makes run() return. """
+
+        self.stopped.set()
+
+    def _requeue(self):
+        with self._lock:
+            if self._requeued is not None and monotonic() - self._requeued < REQUEUE_INTERVAL:
+                return
+            self._requeued = monotonic()
+        requeued = requeue_stale()
+        if requeued:
+            logger.warning('Queued %d abandoned jobs again.', requeued)
+
+    def work(self, once=False):
+        """
+        Runs jobs until stopped.
+
+        :param once: return as soon as no job is due.
+        :return: number of jobs that were run.
+        """
+
+        done = 0
+        while not self.stopped.is_set():
+            job = claim()
+            if job is None:
+                if once:
+                    break
+                self._requeue()
+                self.stopped.wait(self.poll)
+                continue
+            run(job)
+            done += 1
+        return done
+
+    def _thread(self, once):
+        try:
+            return self.work(once)
+        finally:
+            connection.close()  # Every thread has a connection of its own.
+
+    def run(self, once=False):
+        """
+        :param once: return as soon as no job is due (e.g., from cron).
+        :return: number of jobs that were run.
+        """
+
+        self._requeue()
+        if self.threads == 1:
+            return self.work(once)
+
+        with ThreadPoolExecutor(self.threads, thread_name_prefix='job-worker') as pool:
+            futures = [pool.submit(self._thread, once) for _ in range(self.threads)]
+        return sum(future.result() for future in futures)
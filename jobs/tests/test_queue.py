@@ -0,0 +1,259 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import (
+    Worker, backoff, claim, enqueue, get_task, heartbeat, requeue_stale, run, schedule, task,
+)
+
+calls = []
+
+
+@task
+def record(value, extra=None):
+    calls.append((value, extra))
+
+
+@task
+def fail():
+    raise RuntimeError('Task failed.')
+
+
+@task
+def wait(seconds):
+    threading.Event().wait(seconds)
+
+
+@task
+def create_user(username):
+    User.objects.create(username=username)
+
+
+def plain():
+    pass
+
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3, JOBS_BACKOFF=10, JOBS_BACKOFF_MAX=30)
+class QueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+
+class EnqueueTests(QueueTestCase):
+    def test_job_created(self):
+        job = enqueue(record, 1, extra=(2, 3))
+
+        self.assertEqual(job.task, 'jobs.tests.test_queue.record')
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.max_attempts, 3)
+        self.assertEqual(calls, [])
+
+    def test_delay(self):
+        record.delay(1)
+
+        self.assertEqual(Job.objects.get().task, record.task_name)
+
+    def test_schedule(self):
+        job = schedule(60, record, 1)
+
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=59))
+        self.assertIsNone(claim())
+
+    def test_not_a_task(self):
+        with self.assertRaises(ValueError):
+            enqueue(plain)
+
+    def test_arguments_not_serializable(self):
+        with self.assertRaises(TypeError):
+            enqueue(record, object())
+
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        job = enqueue(record, 1, extra=(2, 3))
+
+        self.assertIsNone(job)
+        self.assertEqual(calls, [(1, [2, 3])])
+        self.assertFalse(Job.objects.exists())
+
+    def test_get_task(self):
+        self.assertIs(get_task('jobs.tests.test_queue.record'), record)
+        with self.assertRaises(LookupError):
+            get_task('jobs.tests.test_queue.missing')
+
+
+class ClaimTests(QueueTestCase):
+    def test_claim_marks_job_running(self):
+        enqueue(record, 1)
+
+        job = claim()
+
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.locked_at)
+        self.assertIsNone(claim())
+
+    def test_oldest_first(self):
+        later = enqueue(record, 1)
+        earlier = enqueue(record, 2)
+        Job.objects.filter(pk=earlier.pk).update(run_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(claim().pk, earlier.pk)
+        self.assertEqual(claim().pk, later.pk)
+
+    def test_future_jobs_not_claimed(self):
+        job = enqueue(record, 1)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now() + timedelta(minutes=1))
+
+        self.assertIsNone(claim())
+
+
+class RunTests(QueueTestCase):
+    def test_success_deletes_job(self):
+        enqueue(record, 1, extra='a')
+
+        self.assertTrue(run(claim()))
+
+        self.assertEqual(calls, [(1, 'a')])
+        self.assertFalse(Job.objects.exists())
+
+    def test_job_deleted_in_task_transaction(self):
+        enqueue(create_user, 'test')
+
+        # Effects of the task are not committed without the deletion.
+        with mock.patch.object(QuerySet, 'delete', side_effect=DatabaseError), \
+                self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(run(claim()))
+
+        self.assertFalse(User.objects.exists())
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    def test_failure_retried_with_backoff(self):
+        enqueue(fail)
+
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(run(claim()))
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('Task failed.', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertIsNone(claim())
+
+    def test_failed_after_max_attempts(self):
+        job = enqueue(fail)
+        with self.assertLogs('jobs.queue', 'WARNING') as logs:
+            for _ in range(3):
+                Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+                run(claim())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(logs.records[-1].levelname, 'ERROR')
+
+    def test_unknown_task_fails(self):
+        Job.objects.create(task='jobs.tests.test_queue.missing', max_attempts=1)
+
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run(claim())
+
+        self.assertIn('Unknown task', Job.objects.get(status=Job.FAILED).last_error)
+
+    def test_backoff(self):
+        self.assertEqual([backoff(n) for n in range(1, 5)], [10, 20, 30, 30])
+
+
+class RequeueTests(QueueTestCase):
+    def test_abandoned_jobs_queued_again(self):
+        job = enqueue(record, 1)
+        claim()
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(claim().pk, job.pk)
+
+    def test_running_jobs_left_alone(self):
+        enqueue(record, 1)
+        claim()
+
+        self.assertEqual(requeue_stale(), 0)
+
+    def test_jobs_with_heartbeat_left_alone(self):
+        job = enqueue(record, 1)
+        claim()
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertTrue(heartbeat(job.pk))
+        self.assertEqual(requeue_stale(), 0)
+
+    def test_heartbeat_of_finished_job(self):
+        self.assertFalse(heartbeat(enqueue(record, 1).pk))
+
+    @override_settings(JOBS_HEARTBEAT=0.01)
+    def test_long_jobs_get_heartbeats(self):
+        enqueue(wait, 0.2)
+
+        with mock.patch('jobs.queue.heartbeat') as beat:
+            run(claim())
+
+        self.assertGreater(beat.call_count, 1)
+
+    def test_short_jobs_get_no_heartbeat(self):
+        enqueue(record, 1)
+
+        with mock.patch('jobs.queue.heartbeat') as beat:
+            run(claim())
+
+        beat.assert_not_called()
+
+    def test_abandoned_jobs_out_of_attempts_fail(self):
+        job = enqueue(record, 1)
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING, attempts=3,
+                                             locked_at=timezone.now() - timedelta(hours=1))
+
+        requeue_stale()
+
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+
+class WorkerTests(QueueTestCase):
+    def test_runs_due_jobs(self):
+        for n in range(3):
+            enqueue(record, n)
+        enqueue(fail)
+
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            done = Worker().run(once=True)
+
+        self.assertEqual(done, 4)
+        self.assertEqual(sorted(calls), [(0, None), (1, None), (2, None)])
+        self.assertEqual(Job.objects.get().task, fail.task_name)
+
+    def test_stopped(self):
+        enqueue(record, 1)
+        worker = Worker()
+
+        worker.stop()
+
+        self.assertEqual(worker.run(), 0)
+        self.assertEqual(calls, [])
+
+    def test_command(self):
+        enqueue(record, 1)
+        out = StringIO()
+
+        call_command('run_workers', '--once', '--threads', '1', stdout=out)
+
+        self.assertEqual(calls, [(1, None)])
+        self.assertIn('Ran 1 jobs.', out.getvalue())
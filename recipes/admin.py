@@ -7,8 +7,12 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'description', 'steps_display', 'ingredient_list', 'cuisine',
                     'views', 'slug', 'image', 'date',)
     list_display_links = ('title',)
+    list_select_related = ('author',)
     prepopulated_fields = {"slug": ("title",)}
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('ingredients')
+
     def ingredient_list(self, obj):
         return ", ".join([ingredient.name for ingredient in obj.ingredients.all()])
 
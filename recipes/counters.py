@@ -0,0 +1,116 @@
+"""
+Write-behind counter of recipe views.
+
+Saving a recipe upon every page view means a full-row UPDATE per request
+and lost updates when two requests read the same value. Instead, views are
+buffered in memory of each worker and periodically written to the database
+as atomic increments: one UPDATE ... SET views = views + n per distinct n.
+
+When the flush interval elapses (or the buffer grows too large), the
+request that notices it hands the buffer over to a job (see jobs/queue.py):
+a single INSERT instead of the UPDATEs. The buffer is also written directly
+when a web worker exits (see cookme/wsgi.py).
+"""
+
+import logging
+from collections import Counter, defaultdict
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from jobs.queue import task
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def add_views(views):
+    """
+    Adds views to recipes. Recipes that got the same number of views are
+    updated with a single query.
+
+    :param views: [recipe id, number of views] pairs.
+    """
+
+    by_increment = defaultdict(list)
+    for recipe_id, n in views:
+        by_increment[n].append(recipe_id)
+
+    with transaction.atomic():
+        for n, recipe_ids in by_increment.items():
+            Recipe.objects.filter(pk__in=recipe_ids).update(views=F('views') + n)
+
+
+class ViewCounter:
+    """
+    :param interval: number of seconds between flushes.
+    :param threshold: number of buffered recipes that triggers a flush
+                      regardless of the interval.
+    """
+
+    def __init__(self, interval=10, threshold=1000):
+        self.interval = interval
+        self.threshold = threshold
+        self.buffer = Counter()
+        self.last_flush = monotonic()
+        self.lock = Lock()
+
+    def increment(self, recipe_id, n=1):
+        """ Registers n views of a recipe. Flushes the buffer if it is due. """
+
+        with self.lock:
+            self.buffer[recipe_id] += n
+            due = (len(self.buffer) >= self.threshold or
+                   monotonic() - self.last_flush >= self.interval)
+
+        if due:
+            self.flush(defer=True)
+
+    def pending(self, recipe_id):
+        """ :return: number of views of a recipe not yet in the database. """
+
+        return self.buffer.get(recipe_id, 0)
+
+    def count(self, recipe):
+        """ :return: approximate live number of views of a recipe. """
+
+        return recipe.views + self.pending(recipe.pk)
+
+    def flush(self, defer=False):
+        """
+        Writes buffered views to the database.
+
+        If the database is not available, views are put back into the buffer,
+        so that they are written next time.
+
+        :param defer: enqueue a job that writes views instead.
+        """
+
+        with self.lock:
+            buffered, self.buffer = self.buffer, Counter()
+            self.last_flush = monotonic()
+
+        if not buffered:
+            return
+
+        try:
+            (add_views.delay if defer else add_views)(list(buffered.items()))
+        except DatabaseError:
+            logger.exception('Could not flush %d recipe views.', sum(buffered.values()))
+            with self.lock:
+                self.buffer.update(buffered)
+
+    def clear(self):
+        """ Drops buffered views without writing them. """
+
+        with self.lock:
+            self.buffer.clear()
+            self.last_flush = monotonic()
+
+
+view_counter = ViewCounter(interval=getattr(settings, 'VIEW_COUNTER_INTERVAL', 10),
+                           threshold=getattr(settings, 'VIEW_COUNTER_THRESHOLD', 1000))
@@ -1,7 +1,6 @@
 from string import capwords
 
-from django.conf import settings
-from django.core.files.images import get_image_dimensions
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import (
     TextInput,
     NumberInput,
@@ -13,11 +12,10 @@ from django.forms import (
     ValidationError,
     CharField
 )
-from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
 
 from ingredients.models import Ingredient, Unit
-from .models import DEFAULT_IMAGE_LOCATION
+from utilities.images import is_too_large
 from .models import RecipeIngredient, Recipe
 
 
@@ -27,27 +25,11 @@ class AddRecipeForm(ModelForm):
 
     Note: If user wants to add an exiting recipe to a fridge, he/she has to
     navigate to that recipe and click an appropriate button.
-    """
-
-    def __init__(self, *args, **kwargs):
-        super(AddRecipeForm, self).__init__(*args, **kwargs)
-        self.fields['image'].widget.attrs.update({
-            'data-width': settings.MAX_WIDTH,
-            'data-height': settings.MAX_HEIGHT
-        })
-
-    # Validates that image is of appropriate dimensions
-    def clean_image(self):
-        image = self.cleaned_data.get('image')
 
-        if image and image != DEFAULT_IMAGE_LOCATION:
-            width, height = get_image_dimensions(image)
-            if width > settings.MAX_WIDTH or height > settings.MAX_HEIGHT:
-                error = f"Uploaded image is too big. <br/>Allowed dimensions: " \
-                        f"{settings.MAX_WIDTH} x {settings.MAX_HEIGHT}.<br/>" \
-                        f"Uploaded image: {width} x {height}"
-                raise ValidationError(mark_safe(error))
-            return image
+    Also note that large images are accepted: the model scales down the
+    ones larger than MAX_WIDTH x MAX_HEIGHT (see utilities/images.py). Only
+    images that would take more than IMAGE_MAX_PIXELS to decode are not.
+    """
 
     class Meta:
         model = Recipe
@@ -77,6 +59,12 @@ class AddRecipeForm(ModelForm):
             'steps': '',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile) and is_too_large(image):
+            raise ValidationError(_('The image is too large. Please upload a smaller one.'))
+        return image
+
 
 class RecipeIngredientForm(ModelForm):
     """
@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count
+from django.utils.text import slugify
+
+# Room left for a suffix, so that a slug with it still fits into the field.
+SUFFIX_LENGTH = 7
+
+
+def deduplicate(apps, schema_editor):
+    """
+    Gives a new slug to every recipe whose slug is used by a recipe
+    that was created earlier, so that the slug column can be made unique.
+
+    Note: a copy of utilities.slugs.deduplicate_slugs() as it was when the
+    migration was written; the migration must not change along with it.
+    """
+
+    model = apps.get_model('recipes', 'Recipe')
+    manager = model._default_manager
+    max_length = model._meta.get_field('slug').max_length
+    taken = set(manager.values_list('slug', flat=True))
+    duplicates = (manager.values('slug').annotate(n=Count('pk')).filter(n__gt=1)
+                  .values_list('slug', flat=True))
+    for slug in list(duplicates):
+        base = slugify(slug)[:max_length - SUFFIX_LENGTH].strip('-') or model._meta.model_name
+        suffix = 2
+        for pk in manager.filter(slug=slug).order_by('pk').values_list('pk', flat=True)[1:]:
+            while f'{base}-{suffix}' in taken:
+                suffix += 1
+            taken.add(f'{base}-{suffix}')
+            manager.filter(pk=pk).update(slug=f'{base}-{suffix}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_auto_20261017_1047'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate, migrations.RunPython.noop),
+    ]
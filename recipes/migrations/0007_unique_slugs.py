@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_deduplicate_slugs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+    ]
@@ -6,9 +6,10 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.urls import reverse
 from django.utils import timezone
-from django.utils.text import slugify
 
 from ingredients.models import Ingredient, Unit
+from utilities.images import CARD_SIZE, is_heavy, process_upload
+from utilities.slugs import save_with_unique_slug
 
 
 DEFAULT_IMAGE_LOCATION = 'recipes/no-image.jpg'
@@ -53,8 +54,19 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField(Ingredient, through='RecipeIngredient')
     date = models.DateTimeField(editable=False)
     views = models.PositiveIntegerField(default=0)
-    slug = models.SlugField()
+    slug = models.SlugField(unique=True)
     image = models.ImageField(upload_to='recipes/', blank=True, default=DEFAULT_IMAGE_LOCATION)
+    # Smaller copies of an uploaded image (see utilities/images.py)
+    image_card = models.ImageField(upload_to='recipes/card/', blank=True, editable=False)
+    image_detail = models.ImageField(upload_to='recipes/detail/', blank=True, editable=False)
+    # Of the detail variant; lets pages reserve room for images.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)  # data URI
+
+    class Meta:
+        # Keyset pagination of the recipe list (see recipes.views.recipes)
+        indexes = [models.Index(fields=['date', 'id'], name='recipe_date_id_idx')]
 
     def save(self, *args, **kwargs):
         """
@@ -63,8 +75,22 @@ class Recipe(models.Model):
         Unique (user-friendly, hence 2) slug is assigned upon creation.
 
         Steps/description is populated if no values are provided.
+
+        New images are scaled down (if needed) and get card and detail
+        variants, dimensions and a placeholder. Images too large to process
+        right away are left to a job; until it is done, the original is shown.
         """
 
+        upload = self.image if self.image and not self.image._committed else None
+        deferred = upload is not None and is_heavy(upload)
+        if deferred:
+            self.image_card = self.image_detail = self.image_placeholder = ''
+            self.image_width = self.image_height = None
+        elif upload is not None:
+            self.image, fields = process_upload(upload)
+            for field, value in fields.items():
+                setattr(self, field, value)
+
         if not self.id:
             self.date = timezone.now()
 
@@ -76,15 +102,35 @@ class Recipe(models.Model):
             if not self.description:
                 self.description = 'No description provided.'
 
-            i = 2  # user-friendly; if we find something, there are 2 instances
-            slug = slugify(self.title)
-            while Recipe.objects.filter(slug=slug):
-                slug = f'{slug}-{i}'
-                i += 1
-            self.slug = slug
+            title = self.title
             self.title = capwords(self.title)
+            save_with_unique_slug(self, title, lambda: super(Recipe, self).save(*args, **kwargs))
+        else:
+            super(Recipe, self).save(*args, **kwargs)
+
+        if deferred:
+            from .tasks import process_image  # Tasks need the models.
+            process_image.delay(self.pk, self.image.name)
+
+    @property
+    def card_image(self):
+        """ :return: the card variant of the image, or the image itself. """
+
+        return self.image_card or self.image
+
+    @property
+    def detail_image(self):
+        """ :return: the detail variant of the image, or the image itself. """
+
+        return self.image_detail or self.image
+
+    @property
+    def card_width(self):
+        return CARD_SIZE[0] if self.image_card else None
 
-        return super(Recipe, self).save(*args, **kwargs)
+    @property
+    def card_height(self):
+        return CARD_SIZE[1] if self.image_card else None
 
     def step_list(self):
         return re.split(r'[\n\r]+', self.steps)
@@ -0,0 +1,65 @@
+"""
+Background jobs of recipes (see jobs/queue.py).
+"""
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from jobs.queue import schedule, task
+from utilities.images import process_upload
+from .models import Recipe
+
+
+def _pages_expire():
+    """
+    :return: seconds after which no cached copy of a page (ours, or one kept
+             by a browser or proxy) can refer to a file anymore.
+    """
+
+    return (settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_MAX_AGE
+            + settings.SHARED_TOKEN_TTL)
+
+
+@task
+def process_image(recipe_id, name):
+    """
+    Scales down an image that was too large to process within the request
+    and makes its variants. The original is deleted once cached pages that
+    show it have expired.
+
+    :param recipe_id: id of the recipe the image belongs to.
+    :param name: name of the image in the storage; if the recipe has another
+                 image by now, there is nothing to do.
+    """
+
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or recipe.image.name != name:
+        return
+
+    recipe.image.open('rb')
+    try:
+        image, fields = process_upload(recipe.image)
+    finally:
+        recipe.image.close()
+
+    replaced = image is not recipe.image
+    if replaced:
+        recipe.image.save(image.name, image, save=False)
+    for field, value in fields.items():
+        setattr(recipe, field, value)
+    # Saved rather than updated, so that signals purge cached pages in every
+    # process (see utilities/page_cache.py).
+    recipe.save(update_fields=list(fields) + (['image'] if replaced else []))
+
+    if replaced:
+        # Browsers and proxies may still show pages that refer to the
+        # original, and so may our cache, if a page was cached from the old
+        # state right before the purge. The job commits along with the save.
+        schedule(_pages_expire(), delete_file, name)
+
+
+@task
+def delete_file(name):
+    """ :param name: name of a file in the default storage. """
+
+    default_storage.delete(name)
@@ -0,0 +1,140 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from jobs.models import Job
+from jobs.queue import Worker
+from recipes.counters import ViewCounter, view_counter
+from recipes.models import Recipe
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='test')
+        self.r1 = Recipe.objects.create(author=user, title='test1')
+        self.r2 = Recipe.objects.create(author=user, title='test2')
+        self.counter = ViewCounter(interval=3600, threshold=100)
+
+    def test_increment_is_buffered(self):
+        self.counter.increment(self.r1.pk)
+
+        self.r1.refresh_from_db()
+        self.assertEqual(self.r1.views, 0)
+        self.assertEqual(self.counter.pending(self.r1.pk), 1)
+
+    def test_live_count_includes_buffered_views(self):
+        self.counter.increment(self.r1.pk)
+        self.counter.increment(self.r1.pk)
+
+        self.assertEqual(self.counter.count(self.r1), 2)
+
+    def test_flush_writes_views(self):
+        self.counter.increment(self.r1.pk)
+        self.counter.increment(self.r1.pk)
+        self.counter.increment(self.r2.pk)
+
+        self.counter.flush()
+        self.r1.refresh_from_db()
+        self.r2.refresh_from_db()
+
+        self.assertEqual(self.r1.views, 2)
+        self.assertEqual(self.r2.views, 1)
+        self.assertEqual(self.counter.pending(self.r1.pk), 0)
+
+    def test_flush_adds_to_existing_views(self):
+        Recipe.objects.filter(pk=self.r1.pk).update(views=10)
+        self.counter.increment(self.r1.pk, n=5)
+
+        self.counter.flush()
+        self.r1.refresh_from_db()
+
+        self.assertEqual(self.r1.views, 15)
+
+    def test_one_query_per_distinct_increment(self):
+        self.counter.increment(self.r1.pk)
+        self.counter.increment(self.r2.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.counter.flush()
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+
+        self.assertEqual(len(updates), 1)
+
+    def test_flush_when_interval_elapsed(self):
+        counter = ViewCounter(interval=0)
+
+        counter.increment(self.r1.pk)
+        self.r1.refresh_from_db()
+
+        self.assertEqual(self.r1.views, 1)
+
+    def test_flush_when_threshold_reached(self):
+        counter = ViewCounter(interval=3600, threshold=2)
+
+        counter.increment(self.r1.pk)
+        counter.increment(self.r2.pk)
+        self.r1.refresh_from_db()
+
+        self.assertEqual(self.r1.views, 1)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_due_flush_enqueues_views(self):
+        counter = ViewCounter(interval=3600, threshold=2)
+
+        counter.increment(self.r1.pk)
+        counter.increment(self.r2.pk)
+        counter.increment(self.r2.pk)
+        self.r2.refresh_from_db()
+
+        self.assertEqual(self.r2.views, 0)
+        self.assertEqual(Job.objects.count(), 1)
+
+        Worker().run(once=True)
+        self.r2.refresh_from_db()
+
+        self.assertEqual(self.r2.views, 1)
+        self.assertEqual(counter.pending(self.r2.pk), 1)
+
+    def test_views_kept_when_database_fails(self):
+        self.counter.increment(self.r1.pk)
+
+        with mock.patch('recipes.counters.Recipe.objects.filter', side_effect=DatabaseError):
+            self.counter.flush()
+
+        self.assertEqual(self.counter.pending(self.r1.pk), 1)
+
+    def test_clear_drops_buffered_views(self):
+        self.counter.increment(self.r1.pk)
+
+        self.counter.clear()
+        self.counter.flush()
+        self.r1.refresh_from_db()
+
+        self.assertEqual(self.r1.views, 0)
+
+
+class RecipeDetailViewCountTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='test')
+        self.r = Recipe.objects.create(author=user, title='test')
+        self.url = reverse('recipes:recipe_detail', kwargs={'slug': self.r.slug})
+        view_counter.clear()
+
+    def tearDown(self):
+        view_counter.clear()
+
+    def test_view_does_not_save_recipe(self):
+        with mock.patch.object(Recipe, 'save') as save:
+            self.client.get(self.url)
+
+        self.assertFalse(save.called)
+
+    def test_view_shows_live_count(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['views'], 2)
@@ -1,9 +1,11 @@
+from io import BytesIO
 from string import capwords
 
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.forms import formset_factory
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from PIL import Image
 
 from ingredients.models import Ingredient, Unit
 from recipes.forms import (
@@ -66,6 +68,36 @@ class AddRecipeFormTests(TestCase):
 
             self.assertTrue(form.is_valid())
 
+    def test_oversized_image_allowed(self):
+        buffer = BytesIO()
+        Image.new('RGB', (4000, 3000)).save(buffer, 'JPEG')
+        image_data = {'image': SimpleUploadedFile('big.jpg', buffer.getvalue())}
+
+        form = AddRecipeForm(data=self.data, files=image_data)
+
+        self.assertTrue(form.is_valid())
+
+    @override_settings(IMAGE_MAX_PIXELS=1000000)
+    def test_huge_image_rejected(self):
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 1500)).save(buffer, 'PNG')
+        image_data = {'image': SimpleUploadedFile('huge.png', buffer.getvalue())}
+
+        form = AddRecipeForm(data=self.data, files=image_data)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    @override_settings(IMAGE_MAX_PIXELS=1000000)
+    def test_huge_jpeg_allowed_if_draft_fits(self):
+        buffer = BytesIO()
+        Image.new('RGB', (4000, 3000)).save(buffer, 'JPEG')
+        image_data = {'image': SimpleUploadedFile('big.jpg', buffer.getvalue())}
+
+        form = AddRecipeForm(data=self.data, files=image_data)
+
+        self.assertTrue(form.is_valid())
+
 
 class RecipeIngredientFormSetTests(TestCase):
     def setUp(self):
@@ -1,12 +1,22 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
 from string import capwords
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.utils.text import slugify
 
 from ingredients.models import Ingredient, Unit
+from jobs.models import Job
+from jobs.queue import Worker
+from PIL import Image
 from recipes.models import Recipe, Rating, RecipeIngredient, user_directory_path
+from recipes.models import DEFAULT_IMAGE_LOCATION
 
 
 class RecipeTestCase(TestCase):
@@ -74,6 +84,120 @@ class RecipeTestCase(TestCase):
         self.assertNotEquals(self.a.slug, self.r.slug)
 
 
+class RecipeImageVariantsTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media,
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+        self.settings.enable()
+        self.user = User.objects.create(username='test')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media)
+
+    def upload(self, size=(1600, 1000)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        return SimpleUploadedFile('soup.png', buffer.getvalue(), content_type='image/png')
+
+    def test_variants_made_on_upload(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload())
+        recipe.refresh_from_db()
+
+        with Image.open(recipe.image_card) as card:
+            self.assertEqual(card.size, (400, 300))
+        with Image.open(recipe.image_detail) as detail:
+            self.assertEqual(detail.size, (800, 500))
+        self.assertTrue(recipe.image_card.name.startswith('recipes/card/soup-card.'))
+        self.assertEqual((recipe.image_width, recipe.image_height), (800, 500))
+        self.assertTrue(recipe.image_placeholder.startswith('data:image/'))
+        self.assertEqual((recipe.card_width, recipe.card_height), (400, 300))
+        self.assertEqual(recipe.card_image, recipe.image_card)
+        self.assertEqual(recipe.detail_image, recipe.image_detail)
+
+    def test_oversized_upload_scaled_down(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload())
+
+        with Image.open(recipe.image) as image:
+            self.assertEqual(image.size, (800, 500))
+
+    def test_small_upload_kept(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload((400, 300)))
+
+        with Image.open(recipe.image) as image:
+            self.assertEqual(image.size, (400, 300))
+
+    @override_settings(IMAGE_INLINE_PIXELS=1000000, JOBS_EAGER=False)
+    def test_heavy_upload_deferred(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload())
+
+        self.assertFalse(recipe.image_card)
+        self.assertIsNone(recipe.image_width)
+        self.assertEqual(Job.objects.get().task, 'recipes.tasks.process_image')
+        with Image.open(recipe.image) as image:
+            self.assertEqual(image.size, (1600, 1000))
+
+        Worker().run(once=True)
+        recipe.refresh_from_db()
+
+        with Image.open(recipe.image) as image:
+            self.assertEqual(image.size, (800, 500))
+        with Image.open(recipe.image_card) as card:
+            self.assertEqual(card.size, (400, 300))
+        self.assertEqual((recipe.image_width, recipe.image_height), (800, 500))
+
+    @override_settings(IMAGE_INLINE_PIXELS=1000000, JOBS_EAGER=False,
+                       PAGE_CACHE_TIMEOUT=600, PAGE_CACHE_MAX_AGE=60)
+    def test_original_deleted_once_cached_pages_expire(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload())
+        original = recipe.image.name
+        Worker().run(once=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'recipes.tasks.delete_file')
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=650))
+        self.assertTrue(default_storage.exists(original))
+
+        Job.objects.update(run_at=timezone.now())
+        Worker().run(once=True)
+
+        self.assertFalse(default_storage.exists(original))
+
+    @override_settings(IMAGE_INLINE_PIXELS=1000000, JOBS_EAGER=False)
+    def test_deferred_job_skips_replaced_image(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload())
+        recipe.image = self.upload((400, 300))
+        recipe.save()
+        card = recipe.image_card.name
+
+        Worker().run(once=True)
+        recipe.refresh_from_db()
+
+        self.assertEqual(recipe.image_card.name, card)
+        with Image.open(recipe.image) as image:
+            self.assertEqual(image.size, (400, 300))
+
+    def test_no_upload(self):
+        recipe = Recipe.objects.create(author=self.user, title='test')
+
+        self.assertFalse(recipe.image_card)
+        self.assertEqual(recipe.card_image.name, DEFAULT_IMAGE_LOCATION)
+        self.assertEqual(recipe.detail_image.name, DEFAULT_IMAGE_LOCATION)
+
+    def test_variants_replaced_with_image(self):
+        recipe = Recipe.objects.create(author=self.user, title='test', image=self.upload())
+        first = recipe.image_card.name
+
+        recipe.image = self.upload((300, 600))
+        recipe.save()
+
+        self.assertNotEqual(recipe.image_card.name, first)
+        with Image.open(recipe.image_detail) as detail:
+            self.assertEqual(detail.size, (300, 600))
+
+
 class RatingTestCase(TestCase):
     def setUp(self):
         self.user = User.objects.create(username='test')
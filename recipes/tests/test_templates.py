@@ -3,6 +3,7 @@ from django.core.urlresolvers import reverse
 from django.test import TestCase, Client
 
 from ingredients.models import Ingredient, Unit
+from recipes.counters import view_counter
 from recipes.models import Recipe, RecipeIngredient
 
 
@@ -55,6 +56,18 @@ class RecipeTemplateTests(TestCase):
 
         self.assertNotContains(response, expected_html, html=True)
 
+    def test_card_images_sized_and_lazy(self):
+        Recipe.objects.filter(pk=self.r1.pk).update(
+            image_card='recipes/card/a-card.webp', image_placeholder='data:image/webp;base64,AAAA')
+
+        response = self.client.get(self.url)
+
+        self.assertContains(response, 'a-card.webp" alt="Test1" loading="lazy" decoding="async" '
+                                      'width="400" height="300" '
+                                      'style="background: url(data:image/webp;base64,AAAA)')
+        # No variant, hence no dimensions either.
+        self.assertContains(response, 'alt="Test2" loading="lazy" decoding="async"/>')
+
 
 class RecipeDetailTemplateTests(TestCase):
     def setUp(self):
@@ -72,12 +85,24 @@ class RecipeDetailTemplateTests(TestCase):
                                         quantity=0.5)
         self.url = reverse('recipes:recipe_detail', kwargs={'slug': self.r1.slug})
 
+    def tearDown(self):
+        view_counter.clear()
+
     def test_correct_template_used(self):
         response = self.client.get(self.url)
 
         self.assertEquals(response.status_code, 200)
         self.assertTemplateUsed(response, 'recipes/recipe_detail.html')
 
+    def test_image_sized(self):
+        Recipe.objects.filter(pk=self.r1.pk).update(
+            image_detail='recipes/detail/a-detail.webp', image_width=800, image_height=500)
+
+        response = self.client.get(self.url)
+
+        self.assertContains(response, 'a-detail.webp" alt="Test1" class="large-recipe-pic" '
+                                      'width="800" height="500"/>')
+
     def test_recipe_detail_ingredients_are_shown(self):
         response = self.client.get(self.url)
 
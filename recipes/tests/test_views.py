@@ -5,8 +5,10 @@ from django.test import TestCase
 from django.test.client import Client
 
 from fridge.models import Fridge
+from recipes.counters import view_counter
 from recipes.models import *
-from recipes.views import recipes, recipe_detail, add_to_fridge
+from recipes.views import recipes, recipe_detail, add_to_fridge, RECIPES_PER_PAGE
+from utilities.pagination import AFTER, encode_cursor
 
 
 class URLTests(TestCase):
@@ -39,6 +41,31 @@ class RecipeViewTests(TestCase):
 
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
+    def test_recipes_paginated_by_cursor(self):
+        user = User.objects.create(username='test')
+        for i in range(RECIPES_PER_PAGE + 1):
+            Recipe.objects.create(author=user, title=f'test{i}')
+
+        first = self.client.get(self.url).context['recipes']
+        second = self.client.get(self.url, {'cursor': first.next_cursor}).context['recipes']
+
+        self.assertEqual(len(first), RECIPES_PER_PAGE)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(second.has_next())
+
+    def test_tampered_cursor_leads_to_first_page(self):
+        cursor = encode_cursor(AFTER, ['2017-01-01T00:00:00', 'abc'])
+
+        response = self.client.get(self.url, {'cursor': cursor})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.context['recipes'].has_previous())
+
+    def test_numbered_pages_still_served(self):
+        response = self.client.get(self.url, {'page': 1})
+
+        self.assertEqual(response.context['recipes'].number, 1)
+
 
 class RecipeDetailTests(TestCase):
     def setUp(self):
@@ -46,6 +73,9 @@ class RecipeDetailTests(TestCase):
         self.r = Recipe.objects.create(author=self.user, title='test', description='')
         self.url = reverse('recipes:recipe_detail', kwargs={'slug': self.r.slug})
 
+    def tearDown(self):
+        view_counter.clear()
+
     def test_recipe_detail_view_accessible_to_all(self):
         response = self.client.get(self.url)
 
@@ -78,7 +108,7 @@ class AddRecipeToFridgeTests(TestCase):
         self.user = User.objects.create_user(username='test', password='test')
         self.client = Client()
         self.client.login(username='test', password='test')
-        self.fridge = Fridge.objects.create(user=self.user)
+        self.fridge = Fridge.objects.get(user=self.user)
         self.recipe = Recipe.objects.create(author=tmp, title='test', description='')
         self.url = reverse('recipes:add_to_fridge', kwargs={'pk': self.recipe.pk})
 
@@ -122,7 +152,7 @@ class AddRecipeToFridgeTests(TestCase):
 
     def test_diff_user_does_not_add_recipe_to_other_fridge(self):
         user = User.objects.create_user(username='test2', password='test2')
-        fridge = Fridge.objects.create(user=user)
+        fridge = Fridge.objects.get(user=user)
         client = Client()
         client.login(username='test2', password='test2')
 
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.urlresolvers import reverse
 from django.shortcuts import render, get_object_or_404, HttpResponseRedirect
 
-from fridge.models import Fridge
+from fridge.context_processors import fridge_recipe_ids
+from utilities.pagination import keyset_page
+from .counters import view_counter
 from .models import Recipe, RecipeIngredient
 
 RECIPES_PER_PAGE = 12
@@ -13,32 +16,35 @@ def recipes(request):
     """
     Shows the list of recipes.
 
+    Recipes are paginated by (date, id) keyset: every page costs the same,
+    no matter how deep it is. Numbered pages (?page=N) are still served for
+    old links, but are not linked to anymore.
+
     :param request: standard request object.
     :return: standard HttpResponse object.
     """
 
-    all_recipes = Recipe.objects.all().order_by('date')
-    paginator = Paginator(all_recipes, RECIPES_PER_PAGE)
-    page = request.GET.get('page')
-
-    try:
-        recipe_list = paginator.page(page)
-    except PageNotAnInteger:
-        recipe_list = paginator.page(1)
-    except EmptyPage:
-        recipe_list = paginator.page(paginator.num_pages)
+    all_recipes = Recipe.objects.select_related('author').order_by('date', 'id')
+
+    if 'page' in request.GET:
+        paginator = Paginator(all_recipes, RECIPES_PER_PAGE)
+        page = request.GET.get('page')
+        try:
+            recipe_list = paginator.page(page)
+        except PageNotAnInteger:
+            recipe_list = paginator.page(1)
+        except EmptyPage:
+            recipe_list = paginator.page(paginator.num_pages)
+    else:
+        estimate = getattr(settings, 'RECIPES_ESTIMATED_TOTAL', True)
+        recipe_list = keyset_page(all_recipes, request.GET.get('cursor'),
+                                  RECIPES_PER_PAGE, estimate=estimate)
 
     context = {
         'recipes': recipe_list,
         'user': request.user,
     }
 
-    user = request.user
-    if user.is_authenticated:
-        fridge = Fridge.objects.get_or_create(user=user)[0]
-        user_recipes = fridge.recipes.all()
-        context['user_recipes'] = user_recipes
-
     return render(request, 'recipes/recipes.html', context)
 
 
@@ -46,15 +52,17 @@ def recipe_detail(request, slug):
     """
     Displays details of a particular recipe.
 
+    Views are counted by a write-behind counter, hence the page does not
+    write to the database and the number shown is approximate.
+
     :param request: standard request object.
     :param slug: slug passed from urls for identification of recipe.
     :return: standard HttpResponse object.
     """
 
-    recipe = get_object_or_404(Recipe, slug=slug)
-    ingredients = RecipeIngredient.objects.filter(recipe=recipe)
-    recipe.views += 1
-    recipe.save()
+    recipe = get_object_or_404(Recipe.objects.select_related('author'), slug=slug)
+    ingredients = RecipeIngredient.objects.filter(recipe=recipe).select_related('ingredient', 'unit')
+    view_counter.increment(recipe.pk)
 
     context = {
         'author': recipe.author,
@@ -62,21 +70,21 @@ def recipe_detail(request, slug):
         'cuisine': recipe.get_cuisine_display(),
         'description': recipe.description,
         'date': recipe.date,
-        'views': recipe.views,
-        'image': recipe.image,
+        'views': view_counter.count(recipe),
+        'image': recipe.detail_image,
+        'image_width': recipe.image_width,
+        'image_height': recipe.image_height,
+        'image_placeholder': recipe.image_placeholder,
         'steps': recipe.step_list(),
         'ingredients': ingredients,
         'user': request.user,
         'pk': recipe.pk,
     }
 
-    user = request.user
-    if user.is_authenticated:
-        fridge = Fridge.objects.get_or_create(user=user)[0]
-        user_recipes = fridge.recipes.all().values_list('id', flat=True)
-        context['user_recipes'] = user_recipes
-
-    return render(request, 'recipes/recipe_detail.html', context)
+    response = render(request, 'recipes/recipe_detail.html', context)
+    # Lets the page cache count views of cached copies (see utilities.page_cache)
+    response.counted_view = recipe.pk
+    return response
 
 
 @login_required
@@ -89,11 +97,10 @@ def add_to_fridge(request, pk):
     :return: standard HttpResponse object.
     """
 
-    user = request.user
-    fridge = Fridge.objects.get_or_create(user=user)[0]
+    fridge = request.fridge
     recipe = Recipe.objects.get(pk=pk)
     # In case user tried to add the same recipe twice
-    if recipe not in fridge.recipes.all():
+    if recipe.pk not in fridge_recipe_ids(request):
         fridge.recipes.add(recipe)
     url = reverse('fridge:fridge_detail')
 
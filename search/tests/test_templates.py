@@ -1,6 +1,7 @@
 from string import capwords
 
 from http import HTTPStatus
+from unittest import mock
 
 from django.core.urlresolvers import reverse
 from django.test import TestCase, Client
@@ -61,3 +62,15 @@ class SearchResultsTests(TestCase):
 
         self.assertContains(response, expected_ingredient, status_code=HTTPStatus.OK)
         self.assertContains(response, expected_recipe)
+
+    def test_results_are_paginated(self):
+        populate_recipes()
+        url = self.url + self.meat
+
+        with mock.patch('search.views.RECIPES_PER_PAGE', 2):
+            first = self.client.get(url)
+            second = self.client.get(url + '&page=2')
+
+        self.assertEqual(len(first.context['recipes']), 2)
+        self.assertContains(first, '?page=2&amp;q=meat')
+        self.assertEqual(len(second.context['recipes']), 1)
@@ -2,10 +2,15 @@
 Logic related to searching fridge & global recipes lives.
 """
 
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import render
 
 from utilities.search_helpers import decode, get_name_set, superset_recipes
 
+RECIPES_PER_PAGE = 12
+
 
 def search_results(request):
     """
@@ -13,20 +18,32 @@ def search_results(request):
 
     Note: ingredients entered are a subset of a recipe, not a superset.
 
+    Results are paginated, so that only recipes of the requested page are
+    fetched from the database.
+
     :param request: default request object.
     :return: standard HttpResponse object.
     """
 
-    ingredients = request.GET.get('q')
+    query = request.GET.get('q')
+    ingredients = query
     matched = []
     if ingredients:
         ingredients = decode(ingredients)
         ingredients = get_name_set(ingredients)
-        matched = superset_recipes(ingredients)
+        paginator = Paginator(superset_recipes(ingredients), RECIPES_PER_PAGE)
+        page = request.GET.get('page')
+        try:
+            matched = paginator.page(page)
+        except PageNotAnInteger:
+            matched = paginator.page(1)
+        except EmptyPage:
+            matched = paginator.page(paginator.num_pages)
 
     content = {
         'ingredients': ingredients,
         'recipes': matched,
+        'page_query': '&' + urlencode({'q': query}) if query else '',
     }
 
     return render(request, 'search/search_results.html', content)
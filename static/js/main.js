@@ -10,34 +10,10 @@ $(function() {
     /* Add char counters to text input areas */
     const elements = createElements();
     addInputEventsTo(elements);
-
-    /* Add image validator to image field (activated on form submit) */
-    const imageField = $('#id_image');
-    imageField.change(function() {
-        const _URL = window.URL || window.webkitURL;
-        let image, file;
-        if ((file = this.files[0])) {
-            image = new Image();
-            image.onload = function () {
-                const allowedWidth = imageField.attr('data-width');
-                const allowedHeight = imageField.attr('data-height');
-                if (allowedWidth < this.width && allowedHeight < this.height) {
-                    $('.recipe-image').find('.errorlist').remove();
-                    $(`<ul class="errorlist">
-                        <li>
-                          Uploaded image is too big. <br/>
-                          Allowed dimensions: ${allowedWidth} x ${allowedHeight}<br/> 
-                          Uploaded image: ${this.width} x ${this.height}
-                        </li>
-                      </ul>`
-                    ).insertAfter(imageField);
-                }
-            };
-            image.src = _URL.createObjectURL(file);
-        }
-    });
 });
 
+$(window).on('pageshow', showFridgeLinks);
+
 function createElements() {
     const title = new InputArea('id_title', 'title_chars_left', addCharsLeftEvent);
     const description = new InputArea('id_description', 'description_chars_left', addCharsLeftEvent);
@@ -75,3 +51,23 @@ function addInputEventsTo(elements) {
     elements.forEach((element) => element.applyEvent());
 }
 
+/* Pages rendered for anonymous visitors may be served from a cache (see
+   utilities/page_cache.py), also to users who have logged in since, e.g.,
+   by the back button. Their fridge links are hidden; show those that apply. */
+function showFridgeLinks() {
+    const $links = $('[data-fridge-recipe]');
+    if ($links.length === 0) {
+        return;
+    }
+
+    $.getJSON($('body').data('recipe-ids-url'), function(data) {
+        const recipes = new Set(data.recipes);
+        $links.each(function() {
+            const $link = $(this);
+            const present = recipes.has($link.data('fridge-recipe'));
+            const shown = data.authenticated && present === ($link.data('fridge-show') === 'present');
+            $link.prop('hidden', !shown);
+        });
+    });
+}
+
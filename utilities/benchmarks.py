@@ -0,0 +1,234 @@
+"""
+Benchmarks of search helpers and of the busiest views.
+
+Every case is measured against synthetic datasets (see
+utilities/synthetic.py) of several sizes. For every case, the benchmark
+records:
+
+    - latency: median and 95th percentile over a number of repeats;
+    - number of queries;
+    - peak memory allocated by Python (tracemalloc).
+
+Everything is measured warm: a case is run once before measuring, so that,
+e.g., building the search index is not attributed to its first caller.
+The search result cache is cleared before every run, though, and the page
+cache is off, otherwise only cache lookups would be measured. Views of
+recipes are not counted while measuring: they are not real, and counting
+them would enqueue jobs that add them to recipes.
+
+Results can be saved as JSON and compared with results of an earlier run.
+Latency and memory regress when they grow by more than a threshold, the
+number of queries regresses when it grows at all.
+"""
+
+import platform
+import tracemalloc
+from math import ceil
+from statistics import median
+from time import perf_counter
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from fridge.models import Fridge
+from ingredients.models import Ingredient
+from recipes.counters import view_counter
+from recipes.models import Recipe
+from .result_cache import search_cache
+from .search_helpers import encode, recipes_containing, superset_recipes
+from .synthetic import generate_dataset, synthetic
+
+# Bumped when the format of results changes.
+VERSION = 1
+
+DEFAULT_REPEAT = 20
+DEFAULT_THRESHOLD = 0.25
+
+# Latency changes smaller than that (in ms) are noise, not regressions.
+NOISE_MS = 1.0
+
+# Number of (most popular) ingredients searched for.
+SEARCHED_INGREDIENTS = 3
+
+
+def dataset_size(recipes):
+    """
+    :return: (users, ingredients, recipes) of a dataset with a given number
+             of recipes; a user authors about a hundred recipes.
+    """
+
+    return max(recipes // 100, 10), max(100, min(5000, recipes // 20)), recipes
+
+
+class Context:
+    """ Objects that cases work with, picked from the current database. """
+
+    def __init__(self):
+        users = User.objects.order_by('id')
+        self.user = synthetic(User).order_by('id').first() or users.first()
+        self.fridge = Fridge.objects.get(user=self.user) if self.user else None
+        self.fridge_ingredients = (list(self.fridge.ingredients.values_list('name', flat=True))
+                                   if self.fridge else [])
+        self.searched = list(Ingredient.objects.annotate(uses=Count('recipeingredient'))
+                             .order_by('-uses', 'id')
+                             .values_list('name', flat=True)[:SEARCHED_INGREDIENTS])
+        self.recipe = Recipe.objects.order_by('-views', 'id').first()
+
+        self.anonymous = Client()
+        self.client = Client()
+        if self.user:
+            self.client.force_login(self.user)
+
+
+def _get(client, url, data=None):
+    def view():
+        response = client.get(url, data)
+        if response.status_code != 200:
+            raise AssertionError(f'{url} responded with {response.status_code}.')
+    return view
+
+
+# name -> function that takes a Context and returns what is measured.
+CASES = {
+    'superset_recipes': lambda c: lambda: list(superset_recipes(set(c.searched))),
+    'recipes_containing': lambda c: lambda: list(recipes_containing(c.fridge_ingredients)),
+    'recipes_containing_fridge': lambda c: lambda: list(
+        recipes_containing(c.fridge_ingredients, fridge=c.fridge)),
+    'home': lambda c: _get(c.anonymous, reverse('home')),
+    'recipes': lambda c: _get(c.anonymous, reverse('recipes:recipes')),
+    'recipe_detail': lambda c: _get(c.anonymous, reverse('recipes:recipe_detail',
+                                                         kwargs={'slug': c.recipe.slug})),
+    'fridge_detail': lambda c: _get(c.client, reverse('fridge:fridge_detail')),
+    'possibilities': lambda c: _get(c.client, reverse('fridge:possibilities')),
+    'search_results': lambda c: _get(c.anonymous, reverse('search:search_results'),
+                                     {'q': encode(', '.join(c.searched))}),
+}
+
+
+def measure(function, repeat=DEFAULT_REPEAT):
+    """
+    :param function: callable that is measured.
+    :param repeat: number of timed runs.
+    :return: a dictionary of latencies (ms), queries and peak memory (KiB).
+    """
+
+    def run():
+        search_cache.clear()
+        function()
+
+    run()  # Warms up.
+
+    with CaptureQueriesContext(connection) as queries:
+        run()
+    # Requests reset the query log, hence queries are counted right away.
+    query_count = len(queries)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        timings.append((perf_counter() - start) * 1000)
+    timings.sort()
+
+    return {
+        'median_ms': round(median(timings), 3),
+        'p95_ms': round(timings[ceil(0.95 * len(timings)) - 1], 3),
+        'queries': query_count,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_cases(cases=None, repeat=DEFAULT_REPEAT):
+    """
+    Measures cases against the current database.
+
+    :param cases: names of cases to run (all by default).
+    :return: {case name: measurements}.
+    """
+
+    results = {}
+    # Hosts of the production site only; test client requests 'testserver'.
+    with override_settings(PAGE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['testserver']), \
+            mock.patch.object(view_counter, 'increment', lambda recipe_id, n=1: None):
+        context = Context()
+        for name in cases or CASES:
+            results[name] = measure(CASES[name](context), repeat)
+    return results
+
+
+def run_benchmarks(sizes, cases=None, repeat=DEFAULT_REPEAT, seed=0, progress=None):
+    """
+    Generates a dataset of every size and measures cases against it.
+
+    Note: the synthetic dataset in the database is replaced.
+
+    :param sizes: numbers of recipes in datasets. If None, cases are
+                  measured against the database as it is ('existing').
+    :param progress: optional callable that is called with (size, results)
+                     after a size is done.
+    :return: results that can be saved as JSON.
+    """
+
+    results = {}
+    for size in sizes or [None]:
+        if size is None:
+            size = 'existing'
+        else:
+            generate_dataset(*dataset_size(size), seed=seed)
+        results[str(size)] = run_cases(cases, repeat)
+        if progress:
+            progress(size, results[str(size)])
+
+    return {
+        'version': VERSION,
+        'date': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with an earlier run. Cases and sizes that are missing
+    in either of them are not compared.
+
+    :param threshold: allowed relative growth of latency and memory.
+    :return: a list of messages that describe regressions.
+    """
+
+    if baseline.get('version') != VERSION:
+        return []
+
+    regressions = []
+    for size, cases in results['results'].items():
+        for name, current in cases.items():
+            previous = baseline['results'].get(size, {}).get(name)
+            if previous is None:
+                continue
+            where = f'{name} ({size} recipes)'
+            if current['queries'] > previous['queries']:
+                regressions.append(f"{where}: {current['queries']} queries, "
+                                   f"was {previous['queries']}")
+            for metric in ('median_ms', 'peak_kb'):
+                allowed = previous[metric] * (1 + threshold)
+                if metric == 'median_ms':
+                    allowed = max(allowed, previous[metric] + NOISE_MS)
+                if current[metric] > allowed:
+                    regressions.append(f'{where}: {metric} {current[metric]}, was {previous[metric]}')
+    return regressions
@@ -0,0 +1,208 @@
+"""
+Derivatives of uploaded recipe images.
+
+Pages do not need the original upload: recipe cards are small tiles and the
+detail page shows an image of at most MAX_WIDTH x MAX_HEIGHT. Hence, when an
+image is uploaded, smaller variants are made from it:
+
+    - card: cropped to exactly CARD_SIZE (twice the size of a tile, so that
+      it stays sharp on high density screens);
+    - detail: scaled down to fit into DETAIL_SIZE, never scaled up.
+
+Variants are WebP if Pillow supports it, progressive JPEG otherwise. They
+are stored through the default storage, next to the original, in
+Recipe.image_card and Recipe.image_detail. Dimensions of the detail variant
+and a placeholder (a data URI of a tiny copy, shown blurred while the image
+loads) are stored on the recipe as well, so pages can be rendered without
+looking at the files.
+
+Uploads larger than MAX_WIDTH x MAX_HEIGHT are scaled down before they are
+stored. JPEGs are decoded in draft mode, at 1/2, 1/4 or 1/8 of their size,
+so a 30 megapixel photo never takes more memory than a few small images.
+Other formats have to be decoded in full; if that takes more than
+IMAGE_INLINE_PIXELS, the work is left to a background job (see
+recipes/tasks.py) instead of the request. Images that would take more than
+IMAGE_MAX_PIXELS are rejected by forms, which only read their headers.
+"""
+
+import os
+from base64 import b64encode
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+CARD_SIZE = (400, 300)
+DETAIL_SIZE = (800, 600)
+
+QUALITY = 80
+
+# Placeholders fit into that; they take a few hundred bytes.
+PLACEHOLDER_SIZE = (16, 16)
+PLACEHOLDER_QUALITY = 30
+
+# Formats scaled down images are saved in; anything else becomes a PNG.
+KEPT_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+
+def variant_format():
+    """ :return: (Pillow format, file extension) variants are saved as. """
+
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def _rgb(image):
+    """ Flattens transparency onto white; neither JPEG nor cards need it. """
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image):
+    image_format, _ = variant_format()
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, image_format, quality=QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, image_format, quality=QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def placeholder(image):
+    """ :return: data URI of a tiny copy of an image. """
+
+    image = image.copy()
+    image.thumbnail(PLACEHOLDER_SIZE, Image.LANCZOS)
+    image_format, _ = variant_format()
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=PLACEHOLDER_QUALITY)
+    return f'data:image/{image_format.lower()};base64,{b64encode(buffer.getvalue()).decode()}'
+
+
+def card(image):
+    return ImageOps.fit(image, CARD_SIZE, Image.LANCZOS)
+
+
+def detail(image):
+    image = image.copy()
+    image.thumbnail(DETAIL_SIZE, Image.LANCZOS)
+    return image
+
+
+def max_size():
+    return settings.MAX_WIDTH, settings.MAX_HEIGHT
+
+
+def decoded_size(upload):
+    """
+    Reads only the header of an image.
+
+    :return: (width, height) of the image as it would be decoded in order
+             to be scaled down to max_size().
+    """
+
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if image.format == 'JPEG':
+            image.draft(None, max_size())
+        size = image.size
+    upload.seek(0)
+    return size
+
+
+def is_heavy(upload):
+    """ :return: whether processing the image is left to a background job. """
+
+    width, height = decoded_size(upload)
+    return width * height > settings.IMAGE_INLINE_PIXELS
+
+
+def is_too_large(upload):
+    """ :return: whether the image takes too much memory to be processed at all. """
+
+    width, height = decoded_size(upload)
+    return width * height > settings.IMAGE_MAX_PIXELS
+
+
+def fits(upload):
+    upload.seek(0)
+    with Image.open(upload) as image:
+        width, height = image.size
+    upload.seek(0)
+    return width <= settings.MAX_WIDTH and height <= settings.MAX_HEIGHT
+
+
+def downscale(upload):
+    """
+    Scales an image down to fit max_size(), keeping its format if possible.
+
+    Note: JPEGs are decoded in draft mode, at the smallest fraction of their
+    size that is still larger than max_size(); thumbnail() resamples what
+    is decoded. Other formats are decoded in full.
+
+    :param upload: image file.
+    :return: ContentFile with the scaled down image.
+    """
+
+    upload.seek(0)
+    with Image.open(upload) as original:
+        image_format = original.format if original.format in KEPT_FORMATS else 'PNG'
+        if original.format == 'JPEG':
+            original.draft(None, max_size())
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail(max_size(), Image.LANCZOS)
+    upload.seek(0)
+
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, image_format, quality=90, optimize=True, progressive=True)
+    else:
+        image.save(buffer, image_format)
+
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(buffer.getvalue(), name=f'{name}.{KEPT_FORMATS[image_format]}')
+
+
+def process_upload(upload):
+    """
+    :param upload: image file.
+    :return: (image, fields): the upload (scaled down if it is larger than
+             max_size()) and fields made from it (see create_variants).
+    """
+
+    if not fits(upload):
+        upload = downscale(upload)
+    return upload, create_variants(upload)
+
+
+def create_variants(upload):
+    """
+    Note: the upload is read from the beginning and rewound afterwards, so
+    that it can still be saved as it is.
+
+    :param upload: uploaded image file.
+    :return: values of Recipe fields: 'image_card' and 'image_detail'
+             (ContentFiles), 'image_width' and 'image_height' (of the
+             detail variant) and 'image_placeholder'.
+    """
+
+    upload.seek(0)
+    with Image.open(upload) as original:
+        image = _rgb(ImageOps.exif_transpose(original))
+    upload.seek(0)
+
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    _, extension = variant_format()
+    detail_image = detail(image)
+    return {
+        'image_card': ContentFile(_encode(card(image)), name=f'{name}-card.{extension}'),
+        'image_detail': ContentFile(_encode(detail_image), name=f'{name}-detail.{extension}'),
+        'image_width': detail_image.width,
+        'image_height': detail_image.height,
+        'image_placeholder': placeholder(detail_image),
+    }
@@ -0,0 +1,474 @@
+"""
+Bulk import of recipes from YAML files.
+
+Importing recipes one by one (get_or_create for every unit, ingredient and
+recipe ingredient) costs several queries per ingredient line. The importer
+works in stages instead:
+
+    1. parse: every file is read and validated; nothing touches the DB.
+    2. resolve: units and ingredients are looked up through in-memory maps
+       (case-insensitive) that are loaded with one query each. Missing
+       ones are created with a single bulk_create per batch.
+    3. insert: recipes and their ingredients are inserted in large batches.
+
+Parsing may be spread across a pool of worker processes. Parsed recipes
+are streamed back to the main process, which resolves and inserts them a
+batch at a time; the number of files being parsed at any moment is
+bounded, so memory use does not grow with the size of the folder.
+
+Everything happens in one transaction. Recipes that already exist (same
+author and title) are skipped, so that importing the same files twice does
+not duplicate them.
+
+Given a manifest (see utilities/manifest.py), the import is incremental:
+files whose contents did not change since the previous import are not
+parsed at all, recipes of changed files are updated in place (their ids,
+and hence fridges they are in, are kept) and recipes of files that were
+removed are deleted.
+
+Note: bulk_create does not send signals, hence the search index, result
+cache and page cache are invalidated explicitly once the import commits.
+"""
+
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from string import capwords
+from time import monotonic
+
+import yaml
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from ingredients.models import Ingredient, Unit
+from recipes.models import Recipe, RecipeIngredient
+from .manifest import file_hash
+from .page_cache import purge_pages
+from .result_cache import search_cache
+from .search_index import invalidate_index
+from .slugs import SlugAllocator
+
+DEFAULT_BATCH_SIZE = 500
+
+# Files a worker process is given at once.
+CHUNK_SIZE = 16
+
+# libyaml's loader is several times faster, but is optional.
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+ParsedRecipe = namedtuple('ParsedRecipe', [
+    'author', 'title', 'description', 'cuisine', 'steps', 'picture', 'ingredients',
+])
+
+
+def parse_values(values):
+    """
+    Validates values of a single recipe (typically from a YML file).
+
+    :param values: a dictionary with author, title, description, cuisine,
+                   steps, picture and ingredients.
+    :return: ParsedRecipe; ingredients are (name, quantity, unit) tuples.
+    :raises KeyError: if a field is missing.
+    :raises ValueError: if an ingredient line is not "<quantity> <unit>".
+    """
+
+    steps = [str(step).strip() for step in values['steps'].values()]
+    ingredients = []
+    for name, line in values['ingredients'].items():
+        try:
+            quantity, unit = str(line).split()
+            ingredients.append((' '.join(str(name).split()), float(quantity), unit))
+        except ValueError:
+            raise ValueError(f"'{name}: {line}' should be '<quantity> <unit>'.")
+
+    return ParsedRecipe(
+        author=str(values['author']),
+        title=str(values['title']),
+        description=values['description'],
+        cuisine=values['cuisine'],
+        steps='\n'.join(steps),
+        picture=values['picture'],
+        ingredients=ingredients,
+    )
+
+
+def parse_file(path):
+    """
+    :param path: path to a YML file that describes a recipe.
+    :return: ParsedRecipe or None if the file is empty.
+    """
+
+    with open(path, encoding='utf-8') as f:
+        values = yaml.load(f, Loader=YamlLoader)
+    if not values:
+        return None
+    return parse_values(values)
+
+
+def check_file(path):
+    """
+    Parses a file, turning problems into messages. Runs in worker processes,
+    hence it has to be a module level function and return picklable values.
+
+    :return: a tuple (ParsedRecipe or None, error message or None).
+    """
+
+    try:
+        recipe = parse_file(path)
+    except KeyError as e:
+        return None, f"'{e.args[0]}' field was not found."
+    except (ValueError, AttributeError, yaml.YAMLError) as e:
+        return None, str(e)
+    if recipe is None:
+        return None, 'File is empty.'
+    return recipe, None
+
+
+class ImportReport:
+    """ Statistics of an import. """
+
+    def __init__(self):
+        self.files = 0
+        self.recipes = 0
+        self.skipped = 0
+        self.unchanged = 0
+        self.updated = 0
+        self.deleted = 0
+        self.recipe_ingredients = 0
+        self.units = 0
+        self.ingredients = 0
+        self.errors = []  # (path, message) tuples
+        self.timings = {}  # stage -> seconds
+
+    @property
+    def changed(self):
+        """ :return: whether the import changed any recipes. """
+
+        return bool(self.recipes or self.updated or self.deleted)
+
+    @property
+    def seconds(self):
+        return sum(self.timings.values())
+
+    @property
+    def rate(self):
+        """ :return: imported recipes per second. """
+
+        return self.recipes / self.seconds if self.seconds else 0.0
+
+    @property
+    def rows(self):
+        """ :return: number of rows inserted. """
+
+        return self.recipes + self.recipe_ingredients + self.units + self.ingredients
+
+    @property
+    def row_rate(self):
+        """ :return: inserted rows per second. """
+
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        stages = ', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in self.timings.items())
+        return (f'{self.recipes} recipes ({self.recipe_ingredients} ingredient lines) '
+                f'imported from {self.files} files in {self.seconds:.2f}s '
+                f'({self.rate:.1f} recipes/s, {self.row_rate:.1f} rows/s; {stages}). '
+                f'Created {self.units} units, {self.ingredients} ingredients. '
+                f'Updated {self.updated}, deleted {self.deleted} recipes. '
+                f'Skipped {self.unchanged} unchanged files, {self.skipped} existing recipes, '
+                f'{len(self.errors)} bad files.')
+
+
+class RecipeImporter:
+    """
+    :param batch_size: number of recipes resolved and inserted at once (and
+                       rows inserted with one query).
+    :param workers: number of processes that parse files; 1 parses them in
+                    the main process.
+    :param progress: optional callable that is called with (index, path,
+                     paths) once a file is parsed.
+    :param manifest: optional Manifest; makes the import incremental. It is
+                     saved once the transaction is committed.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, workers=1, progress=None, manifest=None):
+        self.batch_size = batch_size
+        self.workers = max(workers, 1)
+        self.progress = progress
+        self.manifest = manifest
+        self.hashes = {}  # path -> content hash
+        self.report = ImportReport()
+        self.units = None
+        self.ingredients = None
+        self.authors = {}
+        self.slugs = SlugAllocator(Recipe)
+
+    def run(self, paths):
+        """
+        Imports recipes from given files.
+
+        :param paths: a list of paths to YML files.
+        :return: ImportReport.
+        """
+
+        paths = list(paths)
+        if self.manifest is not None:
+            start = monotonic()
+            paths = self.compare(paths)
+            self._lap('compare', start)
+
+        parsed = self.parse(paths)
+        with transaction.atomic():
+            if self.manifest is not None:
+                self.delete_removed()
+                transaction.on_commit(self.manifest.save)
+
+            while True:
+                start = monotonic()
+                batch = list(islice(parsed, self.batch_size))
+                self._lap('parse', start)
+                if not batch:
+                    break
+
+                start = monotonic()
+                recipes = [recipe for _, recipe in batch]
+                self.resolve_authors(recipes)
+                self.resolve_units(recipes)
+                self.resolve_ingredients(recipes)
+                self._lap('resolve', start)
+
+                start = monotonic()
+                self.insert(batch)
+                self._lap('insert', start)
+
+        if self.report.changed:
+            # Not before the caller's transaction (if any) commits, and not
+            # at all if it rolls back (e.g., import_recipes --dry-run).
+            transaction.on_commit(self.invalidate_caches)
+        return self.report
+
+    def _lap(self, stage, start):
+        self.report.timings[stage] = self.report.timings.get(stage, 0) + monotonic() - start
+
+    def compare(self, paths):
+        """
+        Hashes files and compares them with the manifest.
+
+        :return: paths of files that are new or have changed.
+        """
+
+        changed = []
+        for path in paths:
+            self.hashes[path] = file_hash(path)
+            if self.manifest.unchanged(path, self.hashes[path]):
+                self.report.unchanged += 1
+            else:
+                changed.append(path)
+        return changed
+
+    def delete_removed(self):
+        """ Deletes recipes of files that are gone, as well as their entries. """
+
+        missing = self.manifest.missing()
+        ids = [entry['recipe'] for entry in missing.values() if entry.get('recipe')]
+        if ids:
+            self.report.deleted = Recipe.objects.filter(pk__in=ids).delete()[1].get(
+                Recipe._meta.label, 0)
+        for key in missing:
+            self.manifest.forget(key)
+
+    def _record(self, path, recipe_id):
+        if self.manifest is not None:
+            self.manifest.record(path, self.hashes[path], recipe=recipe_id)
+
+    def parse(self, paths):
+        """
+        Yields (path, parsed recipe) in the order of paths; bad files are
+        reported.
+        """
+
+        for index, (path, (recipe, error)) in enumerate(zip(paths, self._check(paths))):
+            if self.progress:
+                self.progress(index, path, paths)
+            self.report.files += 1
+            if error is not None:
+                self.report.errors.append((path, error))
+            else:
+                yield path, recipe
+
+    def _check(self, paths):
+        """ Yields results of check_file(), in parallel if possible. """
+
+        if self.workers == 1:
+            yield from map(check_file, paths)
+            return
+
+        # Chunks are submitted as workers finish them, so that at most a few
+        # chunks per worker wait for (or are in) the main process.
+        chunks = (paths[i:i + CHUNK_SIZE] for i in range(0, len(paths), CHUNK_SIZE))
+        with ProcessPoolExecutor(self.workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_check_files, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def resolve_authors(self, batch):
+        """
+        Updates the map of username -> user id. Missing users are created
+        with their username as a password (unsafe!).
+        """
+
+        usernames = {recipe.author for recipe in batch} - set(self.authors)
+        if not usernames:
+            return
+        self.authors.update(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        for username in usernames - set(self.authors):
+            self.authors[username] = User.objects.create_user(username=username, password=username).pk
+
+    def resolve_units(self, batch):
+        """ Updates the map of lowercase abbreviation -> unit id. """
+
+        if self.units is None:
+            self.units = {abbrev.lower(): pk for pk, abbrev in
+                          Unit.objects.exclude(abbrev=None).values_list('id', 'abbrev')}
+        missing = {}
+        for recipe in batch:
+            for _, _, abbrev in recipe.ingredients:
+                if abbrev.lower() not in self.units:
+                    missing.setdefault(abbrev.lower(), abbrev)
+
+        if missing:
+            Unit.objects.bulk_create([Unit(name=abbrev, abbrev=abbrev) for abbrev in missing.values()],
+                                     batch_size=self.batch_size)
+            self.report.units += len(missing)
+            created = Unit.objects.filter(abbrev__in=missing.values()).values_list('id', 'abbrev')
+            self.units.update((abbrev.lower(), pk) for pk, abbrev in created)
+
+    def resolve_ingredients(self, batch):
+        """ Updates the map of lowercase name -> ingredient id. """
+
+        if self.ingredients is None:
+            self.ingredients = {name.lower(): pk for pk, name in
+                                Ingredient.objects.values_list('id', 'name')}
+        missing = {}
+        for recipe in batch:
+            for name, _, _ in recipe.ingredients:
+                if name.lower() not in self.ingredients:
+                    missing.setdefault(name.lower(), name)
+
+        if missing:
+            names = list(missing.values())
+            slugs = SlugAllocator(Ingredient).allocate_many(names)
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=capwords(name), slug=slug) for name, slug in zip(names, slugs)],
+                batch_size=self.batch_size)
+            self.report.ingredients += len(missing)
+            created = Ingredient.objects.filter(slug__in=slugs).values_list('id', 'name')
+            self.ingredients.update((name.lower(), pk) for pk, name in created)
+
+    def insert(self, batch):
+        """
+        Inserts recipes that do not exist yet and their ingredients. Recipes
+        that were imported from the same file before are updated instead.
+        """
+
+        authors = {self.authors[recipe.author] for _, recipe in batch}
+        titles = {capwords(recipe.title) for _, recipe in batch}
+        existing = {(author_id, title): pk for author_id, title, pk in
+                    Recipe.objects.filter(author_id__in=authors, title__in=titles)
+                    .values_list('author_id', 'title', 'id')}
+        previous = self._previous_ids(path for path, _ in batch)
+
+        new, updated = [], []
+        for path, recipe in batch:
+            key = (self.authors[recipe.author], capwords(recipe.title))
+            if path in previous:
+                updated.append((path, recipe, previous[path]))
+            elif key in existing:
+                self.report.skipped += 1
+                self._record(path, existing[key])
+            else:
+                existing[key] = None  # Imported by this batch.
+                new.append((path, recipe))
+
+        rows = []
+        if updated:
+            for path, recipe, pk in updated:
+                Recipe.objects.filter(pk=pk).update(**self._fields(recipe))
+                self._record(path, pk)
+            RecipeIngredient.objects.filter(recipe_id__in=[pk for _, _, pk in updated]).delete()
+            rows += self._recipe_ingredients((recipe, pk) for _, recipe, pk in updated)
+            self.report.updated += len(updated)
+
+        if new:
+            slugs = self.slugs.allocate_many(recipe.title for _, recipe in new)
+            now = timezone.now()
+            Recipe.objects.bulk_create([Recipe(date=now, slug=slug, **self._fields(recipe))
+                                        for (_, recipe), slug in zip(new, slugs)],
+                                       batch_size=self.batch_size)
+            recipe_ids = dict(Recipe.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+            for (path, _), slug in zip(new, slugs):
+                self._record(path, recipe_ids[slug])
+            rows += self._recipe_ingredients((recipe, recipe_ids[slug])
+                                             for (_, recipe), slug in zip(new, slugs))
+            self.report.recipes += len(new)
+
+        RecipeIngredient.objects.bulk_create(rows, batch_size=self.batch_size)
+        self.report.recipe_ingredients += len(rows)
+
+    def _previous_ids(self, paths):
+        """
+        :return: {path: id} of recipes that files were imported as before
+                 and that still exist.
+        """
+
+        if self.manifest is None:
+            return {}
+        previous = {}
+        for path in paths:
+            entry = self.manifest.get(path)
+            if entry and entry.get('recipe'):
+                previous[path] = entry['recipe']
+        if not previous:
+            return {}
+        alive = set(Recipe.objects.filter(pk__in=previous.values()).values_list('id', flat=True))
+        return {path: pk for path, pk in previous.items() if pk in alive}
+
+    def _fields(self, recipe):
+        return dict(author_id=self.authors[recipe.author],
+                    title=capwords(recipe.title),
+                    description=recipe.description or 'No description provided.',
+                    steps=recipe.steps or 'No steps provided. Time to get creative!',
+                    cuisine=recipe.cuisine,
+                    image=recipe.picture)
+
+    def _recipe_ingredients(self, recipes):
+        """ :param recipes: (ParsedRecipe, recipe id) pairs. """
+
+        rows = []
+        for recipe, recipe_id in recipes:
+            seen = set()
+            for name, quantity, abbrev in recipe.ingredients:
+                ingredient_id = self.ingredients[name.lower()]
+                if ingredient_id in seen:  # A recipe lists an ingredient once.
+                    continue
+                seen.add(ingredient_id)
+                rows.append(RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                                             unit_id=self.units[abbrev.lower()], quantity=quantity))
+        return rows
+
+    @staticmethod
+    def invalidate_caches():
+        invalidate_index()
+        search_cache.clear()
+        purge_pages()
+
+
+def _check_files(paths):
+    """ check_file() for a chunk of files, which saves inter-process trips. """
+
+    return [check_file(path) for path in paths]
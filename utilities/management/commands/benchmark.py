@@ -0,0 +1,81 @@
+"""
+Runs benchmarks of search helpers and views (see utilities/benchmarks.py),
+e.g.:
+
+    python manage.py benchmark --sizes 1000,10000 --output new.json --baseline old.json
+
+Fails if results regressed compared to the baseline.
+
+Note: unless --existing is given, the synthetic dataset in the database is
+replaced, so do not run it against production. It has to be confirmed with
+--yes.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from utilities.benchmarks import (
+    CASES, DEFAULT_REPEAT, DEFAULT_THRESHOLD, compare, run_benchmarks,
+)
+
+
+def _numbers(value):
+    return [int(number) for number in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks search helpers and views against synthetic datasets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=_numbers, default=[1000, 10000],
+                            help='Comma separated numbers of recipes in datasets.')
+        parser.add_argument('--existing', action='store_true',
+                            help='Measure the database as it is instead of generating datasets.')
+        parser.add_argument('--cases', type=lambda value: value.split(','),
+                            help=f'Comma separated cases to run: {", ".join(CASES)}.')
+        parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                            help='Number of timed runs of every case.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of generated datasets.')
+        parser.add_argument('--output', help='JSON file results are written to.')
+        parser.add_argument('--baseline', help='JSON file of earlier results to compare with.')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Allowed relative growth of latency and memory.')
+        parser.add_argument('--yes', action='store_true',
+                            help='Confirm that the synthetic dataset in the database may be replaced.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['cases'] or []) - set(CASES)
+        if unknown:
+            raise CommandError(f'Unknown cases: {", ".join(sorted(unknown))}.')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat has to be positive.')
+        if not options['existing'] and not options['yes']:
+            raise CommandError(f"The synthetic dataset in the {connection.settings_dict['NAME']} "
+                               f'database would be replaced; confirm with --yes or use --existing.')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+
+        sizes = None if options['existing'] else options['sizes']
+        results = run_benchmarks(sizes, cases=options['cases'], repeat=options['repeat'],
+                                 seed=options['seed'], progress=self.progress)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def progress(self, size, results):
+        self.stdout.write(f'{size} recipes:')
+        for name, result in results.items():
+            self.stdout.write(f"  {name:<26} {result['median_ms']:>9.2f} ms "
+                              f"(p95 {result['p95_ms']:.2f}) {result['queries']:>3} queries "
+                              f"{result['peak_kb']:>9.1f} KiB")
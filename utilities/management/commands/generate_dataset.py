@@ -0,0 +1,64 @@
+"""
+Generates a synthetic dataset of users, ingredients and recipes (see
+utilities/synthetic.py), e.g.:
+
+    python manage.py generate_dataset --users 10000 --recipes 1000000
+
+A dataset generated earlier is deleted first.
+"""
+
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utilities.synthetic import DEFAULT_CHUNK_SIZE, DatasetGenerator, clear_dataset
+
+# Seconds between progress messages.
+PROGRESS_INTERVAL = 2
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic dataset for load testing and benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Number of users.')
+        parser.add_argument('--ingredients', type=int, default=2000, help='Number of ingredients.')
+        parser.add_argument('--recipes', type=int, default=10000, help='Number of recipes.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Number of rows inserted at once.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Only delete the previously generated dataset.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Deleted {clear_dataset()} rows.')
+            return
+        if min(options['users'], options['ingredients'], options['chunk_size']) < 1 or \
+                options['recipes'] < 0:
+            raise CommandError('Numbers of users, ingredients and the chunk size have to be positive.')
+
+        self.verbosity = options['verbosity']
+        self.reported = monotonic()
+        generator = DatasetGenerator(options['users'], options['ingredients'], options['recipes'],
+                                     seed=options['seed'], chunk_size=options['chunk_size'],
+                                     progress=self.progress)
+        counts = generator.run()
+
+        rows = sum(counts.values())
+        seconds = sum(generator.timings.values())
+        for model, n in sorted(counts.items()):
+            self.stdout.write(f'{model}: {n}')
+        stages = ', '.join(f'{stage} {t:.2f}s' for stage, t in generator.timings.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {rows} rows in {seconds:.2f}s ({rows / seconds if seconds else 0:.0f} rows/s; '
+            f'{stages}).'))
+
+    def progress(self, stage, done, total):
+        """ Reports progress every few seconds (and at the end of a stage). """
+
+        now = monotonic()
+        if self.verbosity < 1 or (done < total and now - self.reported < PROGRESS_INTERVAL):
+            return
+        self.reported = now
+        self.stdout.write(f'{stage}: {done}/{total}')
@@ -0,0 +1,86 @@
+"""
+Imports units, ingredients and recipes from a data folder, which has the
+layout of utilities/data:
+
+    units.txt
+    ingredients.txt
+    recipes/*.yml
+
+Only files that changed since the previous import are imported; the
+manifest of imported files is kept in the data folder (manifest.json).
+"""
+
+import os
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from utilities.importer import DEFAULT_BATCH_SIZE, RecipeImporter
+from utilities.manifest import Manifest
+from utilities.populate import populate_ingredients, populate_units
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
+
+# Seconds between progress messages.
+PROGRESS_INTERVAL = 2
+
+
+class Command(BaseCommand):
+    help = 'Imports units, ingredients and recipes from a data folder.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('folder', nargs='?', default=DATA_FOLDER,
+                            help='Folder with units.txt, ingredients.txt and recipes/.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of recipes inserted at once.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes that parse recipe files.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Import everything, but roll the transaction back.')
+
+    def handle(self, *args, **options):
+        folder = options['folder']
+        recipes = os.path.join(folder, 'recipes')
+        if not os.path.isdir(recipes):
+            raise CommandError(f'{recipes} is not a folder.')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers have to be positive.')
+
+        self.verbosity = options['verbosity']
+        manifest = Manifest(os.path.join(folder, 'manifest.json'))
+        paths = sorted(os.path.join(recipes, name) for name in os.listdir(recipes)
+                       if name.endswith(('.yml', '.yaml')))
+
+        with transaction.atomic():
+            for name, populate in (('units.txt', populate_units),
+                                   ('ingredients.txt', populate_ingredients)):
+                path = os.path.join(folder, name)
+                if os.path.exists(path):
+                    populate(path, manifest=manifest)
+
+            self.started = self.reported = monotonic()
+            importer = RecipeImporter(batch_size=options['batch_size'], workers=options['workers'],
+                                      progress=self.progress, manifest=manifest)
+            report = importer.run(paths)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        for path, message in report.errors:
+            self.stderr.write(f'{os.path.basename(path)}: {message}')
+        self.stdout.write(str(report))
+        if options['dry_run']:
+            self.stdout.write('Dry run: nothing was saved.')
+        else:
+            self.stdout.write(self.style.SUCCESS('Import is done.'))
+
+    def progress(self, index, path, paths):
+        """ Reports parsing progress every few seconds (and at the end). """
+
+        now = monotonic()
+        done = index + 1
+        if self.verbosity < 1 or (done < len(paths) and now - self.reported < PROGRESS_INTERVAL):
+            return
+        self.reported = now
+        rate = done / (now - self.started) if now > self.started else 0.0
+        self.stdout.write(f'Parsed {done}/{len(paths)} files ({rate:.0f} files/s)')
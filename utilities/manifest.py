@@ -0,0 +1,80 @@
+"""
+Manifest of imported files.
+
+Maps every imported file to the hash of its contents and the ids of the
+objects it was imported as. Files whose hash has not changed since the
+previous import do not have to be parsed (or even looked up in the DB)
+again, and objects of files that disappeared can be found and deleted.
+
+The manifest is a JSON file. Paths in it are relative to the directory the
+manifest is in, so that the data folder can be moved together with it.
+"""
+
+import hashlib
+import json
+import os
+
+# Bumped when the format changes; manifests of other versions are ignored.
+VERSION = 1
+
+
+def file_hash(path):
+    """ :return: SHA-1 hex digest of file's contents. """
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    :param path: path to the manifest file; it does not have to exist yet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.entries = {}  # key -> {'hash': ..., <object>: id}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        if data.get('version') == VERSION:
+            self.entries = data['files']
+
+    def key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def get(self, path):
+        """ :return: manifest entry (a dictionary) of a file or None. """
+
+        return self.entries.get(self.key(path))
+
+    def unchanged(self, path, digest):
+        entry = self.get(path)
+        return entry is not None and entry['hash'] == digest
+
+    def record(self, path, digest, **ids):
+        """ Remembers a file as imported, e.g. record(path, digest, recipe=1). """
+
+        self.entries[self.key(path)] = dict(ids, hash=digest)
+
+    def missing(self):
+        """ :return: {key: entry} of files that no longer exist. """
+
+        return {key: entry for key, entry in self.entries.items()
+                if not os.path.exists(os.path.join(self.root, key))}
+
+    def forget(self, key):
+        self.entries.pop(key, None)
+
+    def save(self):
+        """ Writes the manifest; readers never see a half-written file. """
+
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION, 'files': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
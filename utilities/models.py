@@ -0,0 +1,19 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class SyntheticObject(models.Model):
+    """
+    Model that marks a user, ingredient or recipe of a synthetic dataset
+    (see utilities/synthetic.py), so that the dataset can be deleted without
+    touching real data, whatever its names and slugs look like.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return f'{self.content_type} {self.object_id}'
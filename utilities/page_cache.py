@@ -0,0 +1,152 @@
+"""
+Whole-page cache for anonymous visitors.
+
+Public pages (recipe list, recipe detail, ingredient detail, search
+results) look the same for every visitor that is not logged in. Responses
+to such visitors are stored in a process-local memory cache (the 'local'
+cache, see CACHES in settings) and later served from the middleware,
+before any view (and any database query) runs. The home page is not
+cached: its search form needs a CSRF token of every visitor's own.
+
+A request is considered anonymous if it carries neither a session nor a
+messages cookie; that is decided without touching the session store.
+Logged in users always get fresh pages. Pages rendered for anonymous
+visitors ask fridge:recipe_ids which recipes are in the visitor's fridge
+(see static/js/main.js), so that a logged in user who is shown such
+a page anyway (e.g., by the back button after logging in) still gets the
+"add to fridge" buttons.
+
+Cache keys include a generation token (see utilities/shared_tokens.py).
+Model signals replace the token whenever recipes or ingredients change,
+which purges every cached page of every process at once: other processes
+notice within SHARED_TOKEN_TTL seconds, workers and management commands
+included. Responses also carry Vary: Cookie and a short public max-age, so
+that browsers and proxies may keep them for a while as well.
+
+Recipe views are counted even if the page comes from the cache: the view
+marks its response with the recipe id (counted_view attribute), which is
+stored along with the page.
+"""
+
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from ingredients.models import Ingredient
+from recipes.counters import view_counter
+from recipes.models import Recipe, RecipeIngredient
+from .shared_tokens import SharedToken
+from .timing import record_cache
+
+generation = SharedToken('page-cache-generation')
+
+# URL names of pages that may be cached.
+CACHED_VIEWS = {
+    'recipes:recipes',
+    'recipes:recipe_detail',
+    'ingredients:ingredient_detail',
+    'search:search_results',
+}
+
+# Cookies that mean a visitor may see a personalised page.
+PERSONAL_COOKIES = (settings.SESSION_COOKIE_NAME, 'messages')
+
+
+def _cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'local')]
+
+
+def _timeout():
+    """ :return: number of seconds pages are kept for; 0 disables the cache. """
+
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 0)
+
+
+def page_key(request, generation):
+    """ :return: cache key of a page; query strings are part of it. """
+
+    path = md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{generation}:{path}'
+
+
+def purge_pages():
+    """ Makes every cached page stale. """
+
+    generation.replace()
+
+
+def is_cacheable(request):
+    """
+    :return: True if a request is for a public page by an anonymous visitor.
+    """
+
+    if request.method not in ('GET', 'HEAD') or not _timeout():
+        return False
+    if any(name in request.COOKIES for name in PERSONAL_COOKIES):
+        return False
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return False
+    return match.view_name in CACHED_VIEWS
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """
+    Serves and stores pages of anonymous visitors.
+
+    Must come before SessionMiddleware and CsrfViewMiddleware, so that its
+    process_response() sees cookies that they set: responses that set
+    cookies are never cached.
+    """
+
+    def process_request(self, request):
+        request._page_cache_key = None
+        if not is_cacheable(request):
+            return None
+
+        key = page_key(request, generation.get())
+        response = _cache().get(key)
+        record_cache('page', response is not None)
+        if response is None:
+            request._page_cache_key = key
+            return None
+
+        recipe_id = getattr(response, 'counted_view', None)
+        if recipe_id is not None:
+            view_counter.increment(recipe_id)
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    def process_response(self, request, response):
+        key = getattr(request, '_page_cache_key', None)
+        if key is None:
+            return response
+
+        if (response.status_code != 200 or response.streaming or response.cookies
+                or response.has_header('Set-Cookie')):
+            return response
+
+        timeout = _timeout()
+        patch_vary_headers(response, ('Cookie',))
+        patch_cache_control(response, public=True,
+                            max_age=min(timeout, getattr(settings, 'PAGE_CACHE_MAX_AGE', 60)))
+        _cache().set(key, response, timeout)
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid='page_cache_recipe_saved')
+@receiver(post_delete, sender=Recipe, dispatch_uid='page_cache_recipe_deleted')
+@receiver(post_save, sender=RecipeIngredient, dispatch_uid='page_cache_ri_saved')
+@receiver(post_delete, sender=RecipeIngredient, dispatch_uid='page_cache_ri_deleted')
+@receiver(post_save, sender=Ingredient, dispatch_uid='page_cache_ingredient_saved')
+@receiver(post_delete, sender=Ingredient, dispatch_uid='page_cache_ingredient_deleted')
+def _content_changed(sender, **kwargs):
+    purge_pages()
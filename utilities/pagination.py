@@ -0,0 +1,223 @@
+"""
+Keyset (seek) pagination.
+
+Paginator needs COUNT(*) and an OFFSET that the database has to scan
+through, so that deep pages get slower the deeper they are. Keyset
+pagination remembers the sort key of the last (or first) row of a page
+instead and asks for rows that come after (or before) it. With an index on
+the sort key every page costs the same.
+
+Sort key must be unique, hence it should end with the primary key, e.g.,
+('date', 'id'). Only ascending ordering is supported.
+
+Cursors are opaque to users: a URL-safe base64 encoded JSON document with
+a direction and the key values. Invalid cursors lead to the first page.
+"""
+
+import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .timing import record_cache
+
+AFTER = 'a'
+BEFORE = 'b'
+
+# How long an exact count is reused by estimated_count() on backends that
+# have no statistics to estimate from.
+COUNT_TIMEOUT = 300
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, values):
+    """
+    :param direction: AFTER or BEFORE.
+    :param values: values of the sort key.
+    :return: an opaque string that can be put into a URL.
+    """
+
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    data = json.dumps([direction, values], separators=(',', ':'))
+    return urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys, model=None):
+    """
+    :param cursor: a string made by encode_cursor().
+    :param keys: names of the fields the sort key consists of.
+    :param model: if given, every value has to be valid for its field (e.g.,
+                  a date for a DateTimeField), as cursors come from URLs.
+    :return: a tuple (direction, values).
+    :raises InvalidCursor: if the cursor is malformed.
+    """
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+    if direction not in (AFTER, BEFORE) or not isinstance(values, list) \
+            or len(values) != len(keys):
+        raise InvalidCursor(cursor)
+
+    parsed = []
+    for key, value in zip(keys, values):
+        if isinstance(value, str):
+            try:
+                value = parse_datetime(value) or value
+            except ValueError:  # Looks like a date, but is not a valid one.
+                raise InvalidCursor(cursor)
+        if model is not None:
+            _check_value(model, key, value, cursor)
+        parsed.append(value)
+
+    return direction, parsed
+
+
+def _check_value(model, key, value, cursor):
+    """ Values have to be of the type of their field already, e.g., ints for ids. """
+
+    if value is None or isinstance(value, bool):
+        raise InvalidCursor(cursor)
+    try:
+        valid = model._meta.get_field(key).to_python(value) == value
+    except (ValidationError, TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise InvalidCursor(cursor)
+
+
+def _seek(keys, values, lookup):
+    """
+    Builds a filter for rows whose key comes strictly after (lookup='gt')
+    or before (lookup='lt') the given values in lexicographic order:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    """
+
+    condition = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f'{key}__{lookup}': values[i]})
+        for previous, value in zip(keys[:i], values[:i]):
+            term &= Q(**{previous: value})
+        condition |= term
+    return condition
+
+
+def estimated_count(queryset):
+    """
+    Returns a cheap estimate of the number of rows in the table of a query
+    set. PostgreSQL keeps one in its statistics; other backends fall back to
+    an exact count that is cached in memory (the 'local' cache) for a while.
+
+    Note: filters of the query set are ignored by the PostgreSQL estimate.
+    """
+
+    model = queryset.model
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s',
+                           [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return int(row[0])
+
+    key = f'estimated-count:{model._meta.db_table}'
+    cache = caches['local']
+    count = cache.get(key)
+    record_cache('count', count is not None)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+class KeysetPage:
+    """
+    A page of objects. Mirrors the parts of django.core.paginator.Page that
+    templates use, apart from page numbers.
+
+    :param object_list: objects on the page.
+    :param next_cursor: cursor of the following page or None.
+    :param previous_cursor: cursor of the preceding page or None.
+    :param estimated_total: approximate number of objects or None.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor, estimated_total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.estimated_total = estimated_total
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def keyset_page(queryset, cursor, per_page, keys=('date', 'id'), estimate=False):
+    """
+    Returns a page of a query set.
+
+    :param queryset: a query set; its ordering is replaced by keys.
+    :param cursor: a cursor from a previous page or None for the first page.
+    :param per_page: maximum number of objects on a page.
+    :param keys: names of fields that make a unique sort key.
+    :param estimate: whether an estimated total should be provided.
+    :return: KeysetPage instance.
+    """
+
+    direction, values = AFTER, None
+    if cursor:
+        try:
+            direction, values = decode_cursor(cursor, keys, queryset.model)
+        except InvalidCursor:
+            pass
+
+    if direction == BEFORE and values is not None:
+        descending = [f'-{key}' for key in keys]
+        rows = list(queryset.filter(_seek(keys, values, 'lt'))
+                    .order_by(*descending)[:per_page + 1])
+        more_before = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        more_after = True
+    else:
+        following = queryset
+        if values is not None:
+            following = queryset.filter(_seek(keys, values, 'gt'))
+        rows = list(following.order_by(*keys)[:per_page + 1])
+        more_after = len(rows) > per_page
+        rows = rows[:per_page]
+        more_before = values is not None
+
+    def key_of(obj):
+        return [getattr(obj, key) for key in keys]
+
+    next_cursor = previous_cursor = None
+    if rows and more_after:
+        next_cursor = encode_cursor(AFTER, key_of(rows[-1]))
+    if rows and more_before:
+        previous_cursor = encode_cursor(BEFORE, key_of(rows[0]))
+
+    total = estimated_count(queryset) if estimate else None
+    return KeysetPage(rows, next_cursor, previous_cursor, total)
@@ -1,6 +1,8 @@
 """
 Population scrip that can be run to create an initial, small test database.
-Still needs a lot of work, as it is quite fragile.
+
+The import itself is done by `python manage.py import_recipes`; running this
+script migrates the database, runs the import and creates a superuser.
 
 Note: password for the recipe's author is the same as the author's name. Unsafe.
 Note 2: status updates are shown in console only when populate.py is launched
@@ -10,21 +12,20 @@ from command line
 import os
 import sys
 
-import yaml
-
-project_path = os.path.normpath(os.getcwd() + os.sep + os.pardir)
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cookme.settings")
-sys.path.append(project_path)
-
-from django.core.wsgi import get_wsgi_application
-application = get_wsgi_application()
+if __name__ == '__main__':
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cookme.settings")
+    import django
+    django.setup()
 
 from django.db import transaction
-from django.core.management import execute_from_command_line
+from django.core.management import call_command
 from django.contrib.auth.models import User
 
 from recipes.models import Recipe, RecipeIngredient as RI
 from ingredients.models import Ingredient, Unit
+from utilities.importer import RecipeImporter, DEFAULT_BATCH_SIZE
+from utilities.manifest import file_hash
 
 
 class bcolors:
@@ -86,8 +87,8 @@ def get_user(username, password):
 def migrate():
     """ Prepares database for population by building tables. """
 
-    execute_from_command_line(['manage.py', 'makemigrations'])
-    execute_from_command_line(['manage.py', 'migrate'])
+    call_command('migrate')
+    call_command('createcachetable')
     terminal_out('Migrations were carried out successfully.')
 
 
@@ -119,14 +120,36 @@ def _give_privileges_to(user):
     user.save()
 
 
+def _unchanged(path, manifest):
+    """
+    Checks whether a file was imported before as it is. If not, the file is
+    recorded in the manifest once the population is committed.
+    """
+
+    if manifest is None:
+        return False
+    digest = file_hash(path)
+    if manifest.unchanged(path, digest):
+        return True
+    manifest.record(path, digest)
+    transaction.on_commit(manifest.save)
+    return False
+
+
 @transaction.atomic
-def populate_units(units_txt=None):
+def populate_units(units_txt=None, manifest=None):
     """
     Populates or updates the database with units that are parsed from a txt
     file.
+
+    :param manifest: optional Manifest; the file is skipped if it has not
+                     changed since it was last imported.
     """
 
     try:
+        if _unchanged(units_txt, manifest):
+            terminal_out('Units are up to date.')
+            return
         with open(units_txt) as f:
             f.readline()  # Get rid of the title line
             for line in f:
@@ -147,13 +170,19 @@ def _populate_unit_from_input_line(line):
 
 
 @transaction.atomic
-def populate_ingredients(ingredients_txt=None):
+def populate_ingredients(ingredients_txt=None, manifest=None):
     """
     Populates or updates the database with ingredients that are parsed from a
     txt file.
+
+    :param manifest: optional Manifest; the file is skipped if it has not
+                     changed since it was last imported.
     """
 
     try:
+        if _unchanged(ingredients_txt, manifest):
+            terminal_out('Ingredients are up to date.')
+            return
         with open(ingredients_txt) as f:
             f.readline()
             for line in f:
@@ -175,9 +204,17 @@ def _populate_ingredient_from_input_line(line):
 
 
 @transaction.atomic
-def populate_recipes(recipe_folder=None):
+def populate_recipes(recipe_folder=None, batch_size=DEFAULT_BATCH_SIZE, workers=1, manifest=None):
     """
     Populates the database with recipe instances.
+
+    Files are imported in bulk (see utilities/importer.py). Files that
+    cannot be imported are reported and skipped.
+
+    :param workers: number of processes that parse files.
+    :param manifest: optional Manifest; only new and changed files are
+                     imported, recipes of removed files are deleted.
+    :return: ImportReport.
     """
 
     _check_path_exists(recipe_folder)
@@ -185,35 +222,18 @@ def populate_recipes(recipe_folder=None):
 
     try:
         # Each file represents a recipe
-        files = os.listdir(recipe_folder)
-        for index, f in enumerate(files):
-            _report_process(index, f, files)
-            path = f'{recipe_folder}/{f}'
-
-            # If file is empty - more useful for myself to warn, instead crash
-            if os.stat(path).st_size <= 0:
-                message = f'File nr.{index+1} is empty.'
-                terminal_out(message, error=True, terminate=False)
-                continue
-
-            values = yaml.load(open(path, 'r'))
-            recipe = commit_recipe(values)
-
-            commit_recipe_ingredient(values, recipe)
-
-        terminal_out('Recipe population is done.')
-
+        files = [os.path.join(recipe_folder, f) for f in sorted(os.listdir(recipe_folder))]
+        report = RecipeImporter(batch_size=batch_size, workers=workers,
+                                progress=_report_process, manifest=manifest).run(files)
     except (FileNotFoundError, TypeError):
         terminal_out('Input path was not recognized.', error=True)
         raise
 
-    except User.DoesNotExist:
-        terminal_out('Such username does not exist. Please create a user.', error=True)
-        raise
-
-    except KeyError as e:
-        terminal_out(f"'{e.args[0]}' field was not found. Please ensure that "
-                     f"YML file contains it.", error=True)
+    for path, message in report.errors:
+        terminal_out(f'{os.path.basename(path)}: {message}', error=True, terminate=False)
+    terminal_out(str(report))
+    terminal_out('Recipe population is done.')
+    return report
 
 
 def _check_path_exists(recipe_folder):
@@ -296,14 +316,6 @@ def commit_recipe_ingredient(values, recipe):
 
 
 if __name__ == '__main__':
-    current = os.path.normpath(os.getcwd())
-    units_file = os.path.join(current, 'data', 'units.txt')
-    ingredients_file = os.path.join(current, 'data', 'ingredients.txt')
-    recipes_path = os.path.join(current, 'data', 'recipes')
     migrate()
-    populate_units(units_txt=units_file)
-    populate_ingredients(ingredients_txt=ingredients_file)
-    populate_recipes(recipe_folder=recipes_path)
+    call_command('import_recipes')
     create_super_user(username="admin")
-
-
@@ -0,0 +1,138 @@
+"""
+On-demand sampling profiler for single requests.
+
+A staff member can profile any page by adding ?profile=1 to its URL (or
+sending an X-Profile header). While the request is handled, a background
+thread looks at the stack of the thread that handles it every
+PROFILE_INTERVAL seconds. Stacks are saved in the collapsed format (one
+'frame;frame;frame count' line per distinct stack) that flame graph tools,
+e.g. flamegraph.pl or speedscope, read.
+
+Captures are written to PROFILE_DIR; only the latest PROFILE_KEEP are kept.
+They are listed at /admin/profiles/.
+
+Note: requests without the trigger only pay for checking it. The profiler
+is statistical: functions that take less than the interval may not show up,
+and it only sees Python frames (time spent in the database is attributed
+to the function that waits for it).
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+
+TRIGGER_PARAMETER = 'profile'
+TRIGGER_HEADER = 'HTTP_X_PROFILE'
+
+EXTENSION = '.collapsed'
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class Sampler(threading.Thread):
+    """
+    Samples stacks of another thread until stopped.
+
+    :param thread_id: identifier (threading.get_ident()) of the sampled thread.
+    :param interval: seconds between samples.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # 'outermost;...;innermost' -> number of samples
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self):
+        """ :return: samples in the collapsed stack format. """
+
+        return ''.join(f'{stack} {n}\n' for stack, n in self.stacks.most_common())
+
+
+def _directory():
+    return settings.PROFILE_DIR
+
+
+def captures():
+    """ :return: file names of captures, the latest first. """
+
+    try:
+        names = [name for name in os.listdir(_directory()) if name.endswith(EXTENSION)]
+    except FileNotFoundError:
+        return []
+    return sorted(names, reverse=True)
+
+
+def capture_path(name):
+    """ :return: path to a capture, or None if there is no such capture. """
+
+    if name not in captures():
+        return None
+    return os.path.join(_directory(), name)
+
+
+def save(sampler, path):
+    """
+    Writes a capture and removes the oldest ones.
+
+    :param path: path of the profiled request; it is a part of the name.
+    :return: file name of the capture.
+    """
+
+    directory = _directory()
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r'[^\w-]+', '_', path).strip('_') or 'home'
+    name = f"{timezone.now().strftime('%Y%m%d-%H%M%S-%f')}-{slug[:80]}{EXTENSION}"
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+        f.write(sampler.collapsed())
+
+    for old in captures()[settings.PROFILE_KEEP:]:
+        os.remove(os.path.join(directory, old))
+    return name
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Profiles requests of staff members that ask for it. Has to come after
+    AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        if TRIGGER_HEADER not in request.META and TRIGGER_PARAMETER not in request.GET:
+            return
+        if not request.user.is_staff:
+            return
+        request.profiler = Sampler(threading.get_ident(), settings.PROFILE_INTERVAL)
+        request.profiler.start()
+
+    def process_response(self, request, response):
+        sampler = getattr(request, 'profiler', None)
+        if sampler is None:
+            return response
+        sampler.stop()
+        response['X-Profile'] = save(sampler, request.path)
+        return response
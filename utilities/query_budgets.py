@@ -0,0 +1,125 @@
+"""
+Query budgets of views.
+
+A budget is the maximum number of queries a view may make when it renders
+a page of the dataset described by DATASET. The dataset has more recipes,
+fridge items and so on than fit into a page, hence a query per item (N+1)
+blows any budget that is not meant to allow it.
+
+Budgets are checked by utilities/tests/test_query_budgets.py. When a view
+goes over its budget, queries that were made more than once are reported,
+as they are what usually needs a select_related()/prefetch_related().
+"""
+
+import re
+from collections import Counter, namedtuple
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from .search_helpers import encode
+from .synthetic import generate_dataset, synthetic
+
+# Shape of the synthetic dataset budgets are for (see utilities/synthetic.py).
+DATASET = {'users': 5, 'ingredients': 50, 'recipes': 150}
+
+STAFF = 'budget-admin'
+
+# view: URL name; queries: maximum number of queries; user: 'anonymous',
+# 'user' (has a full fridge) or 'staff'; kwargs, params: callables that
+# return URL kwargs and GET parameters. Reads of the database cache (e.g.,
+# the version of the search index) count as queries.
+Budget = namedtuple('Budget', ['view', 'queries', 'user', 'kwargs', 'params'])
+Budget.__new__.__defaults__ = ('anonymous', None, None)
+
+
+def _recipe():
+    return {'slug': Recipe.objects.order_by('id').values_list('slug', flat=True).first()}
+
+
+def _ingredient():
+    return {'slug': Ingredient.objects.order_by('id').values_list('slug', flat=True).first()}
+
+
+def _search():
+    names = Ingredient.objects.order_by('id').values_list('name', flat=True)[:2]
+    return {'q': encode(', '.join(names))}
+
+
+BUDGETS = [
+    Budget('home', 2),
+    Budget('recipes:recipes', 2),
+    Budget('recipes:recipes', 2, params=lambda: {'page': 2}),
+    Budget('recipes:recipe_detail', 2, kwargs=_recipe),
+    Budget('ingredients:ingredient_detail', 2, kwargs=_ingredient),
+    Budget('search:search_results', 5, params=_search),
+    Budget('recipes:recipes', 4, user='user'),
+    Budget('recipes:recipe_detail', 5, user='user', kwargs=_recipe),
+    Budget('fridge:fridge_detail', 10, user='user'),
+    Budget('fridge:possibilities', 10, user='user'),
+    Budget('fridge:fridge_recipes', 9, user='user'),
+    Budget('admin:recipes_recipe_changelist', 6, user='staff'),
+    Budget('admin:recipes_recipeingredient_changelist', 5, user='staff'),
+    Budget('admin:recipes_rating_changelist', 5, user='staff'),
+    Budget('admin:fridge_fridge_changelist', 7, user='staff'),
+    Budget('admin:fridge_fridgeingredient_changelist', 5, user='staff'),
+]
+
+
+def create_dataset():
+    """ Generates the dataset budgets are for and a staff user. """
+
+    generate_dataset(**DATASET)
+    User.objects.create_superuser(STAFF, f'{STAFF}@example.com', STAFF)
+
+
+def login(client, user):
+    """ Logs the client in as one of the users budgets refer to. """
+
+    if user == 'user':
+        client.force_login(synthetic(User).order_by('id').first())
+    elif user == 'staff':
+        client.force_login(User.objects.get(username=STAFF))
+
+
+def normalize(sql):
+    """ Replaces literals in SQL, so that the same query is recognized. """
+
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    return re.sub(r'\(\?(, \?)*\)', '(...)', sql)
+
+
+def duplicates(queries):
+    """
+    :param queries: captured queries (dictionaries with 'sql').
+    :return: a report of queries that were made more than once.
+    """
+
+    counts = Counter(normalize(query['sql']) for query in queries)
+    return '\n'.join(f'{n} x {sql}' for sql, n in counts.most_common() if n > 1)
+
+
+def check(client, budget):
+    """
+    Renders a view and counts queries.
+
+    :return: None if the view is within its budget, a report otherwise.
+    """
+
+    url = reverse(budget.view, kwargs=budget.kwargs() if budget.kwargs else None)
+    params = budget.params() if budget.params else None
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    if response.status_code != 200:
+        return f'{url} responded with {response.status_code}.'
+    if len(queries) <= budget.queries:
+        return None
+
+    report = duplicates(queries) or 'No query was made twice.'
+    return (f'{url} ({budget.user}) made {len(queries)} queries, '
+            f'the budget is {budget.queries}. Repeated queries:\n{report}')
@@ -0,0 +1,133 @@
+"""
+Process-local cache of search results.
+
+Results are keyed by the canonical (sorted) tuple of ingredient ids that a
+search was made for, so that "chicken, rice" and "rice,  Chicken" share
+an entry. Every entry also remembers the version of the search index it
+was computed from (see utilities/search_index.py), and is only valid for
+that version. Writes made by any process replace the version, hence no
+process serves results of an index it does not use anymore. The cache is
+bounded both in size (least recently used entries are dropped) and in time
+(entries expire after a while).
+
+An entry is evicted as soon as a RecipeIngredient that uses one of its
+ingredients is created or deleted in this process. Other entries stay.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ingredients.models import Ingredient
+from recipes.models import RecipeIngredient
+from .timing import record_cache
+
+
+class ResultCache:
+    """
+    LRU cache with time-to-live that knows which ingredients every entry
+    depends on.
+
+    :param maxsize: maximum number of entries; SEARCH_CACHE_SIZE if None.
+    :param ttl: number of seconds an entry is valid for; SEARCH_CACHE_TTL
+                if None. Settings are read whenever they are needed.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self.entries = OrderedDict()  # key -> (expiry time, version, value)
+        self.dependants = {}  # ingredient id -> set of keys
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize if self._maxsize is not None else settings.SEARCH_CACHE_SIZE
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else settings.SEARCH_CACHE_TTL
+
+    @staticmethod
+    def key(ingredient_ids):
+        """ :return: canonical form of a set of ingredient ids. """
+
+        return tuple(sorted(ingredient_ids))
+
+    def get(self, key, version=None):
+        """
+        :param version: version of the data the value has to be derived from.
+        :return: cached value or None if there is no (valid) entry.
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < monotonic() or entry[1] != version:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                record_cache('search', False)
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            record_cache('search', True)
+            return entry[2]
+
+    def set(self, key, value, version=None):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (monotonic() + self.ttl, version, value)
+            for ingredient_id in key:
+                self.dependants.setdefault(ingredient_id, set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self._remove(next(iter(self.entries)))
+
+    def evict(self, ingredient_id):
+        """ Removes every entry that depends on a given ingredient. """
+
+        with self.lock:
+            for key in list(self.dependants.get(ingredient_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.dependants.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remove(self, key):
+        """ Removes an entry. Lock must be held. """
+
+        del self.entries[key]
+        for ingredient_id in key:
+            keys = self.dependants.get(ingredient_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.dependants[ingredient_id]
+
+
+search_cache = ResultCache()
+
+
+@receiver(post_save, sender=RecipeIngredient, dispatch_uid='result_cache_ri_saved')
+def _recipe_ingredient_saved(sender, instance, created, **kwargs):
+    # Changing quantity or unit does not change search results.
+    if created:
+        search_cache.evict(instance.ingredient_id)
+
+
+@receiver(post_delete, sender=RecipeIngredient, dispatch_uid='result_cache_ri_deleted')
+@receiver(post_delete, sender=Ingredient, dispatch_uid='result_cache_ingredient_deleted')
+def _ingredient_link_deleted(sender, instance, **kwargs):
+    ingredient_id = instance.pk if sender is Ingredient else instance.ingredient_id
+    search_cache.evict(ingredient_id)
@@ -4,10 +4,15 @@ Helper functions to support functionality related to searching the recipes.
 
 from string import capwords
 
-from django.db.models import Count
+import numpy as np
 
-from ingredients.models import Ingredient
 from recipes.models import Recipe
+from .result_cache import search_cache
+from .search_index import get_index
+
+# Largest number of ids fetched by a single query when all matched recipes
+# are iterated over; stays below SQLite's limit of query parameters.
+FETCH_BATCH = 500
 
 
 def encode(query):
@@ -76,28 +81,42 @@ def superset_recipes(ingredients):
     given ingredients (and possibly more). That is, recipe's ingredient should
     be a SUPERSET of ingredients.
 
+    Matching is done by the in-memory search index; the database is only
+    used to fetch the recipes of the page that is shown. Matched ids are
+    cached, keyed by the set of ingredient ids and the version of the
+    index, as popular searches repeat a lot.
+
     :param ingredients: an set of encoded (see above) ingredient names
-    :return: a list of recipes that have matching ingredients.
+    :return: MatchedRecipes instance, which can be given to a Paginator.
     """
 
-    matched = (Recipe.objects.filter(ingredients__name__in=ingredients)
-               .annotate(num_ings=Count('ingredients__name'))
-               .filter(num_ings=len(ingredients)))
+    index = get_index()
+    ingredient_ids = index.ingredient_ids(ingredients)
+
+    # An unknown ingredient cannot be in any of the recipes.
+    if not ingredients or len(ingredient_ids) < len(set(ingredients)):
+        return MatchedRecipes(())
 
-    return matched
+    key = search_cache.key(ingredient_ids)
+    matched = search_cache.get(key, index.version)
+    if matched is None:
+        matched = tuple(sorted(index.superset(ingredient_ids)))
+        search_cache.set(key, matched, index.version)
 
+    return MatchedRecipes(matched)
 
-def recipes_containing(ingredients, fridge=None):
+
+def recipes_containing(ingredients, fridge=None, missing=0):
     """
     Returns a list of recipes that contain ingredients from a list and
     nothing more (but they do not have to have every ingredient). That is,
     ingredients in a fridge should be a SUPERSET of recipe's ingredients.
 
-    Logic: first of all, get all ingredients that are not found in a set.
-    This is a list of ingredients that we do not want recipes to contain.
-    Once we have this list, we can select only those recipes that do not
-    contain any of these ingredients, leaving us with a query set of recipes
-    that actually contain only those ingredients that we are interested in.
+    Logic: the search index holds a recipe x ingredient incidence matrix.
+    Multiplying it by a vector of given ingredients yields, for every recipe
+    at once, the number of ingredients it lacks. Recipes that lack nothing
+    (or no more than allowed) are selected. Recipes without ingredients
+    always match.
 
     NOTE: This function looks at ALL recipes, not only those that are in a
     fridge.
@@ -106,23 +125,139 @@ def recipes_containing(ingredients, fridge=None):
                         should be in a recipe.
     :param fridge: a user's fridge from which the recipes should be used to
                    match against ingredients.
-    :return: QuerySet of recipe objects that have at least one ingredient.
+    :param missing: how many ingredients a recipe is allowed to lack.
+    :return: MatchedRecipes instance, which can be given to a Paginator.
     """
 
-    # Ensures set contents are capitalized, as DB expects capitalized names.
-    # Should never need to capitalize ingredients, but just in case it happens.
-    ingredients = [ingredient if ingredient.istitle() else
-                   capwords(ingredient) for ingredient in ingredients]
+    ingredients = _capitalize(ingredients)
+    index = get_index()
+    matched = index.subset(index.ingredient_ids(ingredients), missing=missing)
+
+    if fridge:
+        matched &= set(fridge.recipes.values_list('id', flat=True))
 
-    # Get all the ingredients that do not match our set.
-    non_matching = Ingredient.objects.exclude(name__in=ingredients)
+    return MatchedRecipes(sorted(matched))
 
-    # Now get all recipes that do not have these non-matching ingredients.
+
+def ranked_recipes(ingredients, missing=0, fridge=None, stock=None):
+    """
+    Same matching as in recipes_containing(), but recipes are ordered: the
+    ones that lack the fewest ingredients come first, then the most popular
+    ones (views). Useful for "almost cookable" lists.
+
+    Only ids and counters of candidates are kept; recipes themselves are
+    fetched one slice (page) at a time. See RankedRecipes.
+
+    :param ingredients: a set of ingredient names available.
+    :param missing: how many ingredients a recipe is allowed to lack.
+    :param fridge: if given, only recipes in the fridge are considered.
+    :param stock: if given, quantities are matched as well: an ingredient
+                  that is short counts as missing. See Fridge.stock().
+    :return: RankedRecipes instance, which can be given to a Paginator.
+    """
+
+    index = get_index()
+    ingredient_ids = index.ingredient_ids(_capitalize(ingredients))
+    recipe_ids = None
     if fridge:
-        fridge_recipes = fridge.recipes.all()
-        recipes = fridge_recipes.exclude(ingredients__in=non_matching)
-    else:
-        recipes = Recipe.objects.exclude(ingredients__in=non_matching)
+        recipe_ids = fridge.recipes.values_list('id', flat=True)
+
+    candidates = index.candidates(ingredient_ids, missing, recipe_ids, stock)
+
+    return RankedRecipes(*candidates)
+
+
+class MatchedRecipes:
+    """
+    Lazy sequence of recipes ordered by id.
+
+    Only ids of matched recipes are kept. Slicing fetches just the recipes
+    of the slice (e.g., a page) from the database; iterating over all of
+    them fetches FETCH_BATCH recipes at a time.
+
+    :param recipe_ids: a sorted sequence of recipe ids.
+    """
+
+    def __init__(self, recipe_ids):
+        self.recipe_ids = recipe_ids
+
+    def count(self):
+        return len(self.recipe_ids)
+
+    def __len__(self):
+        return self.count()
 
-    return recipes
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1 or None][0]
+
+        recipes = Recipe.objects.select_related('author').in_bulk(self.recipe_ids[key])
+        # Recipes could have been deleted meanwhile.
+        return [recipes[recipe_id] for recipe_id in self.recipe_ids[key] if recipe_id in recipes]
+
+    def __iter__(self):
+        for start in range(0, self.count(), FETCH_BATCH):
+            yield from self[start:start + FETCH_BATCH]
+
+
+class RankedRecipes:
+    """
+    Lazy sequence of recipes ordered by the number of missing ingredients
+    (ascending), views (descending) and id.
+
+    Candidates are ordered once, by numpy, when the first slice is taken;
+    further slices (e.g., the count and the page of a paginator) reuse the
+    order. Only the recipes of a slice are fetched from the database.
+
+    :param recipe_ids: a numpy array of candidate recipe ids.
+    :param missing: a numpy array of missing ingredient counts of candidates.
+    :param views: a numpy array of candidates' views.
+    """
+
+    def __init__(self, recipe_ids, missing, views):
+        self.recipe_ids = recipe_ids
+        self.missing = missing
+        self.views = views
+        self._order = None
+
+    def count(self):
+        return len(self.recipe_ids)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            if key < 0:
+                key += self.count()
+            return self[key:key + 1][0]
+
+        start, stop, _ = key.indices(self.count())
+        if start >= stop:
+            return []
+
+        if self._order is None:
+            # The last key is the primary one.
+            self._order = np.lexsort((self.recipe_ids, -self.views, self.missing))
+        rows = self._order[start:stop]
+        best = zip(self.missing[rows].tolist(), self.recipe_ids[rows].tolist())
+
+        recipes = Recipe.objects.select_related('author').in_bulk(self.recipe_ids[rows].tolist())
+        ranked = []
+        for missing, recipe_id in best:
+            if recipe_id in recipes:  # Could have been deleted meanwhile.
+                recipe = recipes[recipe_id]
+                recipe.missing = missing
+                ranked.append(recipe)
+
+        return ranked
+
+
+def _capitalize(ingredients):
+    """
+    Ensures set contents are capitalized, as DB expects capitalized names.
+    Should never need to capitalize ingredients, but just in case it happens.
+    """
 
+    return [ingredient if ingredient.istitle() else capwords(ingredient)
+            for ingredient in ingredients]
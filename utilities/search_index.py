@@ -0,0 +1,328 @@
+"""
+Process-local inverted index that answers ingredient-based recipe searches
+without asking the database to do the matching.
+
+The index maps every ingredient id to a posting list (a set of recipe ids
+that use the ingredient) and keeps the number of ingredients of every
+recipe. Superset searches intersect posting lists of the requested
+ingredients, which is cheap, as the shortest list bounds the work.
+
+Additionally, the index holds a sparse recipe x ingredient incidence matrix
+(one (row, column) pair per RecipeIngredient, i.e., coordinate format).
+Multiplying it by a fridge vector tells, for every recipe at once, how many
+of its ingredients are in the fridge. The rest (missing ingredients,
+coverage, subset searches) follows from that in O(nnz).
+
+The index is built lazily upon first use and rebuilt whenever its version
+token changes. The token is shared by every web and worker process (see
+utilities/shared_tokens.py) and is replaced by model signals, so that
+changes made by one process invalidate the index of every other one within
+SHARED_TOKEN_TTL seconds. In between, searches do not ask the database
+whether the index is up to date.
+
+Note: bulk operations (bulk_create, update) do not send signals. Code that
+uses them should call invalidate_index() itself. As a backstop, an index
+is rebuilt anyway once it is older than SEARCH_INDEX_MAX_AGE seconds.
+"""
+
+from collections import defaultdict
+from threading import Lock
+from time import monotonic
+
+import numpy as np
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ingredients.models import Ingredient
+from ingredients.units import DimensionCodes, to_base, sufficient
+from recipes.models import Recipe, RecipeIngredient
+from .shared_tokens import SharedToken
+
+VERSION_KEY = 'search-index-version'
+index_version = SharedToken(VERSION_KEY)
+
+
+class SearchIndex:
+    """
+    Immutable snapshot of recipe/ingredient relationships.
+
+    :param names: a dictionary of ingredient name -> ingredient id.
+    :param pairs: an iterable of (recipe id, ingredient id, quantity, unit
+                  abbreviation) tuples, one for each RecipeIngredient.
+    :param views: a dictionary of recipe id -> number of its views. Every
+                  recipe must be present, even without ingredients. Views
+                  do not invalidate the index; see refresh_views().
+    :param conversions: a dictionary of ingredient id -> (density, unit
+                        weight). See ingredients.units.
+    :param version: version token the index was built under (see
+                    get_index()). Results derived from the index are cached
+                    under it (see utilities/result_cache.py).
+    """
+
+    def __init__(self, names, pairs, views, conversions=None, version=None):
+        self.names = names
+        self.version = version
+        self.sizes = dict.fromkeys(views, 0)
+        postings = defaultdict(set)
+
+        # Incidence matrix. Rows are recipes, columns are ingredients.
+        self.recipe_ids = np.array(sorted(views), dtype=np.int64)
+        self.rows = {recipe_id: row for row, recipe_id in enumerate(self.recipe_ids.tolist())}
+        self.columns = {}
+        self.dimensions = DimensionCodes()
+        row_indices, column_indices, required, required_dimensions = [], [], [], []
+        for recipe_id, ingredient_id, quantity, unit in pairs:
+            if recipe_id not in self.rows:  # Recipe was created meanwhile.
+                continue
+            postings[ingredient_id].add(recipe_id)
+            self.sizes[recipe_id] += 1
+            column = self.columns.setdefault(ingredient_id, len(self.columns))
+            row_indices.append(self.rows[recipe_id])
+            column_indices.append(column)
+            dimension, base = to_base(quantity, unit)
+            required.append(base)
+            required_dimensions.append(self.dimensions.code(dimension))
+
+        self.postings = dict(postings)
+        self.matrix_rows = np.array(row_indices, dtype=np.int32)
+        self.matrix_columns = np.array(column_indices, dtype=np.int32)
+        self.row_sizes = np.array([self.sizes[r] for r in self.recipe_ids.tolist()], dtype=np.int32)
+        self.views = np.array([views[r] for r in self.recipe_ids.tolist()], dtype=np.int64)
+        self.views_loaded = monotonic()
+
+        # Quantities needed by every non-zero element of the matrix.
+        self.required = np.array(required, dtype=np.float64)
+        self.required_dimensions = np.array(required_dimensions, dtype=np.int32)
+        conversions = conversions or {}
+        densities, unit_weights = np.full((2, len(self.columns)), np.nan)
+        for ingredient_id, column in self.columns.items():
+            density, unit_weight = conversions.get(ingredient_id, (None, None))
+            densities[column] = density or np.nan
+            unit_weights[column] = unit_weight or np.nan
+        self.densities = densities[self.matrix_columns]
+        self.unit_weights = unit_weights[self.matrix_columns]
+
+    @classmethod
+    def build(cls, version=None):
+        """ Builds an index from the current state of the database. """
+
+        names, conversions = {}, {}
+        ingredients = Ingredient.objects.values_list('id', 'name', 'density', 'unit_weight')
+        for ingredient_id, name, density, unit_weight in ingredients.iterator():
+            names[name] = ingredient_id
+            if density or unit_weight:
+                conversions[ingredient_id] = (density, unit_weight)
+
+        views = dict(Recipe.objects.values_list('id', 'views').iterator())
+        pairs = (RecipeIngredient.objects
+                 .values_list('recipe_id', 'ingredient_id', 'quantity', 'unit__abbrev'))
+
+        return cls(names, pairs.iterator(), views, conversions, version)
+
+    def refresh_views(self):
+        """
+        Reads current views of the indexed recipes. Views are counted all
+        the time, hence they are refreshed on their own, without rebuilding
+        the index (see get_index()). Recipes deleted meanwhile get 0.
+        """
+
+        self.views_loaded = monotonic()
+        views = dict(Recipe.objects.values_list('id', 'views').iterator())
+        self.views = np.array([views.get(r, 0) for r in self.recipe_ids.tolist()],
+                              dtype=np.int64)
+
+    def ingredient_ids(self, names):
+        """
+        Translates ingredient names to their ids. Unknown names are skipped.
+
+        :param names: an iterable of ingredient names.
+        :return: a set of ingredient ids.
+        """
+
+        return {self.names[name] for name in names if name in self.names}
+
+    def superset(self, ingredient_ids):
+        """
+        :param ingredient_ids: a set of ingredient ids.
+        :return: a set of ids of recipes that have ALL given ingredients.
+        """
+
+        if not ingredient_ids:
+            return set()
+
+        lists = sorted((self.postings.get(i, frozenset()) for i in ingredient_ids), key=len)
+        matched = set(lists[0])
+        for posting in lists[1:]:
+            if not matched:
+                break
+            matched &= posting
+
+        return matched
+
+    def fridge_vector(self, ingredient_ids):
+        """
+        :param ingredient_ids: a set of ingredient ids (e.g., fridge contents).
+        :return: boolean vector with one element for every matrix column.
+        """
+
+        vector = np.zeros(len(self.columns), dtype=bool)
+        columns = [self.columns[i] for i in ingredient_ids if i in self.columns]
+        vector[columns] = True
+        return vector
+
+    def matches(self, ingredient_ids):
+        """
+        :param ingredient_ids: a set of ingredient ids.
+        :return: a vector that holds the number of given ingredients found in
+                 every recipe (rows are ordered as self.recipe_ids).
+        """
+
+        vector = self.fridge_vector(ingredient_ids)
+        # Product of the incidence matrix and the vector: count the non-zero
+        # elements whose column is set, grouping them by row.
+        hits = self.matrix_rows[vector[self.matrix_columns]]
+        return np.bincount(hits, minlength=len(self.recipe_ids))
+
+    def missing(self, ingredient_ids):
+        """
+        :param ingredient_ids: a set of ingredient ids.
+        :return: a vector that holds the number of ingredients every recipe
+                 lacks (rows are ordered as self.recipe_ids).
+        """
+
+        return self.row_sizes - self.matches(ingredient_ids)
+
+    def coverage(self, ingredient_ids):
+        """
+        :param ingredient_ids: a set of ingredient ids.
+        :return: a tuple of vectors: number of missing ingredients and the
+                 share of ingredients that are available (1.0 for recipes
+                 without ingredients).
+        """
+
+        matches = self.matches(ingredient_ids)
+        ratio = np.ones(len(self.recipe_ids))
+        np.divide(matches, self.row_sizes, out=ratio, where=self.row_sizes > 0)
+        return self.row_sizes - matches, ratio
+
+    def shortages(self, stock):
+        """
+        Quantity-aware version of missing(). An ingredient counts as missing
+        if it is not in stock or if there is not enough of it.
+
+        Available quantities are converted to the units recipes need in one
+        vectorized pass over the non-zero elements of the matrix.
+
+        :param stock: a dictionary of ingredient id -> (quantity, unit
+                      abbreviation), e.g., contents of a fridge.
+        :return: a vector that holds the number of ingredients every recipe
+                 lacks (rows are ordered as self.recipe_ids).
+        """
+
+        available = np.zeros(len(self.columns))
+        dimensions = np.full(len(self.columns), DimensionCodes.UNKNOWN, dtype=np.int32)
+        for ingredient_id, (quantity, unit) in stock.items():
+            column = self.columns.get(ingredient_id)
+            if column is not None:
+                dimension, available[column] = to_base(quantity, unit)
+                dimensions[column] = self.dimensions.code(dimension, add=False)
+
+        enough = sufficient(available[self.matrix_columns], dimensions[self.matrix_columns],
+                            self.required, self.required_dimensions,
+                            self.densities, self.unit_weights)
+
+        return np.bincount(self.matrix_rows[~enough], minlength=len(self.recipe_ids))
+
+    def subset(self, ingredient_ids, missing=0):
+        """
+        :param ingredient_ids: a set of ingredient ids.
+        :param missing: how many ingredients a recipe is allowed to lack.
+        :return: a set of ids of recipes that have NO ingredients other than
+                 the given ones (apart from the allowed number of missing).
+        """
+
+        allowed = self.missing(ingredient_ids) <= missing
+        return set(self.recipe_ids[allowed].tolist())
+
+    def candidates(self, ingredient_ids, missing=0, recipe_ids=None, stock=None):
+        """
+        Selects recipes that lack at most a given number of ingredients.
+
+        :param ingredient_ids: a set of ingredient ids.
+        :param missing: how many ingredients a recipe is allowed to lack.
+        :param recipe_ids: if given, only these recipes are considered.
+        :param stock: if given, quantities are taken into account (see
+                      shortages()) and ingredient_ids are ignored.
+        :return: a tuple of vectors: recipe ids, number of missing
+                 ingredients and views of every selected recipe.
+        """
+
+        if stock is not None:
+            lacking = self.shortages(stock)
+        else:
+            lacking = self.missing(ingredient_ids)
+        allowed = lacking <= missing
+        if recipe_ids is not None:
+            allowed &= np.in1d(self.recipe_ids, list(recipe_ids))
+
+        return self.recipe_ids[allowed], lacking[allowed], self.views[allowed]
+
+
+_lock = Lock()
+_index = None
+_version = None
+_built = None
+
+
+def _is_stale(version):
+    return (_index is None or version != _version
+            or monotonic() - _built > settings.SEARCH_INDEX_MAX_AGE)
+
+
+def get_index():
+    """
+    Returns an up-to-date index, rebuilding it if it has been invalidated or
+    is older than SEARCH_INDEX_MAX_AGE. Views of recipes are read again
+    every SEARCH_INDEX_VIEWS_TTL seconds.
+
+    Note: version is read BEFORE building, so that any change that happens
+    while the index is built results in yet another rebuild later.
+    """
+
+    global _index, _version, _built
+
+    version = index_version.get()
+    if _is_stale(version):
+        with _lock:
+            if _is_stale(version):
+                _built = monotonic()
+                _index = SearchIndex.build(version)
+                _version = version
+
+    index = _index
+    if monotonic() - index.views_loaded > settings.SEARCH_INDEX_VIEWS_TTL:
+        index.refresh_views()
+    return index
+
+
+def invalidate_index():
+    """ Makes every process that uses the index rebuild it upon next use. """
+
+    index_version.replace()
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid='search_index_recipe_saved')
+def _recipe_saved(sender, created, **kwargs):
+    # Updates of existing recipes (e.g., views) do not change ingredients.
+    if created:
+        invalidate_index()
+
+
+@receiver(post_save, sender=RecipeIngredient, dispatch_uid='search_index_ri_saved')
+@receiver(post_save, sender=Ingredient, dispatch_uid='search_index_ingredient_saved')
+@receiver(post_delete, sender=Recipe, dispatch_uid='search_index_recipe_deleted')
+@receiver(post_delete, sender=RecipeIngredient, dispatch_uid='search_index_ri_deleted')
+@receiver(post_delete, sender=Ingredient, dispatch_uid='search_index_ingredient_deleted')
+def _relationships_changed(sender, **kwargs):
+    invalidate_index()
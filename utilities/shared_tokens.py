@@ -0,0 +1,59 @@
+"""
+Tokens that tell every process when data it keeps in memory is stale.
+
+A token is a random string in the default cache, i.e. the database (see
+CACHES in settings), so every web and worker process sees the same one.
+Replacing it invalidates whatever was derived under the previous value,
+e.g. the search index or cached pages.
+
+Reading the token costs a query, which is what in-memory data is there to
+avoid. Hence every process reads it at most once every SHARED_TOKEN_TTL
+seconds and uses the value it read last in between. Replacements made by
+a process are seen by that process at once and by the others within
+SHARED_TOKEN_TTL seconds.
+"""
+
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class SharedToken:
+    """
+    :param key: cache key of the token.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._lock = Lock()
+        self._value = None
+        self._read = None
+
+    def get(self):
+        """ :return: current value; a new one is made if there is none. """
+
+        with self._lock:
+            if self._read is not None and monotonic() - self._read < settings.SHARED_TOKEN_TTL:
+                return self._value
+
+        value = cache.get(self.key)
+        if value is None:
+            cache.add(self.key, uuid4().hex, None)
+            value = cache.get(self.key)
+        self._remember(value)
+        return value
+
+    def replace(self):
+        """ Invalidates everything that was derived under the current value. """
+
+        value = uuid4().hex
+        cache.set(self.key, value, None)
+        self._remember(value)
+
+    def _remember(self, value):
+        with self._lock:
+            self._value = value
+            self._read = monotonic()
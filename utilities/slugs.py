@@ -0,0 +1,166 @@
+"""
+Allocation of unique slugs.
+
+The first object with a given base slug gets the base itself ('soup'),
+the following ones get the suffix after the largest one taken ('soup-2',
+'soup-3'). The base is handed out whenever it is free, even if numbered
+variants of it are taken (e.g., by objects with other titles).
+Which suffixes are taken is found out with a single query per base, which
+fetches only the base and its numbered variants, instead of probing
+candidates one by one.
+
+Two processes may still pick the same slug at the same time. Slug columns
+are unique, so the second INSERT fails; save_with_unique_slug() then
+allocates again and retries.
+
+For imports, SlugAllocator hands out any number of slugs after loading the
+taken ones with a query per chunk of base slugs.
+"""
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils.text import slugify
+
+# Number of base slugs looked up with one query.
+CHUNK_SIZE = 100
+
+# Room left for a suffix, so that a slug with it still fits into the field.
+SUFFIX_LENGTH = 7
+
+
+def base_slug(model, text, field='slug'):
+    """
+    :return: slugified text that leaves room for a suffix. Texts without a
+             single sluggable character fall back to the model name.
+    """
+
+    max_length = model._meta.get_field(field).max_length
+    slug = slugify(text)[:max_length - SUFFIX_LENGTH].strip('-')
+    return slug or model._meta.model_name
+
+
+class SlugAllocator:
+    """
+    Hands out unique slugs for objects of a model, remembering what it has
+    handed out already.
+
+    :param model: model class that has a unique slug field.
+    :param field: name of the slug field.
+    """
+
+    def __init__(self, model, field='slug'):
+        self.model = model
+        self.field = field
+        self.suffixes = {}  # base slug -> set of taken suffixes (1 is the base)
+        self.allocated = set()
+
+    def load(self, bases):
+        """ Finds out which slugs derived from given bases are taken. """
+
+        bases = [base for base in set(bases) if base not in self.suffixes]
+        if not bases:
+            return
+        for base in bases:
+            self.suffixes[base] = set()
+
+        for start in range(0, len(bases), CHUNK_SIZE):
+            chunk = bases[start:start + CHUNK_SIZE]
+            condition = Q(**{f'{self.field}__in': chunk})
+            for base in chunk:
+                # Prefix lets an index narrow rows down; of those, only
+                # numbered variants are fetched ('soup-2', not 'soup-kitchen').
+                condition |= Q(**{f'{self.field}__startswith': f'{base}-',
+                                  f'{self.field}__regex': rf'^{re.escape(base)}-[0-9]+$'})
+            slugs = (self.model._default_manager.filter(condition)
+                     .values_list(self.field, flat=True))
+            for slug in slugs.iterator():
+                self._take(slug)
+
+        # Slugs handed out earlier may not be in the database yet.
+        for slug in self.allocated:
+            self._take(slug)
+
+    def _take(self, slug):
+        """
+        Marks a slug as taken. 'soup-2' is both the base of its own and the
+        second suffix of 'soup'.
+        """
+
+        if slug in self.suffixes:
+            self.suffixes[slug].add(1)
+        match = re.match(r'^(.+)-(\d+)$', slug)
+        if match and match.group(1) in self.suffixes:
+            self.suffixes[match.group(1)].add(int(match.group(2)))
+
+    def allocate(self, text):
+        """
+        :param text: text the slug should be made of (e.g., a title).
+        :return: a slug that is not taken.
+        """
+
+        base = base_slug(self.model, text, self.field)
+        self.load([base])
+        taken = self.suffixes[base]
+        suffix = max(taken) + 1 if 1 in taken else 1
+        slug = base if suffix == 1 else f'{base}-{suffix}'
+        self.allocated.add(slug)
+        self._take(slug)
+        return slug
+
+    def allocate_many(self, texts):
+        """ Bulk version of allocate(): taken slugs are loaded up front. """
+
+        texts = list(texts)
+        self.load(base_slug(self.model, text, self.field) for text in texts)
+        return [self.allocate(text) for text in texts]
+
+
+def unique_slug(model, text, field='slug'):
+    """ :return: a free slug for a new object of a model. """
+
+    return SlugAllocator(model, field).allocate(text)
+
+
+def save_with_unique_slug(instance, text, save, attempts=5, field='slug'):
+    """
+    Assigns a free slug to a new instance and saves it. If a concurrent
+    insert took the slug meanwhile, allocates another one and tries again.
+
+    :param instance: model instance that is about to be created.
+    :param text: text the slug should be made of.
+    :param save: callable that saves the instance (e.g., super().save).
+    :param attempts: how many times saving is attempted.
+    :return: whatever save returns.
+    """
+
+    model = type(instance)
+    for attempt in range(attempts):
+        slug = unique_slug(model, text, field)
+        setattr(instance, field, slug)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            lost_race = model._default_manager.filter(**{field: slug}).exists()
+            if not lost_race or attempt == attempts - 1:
+                raise
+
+
+def deduplicate_slugs(model, field='slug'):
+    """
+    Gives a new slug to every object whose slug is used by an object that
+    was created earlier. Needed before a slug column can be made unique.
+
+    Note: migrations that did so keep copies of their own, which do not
+    change along with this module.
+    """
+
+    manager = model._default_manager
+    duplicates = (manager.values(field).annotate(n=Count('pk')).filter(n__gt=1)
+                  .values_list(field, flat=True))
+    allocator = SlugAllocator(model, field)
+    for slug in list(duplicates):
+        for pk in manager.filter(**{field: slug}).order_by('pk').values_list('pk', flat=True)[1:]:
+            manager.filter(pk=pk).update(**{field: allocator.allocate(slug)})
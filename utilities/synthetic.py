@@ -0,0 +1,392 @@
+"""
+Generation of synthetic datasets for load testing and benchmarks.
+
+Generated data is shaped like real data rather than uniformly random:
+
+    - ingredient popularity follows a Zipf distribution: a few ingredients
+      (salt, onions) are in most recipes, most are in a handful;
+    - recipes have a few to twenty ingredients, eight on average;
+    - fridges hold about a dozen ingredients, also Zipf-distributed, and a
+      few saved recipes.
+
+Everything is drawn from a random generator that is seeded, hence the same
+parameters produce the same dataset (apart from primary keys). Rows are
+inserted with bulk_create in chunks, so that memory use does not depend on
+the size of the dataset.
+
+Generated users, ingredients and recipes are marked with SyntheticObject
+rows, which is how a previous dataset is found and deleted before a new one
+is generated. Fridges and contents belong to marked objects and go away with
+them. Names only carry a prefix for readability: slugs that real objects
+took already are skipped, and generated usernames contain a character that
+usernames of real users cannot contain.
+
+Note: bulk_create does not send signals, hence fridges are created
+explicitly and caches are invalidated at the end.
+"""
+
+from datetime import datetime, timedelta
+from time import monotonic
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from fridge.models import Fridge, FridgeIngredient
+from ingredients.models import Ingredient, Unit
+from recipes.models import Rating, Recipe, RecipeIngredient
+from .models import SyntheticObject
+from .page_cache import purge_pages
+from .result_cache import search_cache
+from .search_index import invalidate_index
+from .slugs import SlugAllocator
+
+# Usernames, ingredient names and slugs of generated objects start with it.
+PREFIX = 'synthetic'
+# Separates the prefix of usernames; username validation does not allow it.
+USERNAME_SEPARATOR = ':'
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Number of values in an IN clause; SQLite allows 999 parameters per query.
+LOOKUP_SIZE = 500
+
+# Exponent of the Zipf distribution of ingredient popularity.
+ZIPF_EXPONENT = 1.1
+
+# (minimum, mean on top of minimum, maximum) of Poisson distributed sizes.
+RECIPE_SIZE = (3, 5, 20)
+FRIDGE_SIZE = (2, 10, 40)
+SAVED_RECIPES = (0, 3, 30)
+
+# Recipes are dated within this many days before START.
+START = datetime(2017, 1, 1, tzinfo=timezone.utc)
+DAYS = 3 * 365
+
+# Units ingredients are measured in: (name, abbreviation, typical quantity).
+UNITS = [('gram', 'g', 200), ('millilitre', 'mL', 250), ('unit', 'unit', 2)]
+
+CUISINES = [code for code, _ in Recipe.CUISINES]
+TYPES = [code for code, _ in Ingredient.INGREDIENTS]
+
+
+def zipf_weights(n, exponent=ZIPF_EXPONENT):
+    """ :return: probabilities of ranks 1..n under a Zipf distribution. """
+
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def sizes(rng, n, bounds):
+    """ :return: n Poisson distributed sizes within given bounds. """
+
+    minimum, mean, maximum = bounds
+    return np.minimum(minimum + rng.poisson(mean, n), maximum)
+
+
+def sample(rng, cdf, size, population):
+    """
+    Draws distinct items according to a cumulative distribution.
+
+    :return: a list of at most size (and population) distinct indices.
+    """
+
+    size = min(size, population)
+    chosen = []
+    while len(chosen) < size:
+        draws = np.searchsorted(cdf, rng.random_sample(2 * size), side='right')
+        for index in draws.tolist():
+            if index not in chosen and index < population:
+                chosen.append(index)
+                if len(chosen) == size:
+                    break
+    return chosen
+
+
+def insert_rows(model, fields, rows):
+    """
+    Inserts rows with multi-row INSERT queries.
+
+    Note: unlike bulk_create, no model instances are created. For millions
+    of rows of link tables that is several times faster.
+
+    :param fields: names of the fields values in rows are for.
+    :param rows: a list of tuples of values.
+    """
+
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in fields]
+    columns = ', '.join(quote(field.column) for field in fields)
+    row = '({})'.format(', '.join(['%s'] * len(fields)))
+    size = max(connection.ops.bulk_batch_size(fields, rows), 1)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            cursor.execute(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+                           f'VALUES {", ".join([row] * len(batch))}',
+                           [value for values in batch for value in values])
+
+
+def synthetic(model):
+    """ :return: queryset of generated objects of a model. """
+
+    marked = SyntheticObject.objects.filter(content_type=ContentType.objects.get_for_model(model))
+    return model._default_manager.filter(pk__in=marked.values('object_id'))
+
+
+def mark(model, ids):
+    """ Marks objects of a model as generated. """
+
+    content_type = ContentType.objects.get_for_model(model)
+    insert_rows(SyntheticObject, ['content_type', 'object_id'],
+                [(content_type.pk, pk) for pk in ids])
+
+
+def free_slugs(model, slugs):
+    """
+    :param slugs: slugs wanted for new objects of a model.
+    :return: the same slugs, except that those that are taken (e.g., by real
+             objects) are replaced with free ones.
+    """
+
+    taken = set()
+    for start in range(0, len(slugs), LOOKUP_SIZE):
+        taken.update(model._default_manager.filter(slug__in=slugs[start:start + LOOKUP_SIZE])
+                     .values_list('slug', flat=True))
+    if not taken:
+        return slugs
+    allocator = SlugAllocator(model)
+    allocator.allocated.update(set(slugs) - taken)
+    return [allocator.allocate(slug) if slug in taken else slug for slug in slugs]
+
+
+class DatasetGenerator:
+    """
+    :param users: number of users (each gets a fridge).
+    :param ingredients: number of ingredients.
+    :param recipes: number of recipes.
+    :param seed: seed of the random generator.
+    :param chunk_size: number of rows generated at once. Queries that insert
+                       them are as large as the database allows.
+    :param progress: optional callable that is called with (stage, done,
+                     total) after every chunk.
+    """
+
+    def __init__(self, users, ingredients, recipes, seed=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                 progress=None):
+        if users < 1 or ingredients < 1:
+            raise ValueError('At least one user and one ingredient are needed.')
+        self.users = users
+        self.ingredients = ingredients
+        self.recipes = recipes
+        self.rng = np.random.RandomState(seed)
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.cdf = np.cumsum(zipf_weights(ingredients))
+        self.counts = {}  # model name -> number of rows inserted
+        self.timings = {}  # stage -> seconds
+
+    def run(self):
+        """
+        Deletes the previous synthetic dataset and generates a new one.
+
+        :return: {model name: number of rows inserted}.
+        """
+
+        with transaction.atomic():
+            self._timed('clear', clear_dataset)
+            user_ids, fridge_ids = self._timed('users', self.create_users)
+            units = self._timed('units', self.create_units)
+            ingredient_ids = self._timed('ingredients', self.create_ingredients)
+            recipe_ids = self._timed('recipes', self.create_recipes, user_ids, ingredient_ids, units)
+            self._timed('fridges', self.fill_fridges, fridge_ids, ingredient_ids, units, recipe_ids)
+
+        invalidate_index()
+        search_cache.clear()
+        purge_pages()
+        return self.counts
+
+    def _timed(self, stage, function, *args):
+        start = monotonic()
+        result = function(*args)
+        self.timings[stage] = monotonic() - start
+        return result
+
+    def _count(self, model, n):
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + n
+
+    def _report(self, stage, done, total):
+        if self.progress:
+            self.progress(stage, done, total)
+
+    def _chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield start, min(start + self.chunk_size, total)
+
+    def create_users(self):
+        """ :return: ids of users and of their fridges. """
+
+        # Hashing is slow on purpose, so every user gets the same hash.
+        password = make_password(PREFIX)
+        prefix = f'{PREFIX}{USERNAME_SEPARATOR}'
+        for start, end in self._chunks(self.users):
+            User.objects.bulk_create(User(username=f'{prefix}{i}', password=password)
+                                     for i in range(start, end))
+            self._report('users', end, self.users)
+        self._count(User, self.users)
+
+        user_ids = list(User.objects.filter(username__startswith=prefix)
+                        .order_by('id').values_list('id', flat=True))
+        mark(User, user_ids)
+        for start, end in self._chunks(len(user_ids)):
+            Fridge.objects.bulk_create(Fridge(user_id=pk) for pk in user_ids[start:end])
+        self._count(Fridge, len(user_ids))
+        fridge_ids = list(Fridge.objects.filter(user__in=user_ids)
+                          .order_by('user_id').values_list('id', flat=True))
+        return user_ids, fridge_ids
+
+    @staticmethod
+    def create_units():
+        """ :return: list of (unit id, typical quantity). """
+
+        units = []
+        for name, abbrev, quantity in UNITS:
+            unit = Unit.objects.filter(abbrev=abbrev).first()
+            if unit is None:
+                unit = Unit.objects.create(name=name, abbrev=abbrev)
+            units.append((unit.pk, quantity))
+        return units
+
+    def create_ingredients(self):
+        """ :return: ingredient ids, the most popular first. """
+
+        slugs = free_slugs(Ingredient, [f'{PREFIX}-{i}' for i in range(self.ingredients)])
+        last = Ingredient.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=f'{PREFIX.capitalize()} {TYPES[i % len(TYPES)]} {i}',
+                        type=TYPES[i % len(TYPES)], slug=slug)
+             for i, slug in enumerate(slugs)))
+        self._count(Ingredient, self.ingredients)
+        self._report('ingredients', self.ingredients, self.ingredients)
+
+        ids = dict(Ingredient.objects.filter(id__gt=last).values_list('slug', 'id'))
+        ingredient_ids = [ids[slug] for slug in slugs]
+        mark(Ingredient, ingredient_ids)
+        return ingredient_ids
+
+    def _contents(self, owner_id, size, ingredient_ids, units):
+        """
+        :return: rows (owner id, ingredient id, unit id, quantity) of a
+                 recipe or a fridge.
+        """
+
+        ranks = sample(self.rng, self.cdf, size, self.ingredients)
+        factors = self.rng.uniform(0.25, 2.5, len(ranks)).tolist()
+        rows = []
+        for rank, factor in zip(ranks, factors):
+            unit, typical = units[rank % len(units)]
+            rows.append((owner_id, ingredient_ids[rank], unit, round(factor * typical, 2)))
+        return rows
+
+    def create_recipes(self, user_ids, ingredient_ids, units):
+        """ :return: ids of created recipes. """
+
+        recipe_ids = []
+        for start, end in self._chunks(self.recipes):
+            n = end - start
+            authors = self.rng.randint(0, len(user_ids), n)
+            cuisines = self.rng.randint(0, len(CUISINES), n)
+            ages = self.rng.uniform(0, DAYS, n)
+            views = (self.rng.pareto(1.5, n) * 10).astype(int)
+            recipe_sizes = sizes(self.rng, n, RECIPE_SIZE)
+
+            # Ids are not returned by bulk_create on every database, hence
+            # they are looked up by slugs, which are known in advance.
+            slugs = free_slugs(Recipe, [f'{PREFIX}-{i}' for i in range(start, end)])
+            last = Recipe.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            Recipe.objects.bulk_create(
+                (Recipe(author_id=user_ids[authors[j]], title=f'Synthetic recipe {start + j}',
+                        description='Generated.', steps='Mix.\nCook.', cuisine=CUISINES[cuisines[j]],
+                        date=START - timedelta(days=float(ages[j])), views=int(views[j]),
+                        slug=slugs[j])
+                 for j in range(n)))
+            ids = dict(Recipe.objects.filter(id__gt=last).values_list('slug', 'id'))
+            chunk_ids = [ids[slug] for slug in slugs]
+            mark(Recipe, chunk_ids)
+            recipe_ids += chunk_ids
+
+            rows = []
+            for recipe_id, size in zip(chunk_ids, recipe_sizes.tolist()):
+                rows += self._contents(recipe_id, size, ingredient_ids, units)
+            insert_rows(RecipeIngredient, ['recipe', 'ingredient', 'unit', 'quantity'], rows)
+            self._count(Recipe, n)
+            self._count(RecipeIngredient, len(rows))
+            self._report('recipes', end, self.recipes)
+        return recipe_ids
+
+    def fill_fridges(self, fridge_ids, ingredient_ids, units, recipe_ids):
+        """ Puts ingredients and saved recipes into fridges. """
+
+        SavedRecipe = Fridge.recipes.through
+        for start, end in self._chunks(len(fridge_ids)):
+            chunk = fridge_ids[start:end]
+            fridge_sizes = sizes(self.rng, len(chunk), FRIDGE_SIZE).tolist()
+            saved_sizes = sizes(self.rng, len(chunk), SAVED_RECIPES).tolist()
+            items, saved = [], []
+            for fridge_id, size, n_saved in zip(chunk, fridge_sizes, saved_sizes):
+                items += self._contents(fridge_id, size, ingredient_ids, units)
+                if recipe_ids:
+                    picks = sorted(set(self.rng.randint(0, len(recipe_ids), n_saved).tolist()))
+                    saved += [(fridge_id, recipe_ids[i]) for i in picks]
+            insert_rows(FridgeIngredient, ['fridge', 'ingredient', 'unit', 'quantity'], items)
+            insert_rows(SavedRecipe, ['fridge', 'recipe'], saved)
+            self._count(FridgeIngredient, len(items))
+            self._count(SavedRecipe, len(saved))
+            self._report('fridges', end, len(fridge_ids))
+
+
+def clear_dataset():
+    """
+    Deletes a previously generated dataset, i.e., marked objects and
+    whatever belongs to them.
+
+    Note: rows are deleted with plain DELETE queries. Model.delete() would
+    load every row and send signals for it, which takes ages for millions
+    of rows. Hence anything that may refer to generated objects (e.g.,
+    ratings of real users) has to be deleted explicitly here.
+
+    :return: number of deleted rows.
+    """
+
+    users = synthetic(User)
+    ingredients = synthetic(Ingredient)
+    recipes = synthetic(Recipe)
+    fridges = Fridge.objects.filter(user__in=users)
+    querysets = [
+        RecipeIngredient.objects.filter(Q(recipe__in=recipes) | Q(ingredient__in=ingredients)),
+        FridgeIngredient.objects.filter(Q(fridge__in=fridges) | Q(ingredient__in=ingredients)),
+        Fridge.recipes.through.objects.filter(Q(fridge__in=fridges) | Q(recipe__in=recipes)),
+        Rating.objects.filter(Q(user__in=users) | Q(recipe__in=recipes)),
+        recipes,
+        fridges,
+        ingredients,
+    ]
+    deleted = sum(queryset._raw_delete(queryset.db) for queryset in querysets)
+    deleted += users.delete()[0]
+    # Markers last: the querysets above are selected through them.
+    markers = SyntheticObject.objects.all()
+    return deleted + markers._raw_delete(markers.db)
+
+
+def generate_dataset(users, ingredients, recipes, seed=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                     progress=None):
+    """ Shortcut for DatasetGenerator(...).run(). """
+
+    return DatasetGenerator(users, ingredients, recipes, seed, chunk_size, progress).run()
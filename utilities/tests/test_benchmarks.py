@@ -0,0 +1,106 @@
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from jobs.models import Job
+from recipes.counters import view_counter
+from recipes.models import Recipe
+from utilities.benchmarks import CASES, VERSION, compare, measure, run_benchmarks
+
+
+def results(**case):
+    measurements = {'median_ms': 10.0, 'p95_ms': 12.0, 'queries': 3, 'peak_kb': 100.0}
+    measurements.update(case)
+    return {'version': VERSION, 'results': {'1000': {'recipes': measurements}}}
+
+
+class CompareTests(TestCase):
+    def test_same_results(self):
+        self.assertEqual(compare(results(), results()), [])
+
+    def test_slower(self):
+        regressions = compare(results(median_ms=20.0), results(), threshold=0.5)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('median_ms', regressions[0])
+
+    def test_slower_within_threshold(self):
+        self.assertEqual(compare(results(median_ms=14.0), results(), threshold=0.5), [])
+
+    def test_tiny_latency_changes_are_noise(self):
+        self.assertEqual(compare(results(median_ms=0.9), results(median_ms=0.3)), [])
+
+    def test_more_queries(self):
+        regressions = compare(results(queries=4), results())
+
+        self.assertIn('4 queries, was 3', regressions[0])
+
+    def test_more_memory(self):
+        self.assertTrue(compare(results(peak_kb=200.0), results()))
+
+    def test_missing_cases_and_versions_ignored(self):
+        baseline = results()
+        baseline['results'] = {'10': baseline['results']['1000']}
+
+        self.assertEqual(compare(results(queries=10), baseline), [])
+        self.assertEqual(compare(results(queries=10), dict(results(), version=0)), [])
+
+
+class MeasureTests(TestCase):
+    def test_measurements(self):
+        User.objects.create(username='test')
+
+        result = measure(lambda: list(User.objects.all()), repeat=3)
+
+        self.assertEqual(result['queries'], 1)
+        self.assertLessEqual(result['median_ms'], result['p95_ms'])
+        self.assertGreater(result['peak_kb'], 0)
+
+
+class RunBenchmarksTests(TestCase):
+    def test_all_cases_on_small_dataset(self):
+        output = run_benchmarks([50], repeat=1)
+
+        self.assertEqual(set(output['results']['50']), set(CASES))
+        self.assertEqual(Recipe.objects.count(), 50)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_views_not_counted(self):
+        # Every view would be flushed, i.e., enqueued, right away.
+        with mock.patch.object(view_counter, 'threshold', 1):
+            run_benchmarks([30], cases=['recipe_detail'], repeat=1)
+
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(view_counter.buffer)
+
+    def test_command(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('benchmark', sizes=[30], cases=['recipes'], repeat=1, output=path,
+                         yes=True, stdout=StringIO())
+            with open(path) as f:
+                saved = json.load(f)
+            # Pretend the view used to make no queries.
+            saved['results']['30']['recipes']['queries'] = -1
+            with open(path, 'w') as f:
+                json.dump(saved, f)
+
+            with self.assertRaises(CommandError):
+                call_command('benchmark', sizes=[30], cases=['recipes'], repeat=1, baseline=path,
+                             yes=True, stdout=StringIO())
+
+    def test_replacing_dataset_needs_confirmation(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', sizes=[30], cases=['recipes'], repeat=1, stdout=StringIO())
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_unknown_case(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark', cases=['nope'], stdout=StringIO())
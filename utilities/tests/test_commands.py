@@ -0,0 +1,55 @@
+import os
+import shutil
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ingredients.models import Unit
+from recipes.models import Recipe
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+
+class ImportRecipesCommandTests(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.folder = os.path.join(directory.name, 'data')
+        shutil.copytree(DATA, self.folder, ignore=shutil.ignore_patterns('manifest.json'))
+
+    def call(self, *args, **options):
+        out = StringIO()
+        call_command('import_recipes', self.folder, *args, stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_everything_imported(self):
+        output = self.call()
+
+        recipes = len(os.listdir(os.path.join(self.folder, 'recipes')))
+        self.assertEqual(Recipe.objects.count(), recipes)
+        self.assertTrue(Unit.objects.exists())
+        self.assertIn('rows/s', output)
+        self.assertIn('Import is done.', output)
+
+    def test_dry_run_saves_nothing(self):
+        output = self.call('--dry-run', '--batch-size', '2')
+
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Unit.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'manifest.json')))
+        self.assertIn('Dry run', output)
+
+    def test_progress_reported(self):
+        output = self.call()
+
+        self.assertIn('files/s', output)
+
+    def test_missing_folder(self):
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', os.path.join(self.folder, 'nope'))
+
+    def test_workers_have_to_be_positive(self):
+        with self.assertRaises(CommandError):
+            self.call('--workers', '0')
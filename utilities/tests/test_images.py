@@ -0,0 +1,123 @@
+from base64 import b64decode
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from utilities.images import (
+    CARD_SIZE,
+    card,
+    create_variants,
+    decoded_size,
+    detail,
+    downscale,
+    is_heavy,
+    placeholder,
+    process_upload,
+    variant_format,
+)
+
+
+def upload(size, mode='RGB', color='red', image_format='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, image_format)
+    return SimpleUploadedFile(f'soup.{image_format.lower()}', buffer.getvalue())
+
+
+class VariantTests(TestCase):
+    def test_card_cropped_to_size(self):
+        self.assertEqual(card(Image.new('RGB', (1000, 300))).size, CARD_SIZE)
+        self.assertEqual(card(Image.new('RGB', (100, 100))).size, CARD_SIZE)
+
+    def test_detail_keeps_aspect_ratio(self):
+        self.assertEqual(detail(Image.new('RGB', (1600, 600))).size, (800, 300))
+
+    def test_detail_not_upscaled(self):
+        self.assertEqual(detail(Image.new('RGB', (200, 100))).size, (200, 100))
+
+
+@override_settings(MAX_WIDTH=800, MAX_HEIGHT=600, IMAGE_INLINE_PIXELS=1000000)
+class DownscaleTests(TestCase):
+    def test_jpeg_decoded_in_draft_mode(self):
+        image = upload((4000, 3000), image_format='JPEG')
+
+        self.assertEqual(decoded_size(image), (1000, 750))
+        self.assertFalse(is_heavy(image))
+
+    def test_png_decoded_in_full(self):
+        image = upload((2000, 1500))
+
+        self.assertEqual(decoded_size(image), (2000, 1500))
+        self.assertTrue(is_heavy(image))
+
+    def test_downscale_keeps_format(self):
+        scaled = downscale(upload((4000, 3000), image_format='JPEG'))
+
+        self.assertEqual(scaled.name, 'soup.jpg')
+        with Image.open(scaled) as image:
+            self.assertEqual(image.size, (800, 600))
+            self.assertEqual(image.format, 'JPEG')
+
+    def test_downscale_other_formats_to_png(self):
+        scaled = downscale(upload((1600, 600), image_format='BMP'))
+
+        self.assertEqual(scaled.name, 'soup.png')
+        with Image.open(scaled) as image:
+            self.assertEqual(image.size, (800, 300))
+
+    def test_small_upload_kept(self):
+        image = upload((800, 600))
+
+        processed, fields = process_upload(image)
+
+        self.assertIs(processed, image)
+        self.assertEqual((fields['image_width'], fields['image_height']), (800, 600))
+
+
+class CreateVariantsTests(TestCase):
+    def test_variants(self):
+        variants = create_variants(upload((1200, 900)))
+
+        _, extension = variant_format()
+        self.assertEqual(variants['image_card'].name, f'soup-card.{extension}')
+        self.assertEqual(variants['image_detail'].name, f'soup-detail.{extension}')
+        with Image.open(variants['image_detail']) as image:
+            self.assertEqual(image.size, (800, 600))
+            self.assertEqual(image.format, variant_format()[0])
+        self.assertEqual((variants['image_width'], variants['image_height']), (800, 600))
+
+    def test_placeholder(self):
+        variants = create_variants(upload((1200, 900)))
+
+        self.assertTrue(variants['image_placeholder'].startswith('data:image/'))
+        self.assertLess(len(variants['image_placeholder']), 500)
+
+    def test_upload_rewound(self):
+        image = upload((100, 100))
+
+        create_variants(image)
+
+        self.assertEqual(image.tell(), 0)
+
+    def test_transparency_flattened(self):
+        variants = create_variants(upload((100, 100), 'RGBA', (0, 0, 0, 0)))
+
+        with Image.open(variants['image_card']) as image:
+            self.assertEqual(image.convert('RGB').getpixel((10, 10)), (255, 255, 255))
+
+    def test_smaller_than_original(self):
+        image = upload((2000, 1500), image_format='BMP')
+
+        variants = create_variants(image)
+
+        self.assertLess(variants['image_card'].size + variants['image_detail'].size, image.size)
+
+
+class PlaceholderTests(TestCase):
+    def test_tiny_copy(self):
+        uri = placeholder(Image.new('RGB', (800, 400), 'blue'))
+        _, data = uri.split(',', 1)
+
+        with Image.open(BytesIO(b64decode(data))) as image:
+            self.assertEqual(image.size, (16, 8))
@@ -0,0 +1,248 @@
+import os
+from unittest import mock
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ingredients.models import Ingredient, Unit
+from recipes.models import Recipe, RecipeIngredient as RI
+from utilities import importer
+from utilities.importer import RecipeImporter, check_file, parse_values
+from utilities.manifest import Manifest
+from utilities.search_index import get_index
+
+RECIPE = """
+author: "{author}"
+title: "{title}"
+description: "Test"
+cuisine: "ot"
+ingredients:
+  olive oil: "1 tbsp"
+  onion: "2 unit"
+steps:
+  1: "First"
+  2: "Second"
+picture: "recipes/small-pot.jpeg"
+"""
+
+
+class ImporterTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        Unit.objects.create(name='tablespoon', abbrev='tbsp')
+        Ingredient.objects.create(name='Olive Oil')
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def recipe_file(self, title, author='test'):
+        return self.write(f'{title}.yml', RECIPE.format(title=title, author=author))
+
+
+class ParseValuesTests(TestCase):
+    def test_bad_ingredient_line(self):
+        values = {'author': 'a', 'title': 't', 'description': 'd', 'cuisine': 'ot',
+                  'steps': {1: 's'}, 'picture': 'p', 'ingredients': {'salt': 'a pinch of'}}
+
+        with self.assertRaises(ValueError):
+            parse_values(values)
+
+    def test_missing_field(self):
+        with self.assertRaises(KeyError):
+            parse_values({'steps': {}, 'ingredients': {}})
+
+
+class CheckFileTests(ImporterTestCase):
+    def test_libyaml_loader_preferred(self):
+        if hasattr(importer.yaml, 'CSafeLoader'):
+            self.assertIs(importer.YamlLoader, importer.yaml.CSafeLoader)
+        else:
+            self.assertIs(importer.YamlLoader, importer.yaml.SafeLoader)
+
+    def test_unsafe_tags_rejected(self):
+        path = self.write('unsafe.yml', '!!python/object/apply:os.system ["true"]')
+
+        recipe, error = check_file(path)
+
+        self.assertIsNone(recipe)
+        self.assertTrue(error)
+
+    def test_missing_field_message(self):
+        _, error = check_file(self.write('broken.yml', 'title: "Broken"'))
+
+        self.assertIn('field was not found', error)
+
+
+class RecipeImporterTests(ImporterTestCase):
+    def test_recipes_and_ingredients_created(self):
+        paths = [self.recipe_file('Soup'), self.recipe_file('Stew')]
+
+        report = RecipeImporter().run(paths)
+
+        self.assertEqual(report.recipes, 2)
+        self.assertEqual(report.recipe_ingredients, 4)
+        soup = Recipe.objects.get(slug='soup')
+        self.assertEqual(soup.steps, 'First\nSecond')
+        self.assertEqual(soup.author.username, 'test')
+        self.assertEqual(RI.objects.filter(recipe=soup).count(), 2)
+
+    def test_existing_units_and_ingredients_reused(self):
+        report = RecipeImporter().run([self.recipe_file('Soup')])
+
+        self.assertEqual(report.units, 1)  # unit
+        self.assertEqual(report.ingredients, 1)  # onion
+        self.assertEqual(Ingredient.objects.filter(name='Olive Oil').count(), 1)
+        self.assertTrue(Ingredient.objects.get(name='Onion').slug)
+
+    def test_number_of_queries_does_not_depend_on_number_of_recipes(self):
+        User.objects.create_user(username='test', password='test')
+        Unit.objects.create(name='unit', abbrev='unit')
+        Ingredient.objects.create(name='Onion')
+        few = [self.recipe_file(f'Few {i}') for i in range(2)]
+        many = [self.recipe_file(f'Many {i}') for i in range(20)]
+
+        with self.assertNumQueries(10):
+            RecipeImporter().run(few)
+        with self.assertNumQueries(10):
+            RecipeImporter().run(many)
+
+    def test_import_is_idempotent(self):
+        path = self.recipe_file('Soup')
+        RecipeImporter().run([path])
+
+        report = RecipeImporter().run([path])
+
+        self.assertEqual(report.skipped, 1)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_same_titles_get_different_slugs(self):
+        paths = [self.recipe_file('Soup', author='a'), self.write('b.yml', RECIPE.format(
+            title='Soup', author='b'))]
+
+        RecipeImporter().run(paths)
+
+        self.assertEqual(set(Recipe.objects.values_list('slug', flat=True)), {'soup', 'soup-2'})
+
+    def test_bad_files_reported_and_skipped(self):
+        paths = [self.recipe_file('Soup'), self.write('empty.yml', ''),
+                 self.write('broken.yml', 'title: "Broken"')]
+
+        report = RecipeImporter().run(paths)
+
+        self.assertEqual(report.recipes, 1)
+        self.assertEqual(len(report.errors), 2)
+
+    def test_search_index_invalidated_on_commit(self):
+        get_index()
+        recipe_importer = RecipeImporter()
+
+        with mock.patch('utilities.importer.transaction.on_commit') as on_commit:
+            recipe_importer.run([self.recipe_file('Soup')])
+        on_commit.assert_called_once_with(recipe_importer.invalidate_caches)
+        on_commit.call_args[0][0]()  # The transaction commits.
+
+        self.assertIn(Recipe.objects.get().pk, get_index().sizes)
+
+    def test_report_mentions_throughput(self):
+        report = RecipeImporter().run([self.recipe_file('Soup')])
+
+        self.assertIn('recipes/s', str(report))
+
+    def test_small_batches(self):
+        paths = [self.recipe_file(f'Soup {i}') for i in range(5)]
+
+        report = RecipeImporter(batch_size=2).run(paths + paths[:1])
+
+        self.assertEqual(report.recipes, 5)
+        self.assertEqual(report.skipped, 1)
+        self.assertEqual(report.ingredients, 1)
+        self.assertEqual(Recipe.objects.count(), 5)
+
+    def test_files_parsed_in_worker_processes(self):
+        paths = [self.recipe_file(f'Soup {i}') for i in range(20)]
+        paths.append(self.write('empty.yml', ''))
+
+        with mock.patch.object(importer, 'CHUNK_SIZE', 3):
+            report = RecipeImporter(batch_size=4, workers=2).run(paths)
+
+        self.assertEqual(report.files, 21)
+        self.assertEqual(report.recipes, 20)
+        self.assertEqual(report.errors, [(paths[-1], 'File is empty.')])
+        self.assertEqual(Recipe.objects.count(), 20)
+
+
+class IncrementalImportTests(ImporterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = Manifest(os.path.join(self.directory.name, 'manifest.json'))
+        self.soup = self.recipe_file('Soup')
+        self.stew = self.recipe_file('Stew')
+        self.run_import()
+
+    def run_import(self):
+        paths = sorted(os.path.join(self.directory.name, name)
+                       for name in os.listdir(self.directory.name) if name.endswith('.yml'))
+        return RecipeImporter(manifest=self.manifest).run(paths)
+
+    def test_ids_recorded(self):
+        self.assertEqual(self.manifest.get(self.soup)['recipe'], Recipe.objects.get(title='Soup').pk)
+
+    def test_unchanged_files_not_parsed(self):
+        with mock.patch.object(importer, 'check_file') as check:
+            report = self.run_import()
+
+        check.assert_not_called()
+        self.assertEqual(report.unchanged, 2)
+        self.assertFalse(report.changed)
+
+    def test_changed_file_updates_recipe(self):
+        soup = Recipe.objects.get(title='Soup')
+        self.write('Soup.yml', RECIPE.format(title='Soup', author='test').replace(
+            'olive oil: "1 tbsp"', 'garlic: "3 unit"'))
+
+        report = self.run_import()
+
+        self.assertEqual((report.unchanged, report.updated, report.recipes), (1, 1, 0))
+        self.assertEqual(Recipe.objects.get(title='Soup').pk, soup.pk)
+        names = set(RI.objects.filter(recipe=soup).values_list('ingredient__name', flat=True))
+        self.assertEqual(names, {'Garlic', 'Onion'})
+
+    def test_renamed_recipe_keeps_id(self):
+        soup = Recipe.objects.get(title='Soup')
+        self.write('Soup.yml', RECIPE.format(title='Onion Soup', author='test'))
+
+        self.run_import()
+
+        self.assertEqual(Recipe.objects.get(pk=soup.pk).title, 'Onion Soup')
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_removed_file_deletes_recipe(self):
+        os.remove(self.stew)
+
+        report = self.run_import()
+
+        self.assertEqual(report.deleted, 1)
+        self.assertFalse(Recipe.objects.filter(title='Stew').exists())
+        self.assertIsNone(self.manifest.get(self.stew))
+
+    def test_recipe_deleted_meanwhile_is_created_again(self):
+        Recipe.objects.filter(title='Soup').delete()
+        self.write('Soup.yml', RECIPE.format(title='Soup', author='test') + '\n')
+
+        report = self.run_import()
+
+        self.assertEqual(report.recipes, 1)
+        self.assertTrue(Recipe.objects.filter(title='Soup').exists())
+
+    def test_existing_recipes_adopted(self):
+        manifest = Manifest(os.path.join(self.directory.name, 'other.json'))
+
+        report = RecipeImporter(manifest=manifest).run([self.soup])
+
+        self.assertEqual(report.skipped, 1)
+        self.assertEqual(manifest.get(self.soup)['recipe'], Recipe.objects.get(title='Soup').pk)
@@ -0,0 +1,54 @@
+import os
+from tempfile import TemporaryDirectory
+
+from django.test import TestCase
+
+from utilities.manifest import Manifest, file_hash
+
+
+class ManifestTests(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'manifest.json')
+        self.recipe = self.write('recipes/soup.yml', 'title: Soup')
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_hash_depends_on_contents(self):
+        digest = file_hash(self.recipe)
+        self.write('recipes/soup.yml', 'title: Stew')
+
+        self.assertNotEqual(file_hash(self.recipe), digest)
+
+    def test_missing_file_means_empty_manifest(self):
+        self.assertEqual(Manifest(self.path).entries, {})
+
+    def test_saved_and_loaded(self):
+        manifest = Manifest(self.path)
+        manifest.record(self.recipe, 'abc', recipe=1)
+        manifest.save()
+
+        loaded = Manifest(self.path)
+
+        self.assertEqual(loaded.entries, {'recipes/soup.yml': {'hash': 'abc', 'recipe': 1}})
+        self.assertTrue(loaded.unchanged(self.recipe, 'abc'))
+        self.assertFalse(loaded.unchanged(self.recipe, 'def'))
+
+    def test_other_versions_ignored(self):
+        with open(self.path, 'w') as f:
+            f.write('{"version": 0, "files": {"a": {"hash": "b"}}}')
+
+        self.assertEqual(Manifest(self.path).entries, {})
+
+    def test_missing_files(self):
+        manifest = Manifest(self.path)
+        manifest.record(self.recipe, 'abc', recipe=1)
+        manifest.record(os.path.join(self.directory.name, 'recipes', 'gone.yml'), 'def', recipe=2)
+
+        self.assertEqual(list(manifest.missing()), ['recipes/gone.yml'])
@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from recipes.counters import view_counter
+from recipes.models import Recipe
+from utilities.page_cache import purge_pages
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='test')
+        self.recipe = Recipe.objects.create(author=self.user, title='Soup')
+        self.url = reverse('recipes:recipes')
+        purge_pages()
+
+    def tearDown(self):
+        view_counter.clear()
+
+    @override_settings(SHARED_TOKEN_TTL=60)
+    def test_second_request_served_from_cache(self):
+        first = self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(first.content, second.content)
+
+    def test_headers(self):
+        response = self.client.get(self.url)
+
+        self.assertIn('Cookie', response['Vary'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_logged_in_users_not_cached(self):
+        self.client.login(username='test', password='test')
+
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_private_pages_not_cached(self):
+        response = self.client.get(reverse('login'))
+
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get(self.url)
+
+        response = self.client.get(self.url, {'page': 1})
+
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_new_recipe_purges_pages(self):
+        self.client.get(self.url)
+        Recipe.objects.create(author=self.user, title='Stew')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Stew')
+
+    def test_cached_recipe_views_are_counted(self):
+        url = reverse('recipes:recipe_detail', kwargs={'slug': self.recipe.slug})
+        view_counter.clear()
+
+        self.client.get(url)
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(view_counter.pending(self.recipe.pk), 2)
+
+    def test_fridge_links_left_to_client(self):
+        url = reverse('recipes:recipe_detail', kwargs={'slug': self.recipe.slug})
+
+        response = self.client.get(url)
+
+        self.assertContains(response, f'data-fridge-recipe="{self.recipe.pk}"', count=2)
+        self.assertContains(response, reverse('fridge:recipe_ids'))
+
+    def test_home_page_not_cached(self):
+        # Its search form needs a CSRF token of every visitor's own.
+        self.client.get(reverse('home'))
+
+        response = self.client.get(reverse('home'))
+
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+
+class DisabledPageCacheTests(TestCase):
+    def test_nothing_cached_while_testing(self):
+        response = self.client.get(reverse('recipes:recipes'))
+
+        self.assertFalse(response.has_header('X-Page-Cache'))
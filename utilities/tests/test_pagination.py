@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import Recipe
+from utilities.pagination import (
+    AFTER, BEFORE, InvalidCursor, encode_cursor, decode_cursor, estimated_count,
+    keyset_page,
+)
+
+
+class CursorTests(TestCase):
+    def test_round_trip(self):
+        date = timezone.now()
+
+        cursor = encode_cursor(AFTER, [date, 7])
+
+        self.assertEqual(decode_cursor(cursor, ('date', 'id')), (AFTER, [date, 7]))
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(BEFORE, [timezone.now(), 1])
+
+        self.assertRegex(cursor, r'^[A-Za-z0-9_-]+$')
+
+    def test_garbage_is_invalid(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not a cursor', ('date', 'id'))
+
+    def test_wrong_number_of_values_is_invalid(self):
+        cursor = encode_cursor(AFTER, [1])
+
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(cursor, ('date', 'id'))
+
+    def test_values_of_wrong_type_are_invalid(self):
+        tampered = [['x', 'abc'], [1, 2], ['2017-01-01T00:00:00', 'abc'],
+                    ['2017-01-01', 1], [None, 1], ['2017-01-01T00:00:00', True],
+                    ['2017-01-01T00:00:00', '7'], ['2017-01-01T00:00:00', 1.5]]
+
+        for values in tampered:
+            with self.subTest(values=values), self.assertRaises(InvalidCursor):
+                decode_cursor(encode_cursor(AFTER, values), ('date', 'id'), Recipe)
+
+    def test_valid_values_for_model(self):
+        date = timezone.now()
+
+        cursor = encode_cursor(AFTER, [date, 7])
+
+        self.assertEqual(decode_cursor(cursor, ('date', 'id'), Recipe), (AFTER, [date, 7]))
+
+
+class KeysetPageTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='test')
+        self.recipes = [Recipe.objects.create(author=user, title=f'test{i}') for i in range(5)]
+        # Two recipes share a date: ids must break the tie.
+        Recipe.objects.filter(pk=self.recipes[2].pk).update(date=self.recipes[1].date)
+        self.queryset = Recipe.objects.all()
+        caches['local'].clear()
+
+    def page(self, cursor=None, **kwargs):
+        return keyset_page(self.queryset, cursor, 2, **kwargs)
+
+    def test_first_page(self):
+        page = self.page()
+
+        self.assertEqual(list(page), self.recipes[:2])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_walk_forward(self):
+        second = self.page(self.page().next_cursor)
+        third = self.page(second.next_cursor)
+
+        self.assertEqual(list(second), self.recipes[2:4])
+        self.assertEqual(list(third), self.recipes[4:])
+        self.assertFalse(third.has_next())
+        self.assertTrue(third.has_previous())
+
+    def test_walk_backward(self):
+        second = self.page(self.page().next_cursor)
+        third = self.page(second.next_cursor)
+
+        previous = self.page(third.previous_cursor)
+        first = self.page(previous.previous_cursor)
+
+        self.assertEqual(list(previous), self.recipes[2:4])
+        self.assertEqual(list(first), self.recipes[:2])
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursor_gives_first_page(self):
+        self.assertEqual(list(self.page('garbage')), self.recipes[:2])
+
+    def test_no_count_by_default(self):
+        with self.assertNumQueries(1):
+            page = self.page()
+
+        self.assertIsNone(page.estimated_total)
+
+    def test_estimated_total(self):
+        page = self.page(estimate=True)
+
+        self.assertEqual(page.estimated_total, 5)
+
+    def test_estimate_is_reused(self):
+        estimated_count(self.queryset)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(estimated_count(self.queryset), 5)
@@ -1,5 +1,5 @@
 import os
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from unittest import mock
 
 from django.contrib.auth.models import User
@@ -7,6 +7,7 @@ from django.test import TestCase
 
 from ingredients.models import Unit, Ingredient
 from recipes.models import Recipe
+from utilities.manifest import Manifest
 from utilities.populate import (
     get_user, populate_units, populate_ingredients, populate_recipes, bcolors,
     commit_recipe, commit_recipe_ingredient,
@@ -85,6 +86,16 @@ class PopulateUnitsTests(TestCase):
 
         self.assertFalse(units)
 
+    def test_unchanged_file_skipped(self):
+        with TemporaryDirectory() as directory:
+            manifest = Manifest(os.path.join(directory, 'manifest.json'))
+            populate_units(self.units_txt, manifest=manifest)
+            Unit.objects.all().delete()
+
+            populate_units(self.units_txt, manifest=manifest)
+
+        self.assertFalse(Unit.objects.exists())
+
 
 class PopulateIngredientsTests(TestCase):
     def setUp(self):
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+
+from utilities.profiling import Sampler, captures, save
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(PROFILE_DIR=self.directory, PROFILE_INTERVAL=0.001)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+
+class SamplerTests(ProfilingTestCase):
+    def test_samples_the_given_thread(self):
+        sampler = Sampler(threading.get_ident(), 0.001)
+        sampler.start()
+        busy(0.1)
+        sampler.stop()
+
+        self.assertTrue(sampler.stacks)
+        self.assertTrue(any('busy (test_profiling.py' in stack for stack in sampler.stacks))
+
+    def test_collapsed_format(self):
+        sampler = Sampler(threading.get_ident(), 0.001)
+        sampler.stacks['main;busy'] = 3
+        sampler.stacks['main'] = 1
+
+        self.assertEqual(sampler.collapsed(), 'main;busy 3\nmain 1\n')
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_old_captures_removed(self):
+        sampler = Sampler(threading.get_ident(), 0.001)
+        names = [save(sampler, f'/recipes/{n}/') for n in range(3)]
+
+        self.assertEqual(captures(), names[:0:-1])
+        self.assertIn('recipes_2', names[2])
+
+
+class ProfilingMiddlewareTests(ProfilingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', password='test', is_staff=True)
+        self.user = User.objects.create_user(username='user', password='test')
+        self.url = reverse('recipes:recipes')
+
+    def test_staff_request_profiled(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(self.url, {'profile': 1})
+
+        self.assertEqual(captures(), [response['X-Profile']])
+        self.assertIn('recipes', response['X-Profile'])
+
+    def test_header_trigger(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+
+        self.assertEqual(captures(), [response['X-Profile']])
+
+    def test_not_triggered(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(self.url)
+
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(captures(), [])
+
+    def test_not_staff(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url, {'profile': 1})
+
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(captures(), [])
+
+    def test_anonymous(self):
+        response = self.client.get(self.url, {'profile': 1})
+
+        self.assertNotIn('X-Profile', response)
+        self.assertFalse(os.listdir(self.directory))
+
+
+class ProfileViewsTests(ProfilingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(username='staff', password='test', is_staff=True)
+        sampler = Sampler(threading.get_ident(), 0.001)
+        sampler.stacks['main;busy'] = 3
+        self.name = save(sampler, '/fridge/recipes/')
+
+    def test_list(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('profiles:profiles'))
+
+        self.assertContains(response, self.name)
+        self.assertEqual(response.context['captures'][0]['samples'], 3)
+
+    def test_list_requires_staff(self):
+        user = User.objects.create_user(username='user', password='test')
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('profiles:profiles'))
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_download(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('profiles:profile_download', args=[self.name]))
+
+        self.assertEqual(b''.join(response.streaming_content), b'main;busy 3\n')
+
+    def test_download_unknown(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('profiles:profile_download', args=['..settings.py']))
+
+        self.assertEqual(response.status_code, 404)
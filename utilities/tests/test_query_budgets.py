@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from utilities import query_budgets
+from utilities.query_budgets import BUDGETS, Budget, check, duplicates, normalize
+
+
+class QueryBudgetTests(TestCase):
+    """ Every view renders its full template within its query budget. """
+
+    @classmethod
+    def setUpTestData(cls):
+        query_budgets.create_dataset()
+
+    def test_views_within_budgets(self):
+        for budget in BUDGETS:
+            with self.subTest(view=budget.view, user=budget.user, params=budget.params):
+                self.client.logout()
+                query_budgets.login(self.client, budget.user)
+
+                failure = check(self.client, budget)
+
+                if failure:
+                    self.fail(failure)
+
+    def test_report_of_exceeded_budget(self):
+        query_budgets.login(self.client, 'staff')
+
+        failure = check(self.client, Budget('admin:recipes_recipe_changelist', 1, 'staff'))
+
+        self.assertIn('the budget is 1', failure)
+
+
+class DuplicatesTests(TestCase):
+    def test_literals_ignored(self):
+        self.assertEqual(normalize("SELECT * FROM a WHERE id = 1 AND name = 'it''s'"),
+                         'SELECT * FROM a WHERE id = ? AND name = ?')
+        self.assertEqual(normalize('SELECT * FROM a WHERE id IN (1, 2, 3)'),
+                         'SELECT * FROM a WHERE id IN (...)')
+
+    def test_repeated_queries_reported(self):
+        queries = [{'sql': f'SELECT * FROM "auth_user" WHERE "id" = {pk}'} for pk in (1, 2, 2)]
+        queries.append({'sql': 'SELECT 1'})
+
+        report = duplicates(queries)
+
+        self.assertEqual(report, '3 x SELECT * FROM "auth_user" WHERE "id" = ?')
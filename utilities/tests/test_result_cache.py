@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ingredients.models import Ingredient, Unit
+from recipes.models import Recipe, RecipeIngredient as RI
+from utilities.mock_db import populate_recipes
+from utilities.result_cache import ResultCache, search_cache
+from utilities.search_helpers import superset_recipes
+from utilities.search_index import get_index, invalidate_index
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ResultCache(maxsize=2, ttl=60)
+
+    def test_key_is_canonical(self):
+        self.assertEqual(self.cache.key({3, 1, 2}), self.cache.key([2, 3, 1]))
+
+    def test_get_returns_set_value(self):
+        self.cache.set((1, 2), 'value')
+
+        self.assertEqual(self.cache.get((1, 2)), 'value')
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_missing_key(self):
+        self.assertIsNone(self.cache.get((1,)))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_least_recently_used_entry_dropped(self):
+        self.cache.set((1,), 'a')
+        self.cache.set((2,), 'b')
+        self.cache.get((1,))
+        self.cache.set((3,), 'c')
+
+        self.assertEqual(self.cache.get((1,)), 'a')
+        self.assertIsNone(self.cache.get((2,)))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_expired_entry_not_returned(self):
+        self.cache.set((1,), 'a')
+
+        with mock.patch('utilities.result_cache.monotonic', return_value=10 ** 9):
+            self.assertIsNone(self.cache.get((1,)))
+
+    def test_entry_of_other_version_not_returned(self):
+        self.cache.set((1,), 'a', version='old')
+
+        self.assertEqual(self.cache.get((1,), version='old'), 'a')
+        self.assertIsNone(self.cache.get((1,), version='new'))
+
+    @override_settings(SEARCH_CACHE_SIZE=1, SEARCH_CACHE_TTL=0)
+    def test_settings_read_lazily(self):
+        cache = ResultCache()
+        cache.set((1,), 'a')
+        cache.set((2,), 'b')
+
+        self.assertEqual(len(cache), 1)
+        with mock.patch('utilities.result_cache.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get((2,)))
+
+    def test_evict_removes_dependent_entries_only(self):
+        self.cache.set((1, 2), 'a')
+        self.cache.set((3,), 'b')
+
+        self.cache.evict(2)
+
+        self.assertIsNone(self.cache.get((1, 2)))
+        self.assertEqual(self.cache.get((3,)), 'b')
+
+
+class SearchCacheInvalidationTests(TestCase):
+    def setUp(self):
+        search_cache.clear()
+        populate_recipes()
+        self.meat = Ingredient.objects.get(name='Meat')
+
+    def test_results_are_cached(self):
+        superset_recipes({'Meat'})
+
+        key = search_cache.key({self.meat.pk})
+        self.assertEqual(len(search_cache.get(key, get_index().version)), 3)
+
+    def test_new_recipe_ingredient_evicts_entry(self):
+        superset_recipes({'Meat'})
+        recipe = Recipe.objects.create(author=Recipe.objects.first().author, title='New')
+        RI.objects.create(recipe=recipe, ingredient=self.meat, unit=Unit.objects.first(),
+                          quantity=1)
+
+        self.assertIsNone(search_cache.get(search_cache.key({self.meat.pk})))
+        self.assertEqual(len(superset_recipes({'Meat'})), 4)
+
+    def test_deleted_recipe_evicts_entry(self):
+        superset_recipes({'Meat'})
+        Recipe.objects.get(title='Meatrec').delete()
+
+        self.assertEqual(len(superset_recipes({'Meat'})), 2)
+
+    def test_entries_of_previous_index_version_not_used(self):
+        superset_recipes({'Meat'})
+        invalidate_index()  # E.g., by another process.
+
+        self.assertIsNone(search_cache.get(search_cache.key({self.meat.pk}), get_index().version))
+
+    def test_unrelated_change_does_not_evict_entry(self):
+        superset_recipes({'Meat'})
+        RI.objects.filter(ingredient__name='Lemon').first().delete()
+
+        # Although the entry is of the previous index version now.
+        self.assertIn(search_cache.key({self.meat.pk}), search_cache.entries)
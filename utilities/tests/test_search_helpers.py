@@ -1,3 +1,6 @@
+from unittest import mock
+
+import numpy as np
 from django.contrib.auth.models import User
 from django.test import TestCase
 
@@ -7,8 +10,10 @@ from recipes.models import Recipe, RecipeIngredient as RI
 from utilities.mock_db import (
     populate_recipes, populate_fridge_recipes, get_user
 )
+from utilities.search_index import invalidate_index
 from utilities.search_helpers import (
     encode, decode, get_name_set, superset_recipes, recipes_containing,
+    ranked_recipes, MatchedRecipes,
 )
 
 
@@ -144,6 +149,34 @@ class SupersetRecipesTests(TestCase):
         self.assertTrue(set(expected) == set(recipes))
 
 
+class MatchedRecipesTests(TestCase):
+    def setUp(self):
+        self.recipes = list(populate_recipes())
+        self.matched = MatchedRecipes([recipe.pk for recipe in self.recipes])
+
+    def test_only_slice_is_fetched(self):
+        with self.assertNumQueries(1):
+            page = self.matched[1:3]
+
+        self.assertEqual(page, self.recipes[1:3])
+
+    def test_single_recipe(self):
+        self.assertEqual(self.matched[0], self.recipes[0])
+        self.assertEqual(self.matched[-1], self.recipes[-1])
+        with self.assertRaises(IndexError):
+            self.matched[len(self.recipes)]
+
+    def test_deleted_recipes_skipped(self):
+        self.recipes[1].delete()
+
+        self.assertNotIn(self.recipes[1], self.matched[:3])
+
+    @mock.patch('utilities.search_helpers.FETCH_BATCH', 2)
+    def test_iterated_in_batches(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(list(self.matched), self.recipes)
+
+
 class SubsetRecipesTests(TestCase):
     def setUp(self):
         recipes = populate_recipes()
@@ -185,6 +218,14 @@ class SubsetRecipesTests(TestCase):
 
         self.assertFalse(recipes)
 
+    def test_returns_recipes_with_missing_ingredients(self):
+        ingredients = {'meat', 'lemon'}
+        expected = [self.meat, self.meat_lemon_apple, self.lemon]
+
+        recipes = recipes_containing(ingredients, missing=1)
+
+        self.assertEquals(expected, list(recipes))
+
 
 class SubsetRecipesWithFridgeTests(TestCase):
     def setUp(self):
@@ -272,3 +313,60 @@ class SubsetRecipesWithFridgeTests(TestCase):
 
         self.assertEqual(list(recipes), list(fridge_recipes))
 
+
+
+class RankedRecipesTests(TestCase):
+    def setUp(self):
+        recipes = populate_recipes()
+        # Name denotes which ingredients are used for recipe
+        self.meat = recipes[0]
+        self.meat_lemon_apple = recipes[1]
+        self.meat_lemon_apple_bread = recipes[2]
+        self.lemon = recipes[3]
+
+    def test_only_complete_recipes_by_default(self):
+        recipes = ranked_recipes({'Meat', 'Lemon'})
+
+        self.assertEqual(len(recipes), 2)
+        self.assertEqual(recipes[:2], [self.meat, self.lemon])
+
+    def test_fewest_missing_come_first(self):
+        expected = [self.meat, self.lemon, self.meat_lemon_apple,
+                    self.meat_lemon_apple_bread]
+
+        recipes = ranked_recipes({'Meat', 'Lemon'}, missing=2)
+
+        self.assertEqual(recipes[:4], expected)
+        self.assertEqual([r.missing for r in recipes[:4]], [0, 0, 1, 2])
+
+    def test_popular_recipes_come_first_among_equals(self):
+        Recipe.objects.filter(pk=self.lemon.pk).update(views=10)
+        invalidate_index()
+
+        recipes = ranked_recipes({'Meat', 'Lemon'})
+
+        self.assertEqual(recipes[:2], [self.lemon, self.meat])
+
+    def test_slices_are_fetched_separately(self):
+        recipes = ranked_recipes({'Meat', 'Lemon'}, missing=2)
+
+        self.assertEqual(recipes[2:4], [self.meat_lemon_apple, self.meat_lemon_apple_bread])
+        self.assertEqual(recipes[-1], self.meat_lemon_apple_bread)
+
+    def test_candidates_ordered_once(self):
+        recipes = ranked_recipes({'Meat', 'Lemon'}, missing=2)
+
+        with mock.patch('utilities.search_helpers.np.lexsort', wraps=np.lexsort) as lexsort:
+            recipes[:2]
+            recipes[2:4]
+
+        self.assertEqual(lexsort.call_count, 1)
+
+    def test_only_fridge_recipes_considered(self):
+        user = get_user(username='test', password='test')
+        fridge = Fridge.objects.get_or_create(user=user)[0]
+        fridge.recipes.add(self.meat_lemon_apple)
+
+        recipes = ranked_recipes({'Meat', 'Lemon'}, missing=2, fridge=fridge)
+
+        self.assertEqual(recipes[:4], [self.meat_lemon_apple])
@@ -0,0 +1,218 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ingredients.models import Ingredient, Unit
+from recipes.models import Recipe, RecipeIngredient as RI
+from utilities.mock_db import populate_recipes, get_user
+from utilities.search_index import VERSION_KEY, SearchIndex, get_index, invalidate_index
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        recipes = populate_recipes()
+        # Name denotes which ingredients are used for recipe
+        self.meat = recipes[0]
+        self.meat_lemon_apple = recipes[1]
+        self.meat_lemon_apple_bread = recipes[2]
+        self.lemon = recipes[3]
+        self.index = SearchIndex.build()
+
+    def ids(self, *names):
+        return self.index.ingredient_ids(names)
+
+    def test_every_recipe_is_indexed(self):
+        expected = set(Recipe.objects.values_list('id', flat=True))
+
+        self.assertEqual(set(self.index.sizes), expected)
+
+    def test_recipe_sizes(self):
+        self.assertEqual(self.index.sizes[self.meat.pk], 1)
+        self.assertEqual(self.index.sizes[self.meat_lemon_apple_bread.pk], 4)
+
+    def test_unknown_names_are_skipped(self):
+        ids = self.ids('Meat', 'Fairy Dust')
+
+        self.assertEqual(len(ids), 1)
+
+    def test_superset(self):
+        expected = {self.meat_lemon_apple.pk, self.meat_lemon_apple_bread.pk}
+
+        matched = self.index.superset(self.ids('Meat', 'Apple'))
+
+        self.assertEqual(matched, expected)
+
+    def test_superset_of_nothing_is_empty(self):
+        self.assertEqual(self.index.superset(set()), set())
+
+    def test_subset(self):
+        expected = {self.meat.pk, self.lemon.pk}
+
+        matched = self.index.subset(self.ids('Meat', 'Lemon'))
+
+        self.assertEqual(matched, expected)
+
+    def test_missing_ingredients(self):
+        missing = dict(zip(self.index.recipe_ids.tolist(),
+                           self.index.missing(self.ids('Meat', 'Lemon')).tolist()))
+
+        self.assertEqual(missing[self.meat.pk], 0)
+        self.assertEqual(missing[self.lemon.pk], 0)
+        self.assertEqual(missing[self.meat_lemon_apple.pk], 1)
+        self.assertEqual(missing[self.meat_lemon_apple_bread.pk], 2)
+
+    def test_coverage_ratio(self):
+        missing, ratio = self.index.coverage(self.ids('Meat', 'Lemon'))
+        ratio = dict(zip(self.index.recipe_ids.tolist(), ratio.tolist()))
+
+        self.assertEqual(ratio[self.meat.pk], 1.0)
+        self.assertEqual(ratio[self.meat_lemon_apple_bread.pk], 0.5)
+
+    def test_subset_with_missing_ingredients(self):
+        expected = {self.meat.pk, self.lemon.pk, self.meat_lemon_apple.pk}
+
+        matched = self.index.subset(self.ids('Meat', 'Lemon'), missing=1)
+
+        self.assertEqual(matched, expected)
+
+    def test_subset_includes_recipes_without_ingredients(self):
+        r = Recipe.objects.create(author=get_user('test', 'test'), title='Nothing')
+        index = SearchIndex.build()
+
+        matched = index.subset(set())
+        missing, ratio = index.coverage(set())
+
+        self.assertEqual(matched, {r.pk})
+        self.assertEqual(ratio[index.rows[r.pk]], 1.0)
+
+
+class QuantityMatchingTests(TestCase):
+    def setUp(self):
+        user = get_user('test', 'test')
+        self.g = Unit.objects.create(name='gram', abbrev='g')
+        self.kg = Unit.objects.create(name='kilogram', abbrev='kg')
+        self.piece = Unit.objects.create(name='unit', abbrev='unit')
+        self.lemon = Ingredient.objects.create(name='Lemon', unit_weight=100)
+        self.sugar = Ingredient.objects.create(name='Sugar')
+
+        self.lemonade = Recipe.objects.create(author=user, title='Lemonade')
+        RI.objects.create(recipe=self.lemonade, ingredient=self.lemon, unit=self.piece, quantity=2)
+        RI.objects.create(recipe=self.lemonade, ingredient=self.sugar, unit=self.g, quantity=50)
+        self.tart = Recipe.objects.create(author=user, title='Tart')
+        RI.objects.create(recipe=self.tart, ingredient=self.lemon, unit=self.g, quantity=500)
+        RI.objects.create(recipe=self.tart, ingredient=self.sugar, unit=self.kg, quantity=1)
+
+        self.index = SearchIndex.build()
+
+    def shortages(self, stock):
+        shortages = self.index.shortages(stock)
+        return {r: shortages[self.index.rows[r.pk]] for r in (self.lemonade, self.tart)}
+
+    def test_sufficient_for_one_recipe_only(self):
+        stock = {self.lemon.pk: (3, 'unit'), self.sugar.pk: (0.1, 'kg')}
+
+        shortages = self.shortages(stock)
+
+        self.assertEqual(shortages[self.lemonade], 0)
+        self.assertEqual(shortages[self.tart], 2)
+
+    def test_insufficient_for_all_recipes(self):
+        stock = {self.lemon.pk: (1, 'unit'), self.sugar.pk: (10, 'g')}
+
+        shortages = self.shortages(stock)
+
+        self.assertEqual(shortages[self.lemonade], 2)
+        self.assertEqual(shortages[self.tart], 2)
+
+    def test_units_are_converted(self):
+        stock = {self.lemon.pk: (0.6, 'kg'), self.sugar.pk: (1000, 'g')}
+
+        shortages = self.shortages(stock)
+
+        self.assertEqual(shortages[self.lemonade], 0)
+        self.assertEqual(shortages[self.tart], 0)
+
+    def test_missing_ingredients_count_as_short(self):
+        stock = {self.lemon.pk: (10, 'unit')}
+
+        shortages = self.shortages(stock)
+
+        self.assertEqual(shortages[self.lemonade], 1)
+
+
+class IndexInvalidationTests(TestCase):
+    def setUp(self):
+        populate_recipes()
+        self.index = get_index()
+
+    def test_index_is_reused(self):
+        self.assertIs(get_index(), self.index)
+
+    def test_explicit_invalidation(self):
+        invalidate_index()
+
+        self.assertIsNot(get_index(), self.index)
+
+    def test_new_recipe_ingredient_invalidates(self):
+        recipe = Recipe.objects.get(title='Meatrec')
+        ingredient = Ingredient.objects.create(name='Salt', type='Salt')
+        RI.objects.create(recipe=recipe, ingredient=ingredient, quantity=1,
+                          unit=Unit.objects.first())
+
+        index = get_index()
+
+        self.assertEqual(index.sizes[recipe.pk], 2)
+
+    def test_deleted_recipe_invalidates(self):
+        recipe = Recipe.objects.get(title='Meatrec')
+        pk = recipe.pk
+        recipe.delete()
+
+        self.assertNotIn(pk, get_index().sizes)
+
+    def test_updated_recipe_does_not_invalidate(self):
+        recipe = Recipe.objects.get(title='Meatrec')
+        recipe.views += 1
+        recipe.save()
+
+        self.assertIs(get_index(), self.index)
+
+    def test_old_index_is_rebuilt(self):
+        with override_settings(SEARCH_INDEX_MAX_AGE=0):
+            self.assertIsNot(get_index(), self.index)
+
+    def test_version_is_shared_through_cache(self):
+        cache.set(VERSION_KEY, 'changed', None)  # E.g., by another process.
+
+        self.assertIsNot(get_index(), self.index)
+
+    @override_settings(SHARED_TOKEN_TTL=60)
+    def test_version_read_at_most_once_per_ttl(self):
+        get_index()
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_index(), self.index)
+
+    @override_settings(SHARED_TOKEN_TTL=60)
+    def test_own_invalidation_seen_within_ttl(self):
+        get_index()
+        invalidate_index()
+
+        self.assertIsNot(get_index(), self.index)
+
+    def test_views_refreshed_without_rebuild(self):
+        recipe = Recipe.objects.get(title='Meatrec')
+        Recipe.objects.filter(pk=recipe.pk).update(views=10)
+
+        with override_settings(SEARCH_INDEX_VIEWS_TTL=0):
+            index = get_index()
+
+        self.assertIs(index, self.index)
+        self.assertEqual(index.views[index.rows[recipe.pk]], 10)
+
+    def test_views_reused_within_ttl(self):
+        Recipe.objects.update(views=10)
+
+        with self.assertNumQueries(1):  # The version of the index.
+            index = get_index()
+
+        self.assertEqual(index.views.max(), 0)
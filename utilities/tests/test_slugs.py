@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.test import TestCase
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from utilities.slugs import SlugAllocator, base_slug, unique_slug
+
+
+class SlugAllocatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='test')
+
+    def create(self, title):
+        return Recipe.objects.create(author=self.user, title=title)
+
+    def test_free_slug_is_base(self):
+        self.assertEqual(unique_slug(Recipe, 'Chili Con Carne'), 'chili-con-carne')
+
+    def test_next_suffix(self):
+        for _ in range(3):
+            self.create('Chili')
+
+        slugs = set(Recipe.objects.values_list('slug', flat=True))
+
+        self.assertEqual(slugs, {'chili', 'chili-2', 'chili-3'})
+
+    def test_one_query_regardless_of_taken_suffixes(self):
+        for _ in range(5):
+            self.create('Chili')
+
+        with self.assertNumQueries(1):
+            slug = unique_slug(Recipe, 'Chili')
+
+        self.assertEqual(slug, 'chili-6')
+
+    def test_longer_slugs_with_same_prefix_ignored(self):
+        self.create('Chili')
+        self.create('Chili Con Carne')
+
+        self.assertEqual(unique_slug(Recipe, 'Chili'), 'chili-2')
+
+    def test_only_numbered_variants_loaded(self):
+        for title in ('Chili', 'Chili 2', 'Chili Con Carne', 'Chili 2 Go', 'Chilies'):
+            self.create(title)
+        allocator = SlugAllocator(Recipe)
+
+        with mock.patch.object(allocator, '_take', wraps=allocator._take) as take:
+            allocator.load(['chili'])
+
+        self.assertEqual(sorted(call[0][0] for call in take.call_args_list), ['chili', 'chili-2'])
+
+    def test_free_base_used_even_if_suffixes_taken(self):
+        self.create('Chili 3')
+
+        self.assertEqual(unique_slug(Recipe, 'Chili'), 'chili')
+
+    def test_slug_of_other_title_counts_as_suffix(self):
+        self.create('Chili')
+        self.create('Chili 2')
+
+        self.assertEqual(unique_slug(Recipe, 'Chili'), 'chili-3')
+
+    def test_bulk_allocation(self):
+        self.create('Soup')
+        allocator = SlugAllocator(Recipe)
+
+        with self.assertNumQueries(1):
+            slugs = allocator.allocate_many(['Soup', 'Stew', 'Soup', 'Stew'])
+
+        self.assertEqual(slugs, ['soup-2', 'stew', 'soup-3', 'stew-2'])
+
+    def test_bulk_allocation_knows_own_slugs(self):
+        allocator = SlugAllocator(Recipe)
+
+        slugs = allocator.allocate_many(['Soup', 'Soup', 'Soup 2'])
+
+        self.assertEqual(len(set(slugs)), 3)
+
+    def test_long_titles_leave_room_for_suffix(self):
+        max_length = Recipe._meta.get_field('slug').max_length
+
+        slug = base_slug(Recipe, 'a' * 200)
+
+        self.assertLess(len(slug), max_length)
+
+    def test_unsluggable_text(self):
+        self.assertEqual(unique_slug(Recipe, '!!!'), 'recipe')
+
+    def test_ingredient_slugs_get_suffixes(self):
+        i1 = Ingredient.objects.create(name=';test:')
+        i2 = Ingredient.objects.create(name=':test:')
+        i3 = Ingredient.objects.create(name='test')
+
+        self.assertEqual([i1.slug, i2.slug, i3.slug], ['test', 'test-2', 'test-3'])
+
+    def test_retry_when_slug_taken_concurrently(self):
+        self.create('Soup')
+        # Another process allocated 'soup' before our insert.
+        stale = iter(['soup'])
+        with mock.patch('utilities.slugs.unique_slug',
+                        side_effect=lambda *args: next(stale, 'soup-2')):
+            recipe = self.create('Soup')
+
+        self.assertEqual(recipe.slug, 'soup-2')
+
+    def test_other_integrity_errors_not_retried(self):
+        Ingredient.objects.create(name='Salt')
+
+        with self.assertRaises(IntegrityError):
+            Ingredient.objects.create(name='Salt')
@@ -0,0 +1,125 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from fridge.models import Fridge, FridgeIngredient
+from ingredients.models import Ingredient
+from recipes.models import Rating, Recipe, RecipeIngredient as RI
+from utilities.synthetic import (
+    RECIPE_SIZE, clear_dataset, generate_dataset, sample, synthetic, zipf_weights,
+)
+
+
+def recipe_contents():
+    """ :return: {recipe slug: set of ingredient names}. """
+
+    contents = {}
+    for slug, name in RI.objects.values_list('recipe__slug', 'ingredient__name'):
+        contents.setdefault(slug, set()).add(name)
+    return contents
+
+
+class SyntheticDatasetTests(TestCase):
+    def test_counts(self):
+        counts = generate_dataset(users=5, ingredients=30, recipes=40, chunk_size=7)
+
+        self.assertEqual(counts['User'], 5)
+        self.assertEqual(Fridge.objects.filter(user__in=synthetic(User)).count(), 5)
+        self.assertEqual(Ingredient.objects.count(), 30)
+        self.assertEqual(Recipe.objects.count(), 40)
+        self.assertEqual(RI.objects.count(), counts['RecipeIngredient'])
+        self.assertEqual(FridgeIngredient.objects.count(), counts['FridgeIngredient'])
+
+    def test_recipe_sizes_within_bounds(self):
+        generate_dataset(users=2, ingredients=50, recipes=30)
+
+        sizes = Recipe.objects.annotate(n=Count('recipeingredient')).values_list('n', flat=True)
+
+        self.assertTrue(all(RECIPE_SIZE[0] <= n <= RECIPE_SIZE[2] for n in sizes))
+
+    def test_same_seed_same_dataset(self):
+        generate_dataset(users=3, ingredients=20, recipes=20, seed=1)
+        first = recipe_contents()
+
+        generate_dataset(users=3, ingredients=20, recipes=20, seed=1)
+
+        self.assertEqual(recipe_contents(), first)
+        self.assertEqual(Recipe.objects.count(), 20)
+
+    def test_different_seed_different_dataset(self):
+        generate_dataset(users=3, ingredients=20, recipes=20, seed=1)
+        first = recipe_contents()
+
+        generate_dataset(users=3, ingredients=20, recipes=20, seed=2)
+
+        self.assertNotEqual(recipe_contents(), first)
+
+    def test_popular_ingredients_used_more(self):
+        generate_dataset(users=2, ingredients=100, recipes=200)
+
+        uses = dict(RI.objects.values_list('ingredient__slug').annotate(n=Count('id')))
+
+        self.assertGreater(uses['synthetic-0'], 10 * uses.get('synthetic-99', 0))
+
+    def test_clear_keeps_real_data(self):
+        user = User.objects.create_user(username='real', password='real')
+        generate_dataset(users=2, ingredients=10, recipes=5)
+        Rating.objects.create(user=user, recipe=Recipe.objects.first(), stars=5)
+        real = Recipe.objects.create(author=user, title='Soup')
+
+        clear_dataset()
+
+        self.assertEqual(list(Recipe.objects.all()), [real])
+        self.assertEqual(list(User.objects.all()), [user])
+        self.assertFalse(Ingredient.objects.exists())
+        self.assertFalse(Rating.objects.exists())
+
+    def test_clear_keeps_real_data_named_like_synthetic(self):
+        user = User.objects.create_user(username='synthetic-0', password='real')
+        ingredient = Ingredient.objects.create(name='Synthetic-vanilla')
+        recipe = Recipe.objects.create(author=user, title='Synthetic 0')
+        generate_dataset(users=2, ingredients=10, recipes=5)
+
+        clear_dataset()
+
+        self.assertEqual(list(User.objects.all()), [user])
+        self.assertEqual(list(Ingredient.objects.all()), [ingredient])
+        self.assertEqual(list(Recipe.objects.all()), [recipe])
+
+    def test_taken_slugs_skipped(self):
+        user = User.objects.create_user(username='real', password='real')
+        real = Recipe.objects.create(author=user, title='Synthetic 1')
+
+        generate_dataset(users=2, ingredients=10, recipes=5)
+
+        generated = synthetic(Recipe).values_list('slug', flat=True)
+        self.assertEqual(real.slug, 'synthetic-1')
+        self.assertEqual(len(set(generated)), 5)
+        self.assertNotIn(real.slug, generated)
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command('generate_dataset', users=2, ingredients=10, recipes=5, stdout=out)
+
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertIn('rows/s', out.getvalue())
+
+
+class SampleTests(TestCase):
+    def test_weights(self):
+        weights = zipf_weights(10)
+
+        self.assertAlmostEqual(weights.sum(), 1)
+        self.assertTrue(all(weights[:-1] > weights[1:]))
+
+    def test_distinct_items(self):
+        import numpy as np
+        cdf = np.cumsum(zipf_weights(5))
+
+        chosen = sample(np.random.RandomState(0), cdf, 10, 5)
+
+        self.assertEqual(sorted(chosen), [0, 1, 2, 3, 4])
@@ -0,0 +1,100 @@
+import json
+import re
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from recipes.counters import view_counter
+from recipes.models import Recipe
+from utilities.page_cache import purge_pages
+from utilities.timing import Metrics, server_timing
+
+
+def entries(response):
+    """ :return: {metric name: parameters} of a Server-Timing header. """
+
+    metrics = {}
+    for entry in re.split(r', (?=[\w-]+;)', response['Server-Timing']):
+        name, *parameters = entry.split(';')
+        metrics[name] = dict(parameter.split('=', 1) for parameter in parameters)
+    return metrics
+
+
+@override_settings(TIMING_SAMPLE_RATE=1, TIMING_SLOW_REQUEST=60)
+class TimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test', password='test')
+        self.recipe = Recipe.objects.create(author=self.user, title='Soup')
+        self.url = reverse('recipes:recipe_detail', kwargs={'slug': self.recipe.slug})
+
+    def tearDown(self):
+        view_counter.clear()
+
+    def test_server_timing_header(self):
+        with self.assertLogs('cookme.timing', 'INFO') as logs:
+            response = self.client.get(self.url)
+
+        metrics = entries(response)
+        self.assertEqual(set(metrics), {'total', 'db', 'tpl'})
+        self.assertGreater(float(metrics['tpl']['dur']), 0)
+        self.assertEqual(metrics['db']['desc'], '"2 queries"')
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+
+    def test_log_line(self):
+        with self.assertLogs('cookme.timing', 'INFO') as logs:
+            self.client.get(self.url)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['path'], self.url)
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['queries'], 2)
+        self.assertNotIn('sql', line)
+
+    @override_settings(TIMING_SLOW_REQUEST=0)
+    def test_slow_request_logged_with_sql(self):
+        with self.assertLogs('cookme.timing', 'WARNING') as logs:
+            self.client.get(self.url)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(len(line['sql']), 2)
+        self.assertIn('recipes_recipe', line['sql'][0])
+
+    def test_debug_cursor_restored(self):
+        with self.assertLogs('cookme.timing', 'INFO'):
+            self.client.get(self.url)
+
+        self.assertFalse(connection.force_debug_cursor)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60, SHARED_TOKEN_TTL=60)
+    def test_page_cache_hits_and_misses(self):
+        purge_pages()
+        url = reverse('recipes:recipes')
+        with self.assertLogs('cookme.timing', 'INFO'):
+            first = self.client.get(url)
+            second = self.client.get(url)
+        purge_pages()
+
+        self.assertEqual(entries(first)['cache-page']['desc'], '"0 hits, 1 misses"')
+        self.assertEqual(entries(second)['cache-page']['desc'], '"1 hits, 0 misses"')
+        self.assertEqual(entries(second)['db']['desc'], '"0 queries"')
+
+    @override_settings(TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(self.url)
+
+        self.assertNotIn('Server-Timing', response)
+
+
+class ServerTimingTests(TestCase):
+    def test_caches_are_sorted(self):
+        metrics = Metrics()
+        metrics.caches['search', 'hit'] += 2
+        metrics.caches['count', 'miss'] += 1
+
+        header = server_timing(metrics, 0.0125)
+
+        self.assertEqual(header, 'total;dur=12.5, db;dur=0.0;desc="0 queries", tpl;dur=0.0, '
+                                 'cache-count;desc="0 hits, 1 misses", '
+                                 'cache-search;desc="2 hits, 0 misses"')
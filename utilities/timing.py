@@ -0,0 +1,181 @@
+"""
+Per-request performance instrumentation.
+
+For a sample of requests (TIMING_SAMPLE_RATE), TimingMiddleware measures:
+
+    - total time spent in Django (middleware included);
+    - time spent in and number of database queries;
+    - time spent rendering templates;
+    - hits and misses of the page, search result and count caches.
+
+Measurements are sent to the browser as a Server-Timing header (visible in
+the developer tools) and logged as one JSON line per request by the
+'cookme.timing' logger. Requests that take longer than TIMING_SLOW_REQUEST
+seconds are logged as warnings, along with their SQL.
+
+Note: Django 1.11 cannot wrap query execution, hence queries are collected
+the way DEBUG does it: sampled requests force the debug cursor, which
+records SQL and duration of every query in connection.queries_log.
+
+Template rendering is timed by TimedDjangoTemplates, a template backend
+that has to be configured in TEMPLATES. Queries that run while a template
+is rendered (e.g., lazy query sets) count towards both template and
+database time.
+"""
+
+import json
+import logging
+import random
+import threading
+from collections import Counter
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger('cookme.timing')
+
+_local = threading.local()
+
+
+class Metrics:
+    """ Measurements of a single request. """
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.template = 0.0
+        self.caches = Counter()  # (cache name, 'hit' or 'miss') -> count
+        self.queries = []
+        self.debug_cursors = {}  # connection alias -> original value
+        self.logged = {}  # connection alias -> length of the query log
+
+    def watch_queries(self):
+        for connection in connections.all():
+            self.debug_cursors[connection.alias] = connection.force_debug_cursor
+            self.logged[connection.alias] = len(connection.queries_log)
+            connection.force_debug_cursor = True
+
+    def collect_queries(self):
+        for connection in connections.all():
+            if connection.alias not in self.logged:
+                continue
+            # The log is a bounded deque; it could have dropped old entries.
+            new = max(len(connection.queries_log) - self.logged[connection.alias], 0)
+            self.queries += list(connection.queries_log)[-new:] if new else []
+            connection.force_debug_cursor = self.debug_cursors[connection.alias]
+
+    @property
+    def total(self):
+        return perf_counter() - self.start
+
+    @property
+    def db(self):
+        return sum(float(query['time']) for query in self.queries)
+
+
+def current():
+    """ :return: Metrics of the request being handled, if it is sampled. """
+
+    return getattr(_local, 'metrics', None)
+
+
+def record_cache(name, hit):
+    """ Counts a cache hit or miss towards the request being handled. """
+
+    metrics = current()
+    if metrics is not None:
+        metrics.caches[name, 'hit' if hit else 'miss'] += 1
+
+
+def server_timing(metrics, total):
+    """ :return: value of the Server-Timing header. """
+
+    entries = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={metrics.db * 1000:.1f};desc="{len(metrics.queries)} queries"',
+        f'tpl;dur={metrics.template * 1000:.1f}',
+    ]
+    for name in sorted({name for name, _ in metrics.caches}):
+        hits, misses = metrics.caches[name, 'hit'], metrics.caches[name, 'miss']
+        entries.append(f'cache-{name};desc="{hits} hits, {misses} misses"')
+    return ', '.join(entries)
+
+
+class TimingMiddleware(MiddlewareMixin):
+    """
+    Measures sampled requests. Should come first, so that time spent in
+    other middleware (e.g., serving cached pages) is included.
+    """
+
+    def process_request(self, request):
+        stale = current()
+        if stale is not None:  # A previous request did not finish normally.
+            stale.collect_queries()
+        _local.metrics = None
+        if random.random() >= getattr(settings, 'TIMING_SAMPLE_RATE', 0):
+            return
+        _local.metrics = Metrics()
+        _local.metrics.watch_queries()
+
+    def process_response(self, request, response):
+        metrics = current()
+        _local.metrics = None
+        if metrics is None:
+            return response
+
+        total = metrics.total
+        metrics.collect_queries()
+        response['Server-Timing'] = server_timing(metrics, total)
+
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(metrics.db * 1000, 1),
+            'queries': len(metrics.queries),
+            'template_ms': round(metrics.template * 1000, 1),
+            'caches': {f'{name}_{outcome}': n for (name, outcome), n in metrics.caches.items()},
+        }
+        if total >= getattr(settings, 'TIMING_SLOW_REQUEST', 1.0):
+            line['sql'] = [f"{query['time']}s {query['sql']}" for query in metrics.queries]
+            logger.warning(json.dumps(line))
+        else:
+            logger.info(json.dumps(line))
+        return response
+
+
+class TimedTemplate:
+    """ Wraps a template of Django's backend, timing its rendering. """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template += perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django's template backend that times rendering of sampled requests.
+    Templates that are included or extended are part of the time of the
+    template that is rendered.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
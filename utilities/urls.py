@@ -0,0 +1,11 @@
+from django.conf.urls import url
+
+from .views import (
+    profiles,
+    profile_download,
+)
+
+urlpatterns = [
+    url(r'^$', profiles, name='profiles'),
+    url(r'^(?P<name>[\w\-.]+)$', profile_download, name='profile_download'),
+]
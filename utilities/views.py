@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.utils import timezone
+
+from .profiling import capture_path, captures
+
+
+@staff_member_required
+def profiles(request):
+    """
+    Lists captures of the request profiler (see utilities/profiling.py).
+
+    :param request: standard request object.
+    :return: standard HttpResponse object.
+    """
+
+    listed = []
+    for name in captures():
+        path = capture_path(name)
+        with open(path, encoding='utf-8') as f:
+            samples = sum(int(line.rsplit(' ', 1)[1]) for line in f if line.strip())
+        listed.append({
+            'name': name,
+            'date': datetime.fromtimestamp(os.path.getmtime(path), timezone.utc),
+            'samples': samples,
+        })
+
+    return render(request, 'admin/profiles.html', {'captures': listed, 'title': 'Profiles'})
+
+
+@staff_member_required
+def profile_download(request, name):
+    """
+    Serves a capture as a text file.
+
+    :param request: standard request object.
+    :param name: file name of the capture.
+    :return: FileResponse with the capture.
+    """
+
+    path = capture_path(name)
+    if path is None:
+        raise Http404('No such capture.')
+    response = FileResponse(open(path, 'rb'), content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{name}"'
+    return response